@@ -4,6 +4,8 @@ Task Tree Planning:
 Carefully read and grasp the primary objective of the question.
 Using only the available tools, start building your task tree.
 Fill in "thought", "action", and "action_input" relevant to the task completion.
+For tools that take several arguments, "action_input" must be a JSON object keyed by the argument names listed for that tool.
+To pass another task's result into "action_input", write {{{{task_N.observation}}}}, where N is that task's "task_no". If that result is JSON, select part of it with {{{{task_N.observation.field}}}} or {{{{task_N.observation.items[0].title}}}}. The reference is replaced by the result when the task runs, so a chain such as search, then summarize, then translate needs no replanning. Only reference a task that runs earlier: an ancestor on level 1 or deeper, or a task on an earlier level or earlier at the same level. The root task on level 0 never runs and a task's own subtasks run after it, so never reference either.
 Strictly keep the keys "observation" and "final_answer" in the tree for tree structure consistency but leave them blank.
 Only add subtasks if essential, considering their action, action_input, and contribution towards the immediate and root task.
 Document your task tree in the specified JSON format, detailing all tasks and subtasks accordingly.
@@ -59,6 +61,8 @@ Carefully review the existing task tree and the observations made so far.
 Identify any points where the plan needs adjustment to better achieve the primary objective.
 Using only the available tools, update the task tree as needed.
 Fill in "thought", "action", and "action_input" relevant to the new or adjusted tasks.
+For tools that take several arguments, "action_input" must be a JSON object keyed by the argument names listed for that tool.
+To pass another task's result into "action_input", write {{{{task_N.observation}}}}, where N is that task's "task_no". If that result is JSON, select part of it with {{{{task_N.observation.field}}}} or {{{{task_N.observation.items[0].title}}}}. The reference is replaced by the result when the task runs, so a chain such as search, then summarize, then translate needs no replanning. Only reference a task that runs earlier: an ancestor on level 1 or deeper, or a task on an earlier level or earlier at the same level. The root task on level 0 never runs and a task's own subtasks run after it, so never reference either.
 Retain the keys "observation" and "final_answer" for tree structure consistency but leave them blank for any new tasks.
 Only add new subtasks if essential, considering their action, action_input, and contribution towards the immediate and root task.
 Document your updated task tree in the specified JSON format.
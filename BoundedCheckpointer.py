@@ -0,0 +1,247 @@
+# bounded_checkpointer.py
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+from langgraph.checkpoint.memory import MemorySaver
+
+# Checkpoints kept per thread and namespace; older ones are pruned with their writes and blobs
+DEFAULT_CHECKPOINTS_PER_THREAD = int(os.environ.get('REACTREE_CHECKPOINTS_PER_THREAD', 5))
+# Threads kept before the least recently used is evicted
+DEFAULT_MAX_THREADS = int(os.environ.get('REACTREE_CHECKPOINT_MAX_THREADS', 1000))
+# Seconds a thread may stay idle before it is evicted; 0 disables expiry
+DEFAULT_THREAD_TTL = float(os.environ.get('REACTREE_CHECKPOINT_THREAD_TTL', 3600))
+# Serialized values at least this large are stored once per distinct content
+DEFAULT_COMPACT_MIN_BYTES = int(os.environ.get('REACTREE_CHECKPOINT_COMPACT_BYTES', 1024))
+
+
+class BoundedMemorySaver(MemorySaver):
+    """
+    An in-memory LangGraph checkpointer with bounded growth.
+
+    Only the latest checkpoints of each thread are kept, idle threads are evicted
+    least-recently-used and by age, and large serialized channel values and
+    pending writes are stored once per distinct content hash, so a state field
+    repeated across checkpoints and threads costs its size only once.
+    """
+
+    def __init__(self, max_checkpoints_per_thread: int = DEFAULT_CHECKPOINTS_PER_THREAD,
+                 max_threads: int = DEFAULT_MAX_THREADS, thread_ttl: Optional[float] = DEFAULT_THREAD_TTL,
+                 compact_min_bytes: int = DEFAULT_COMPACT_MIN_BYTES, serde: Optional[Any] = None):
+        """
+        Initialize the BoundedMemorySaver class.
+
+        Args:
+            max_checkpoints_per_thread (int): Checkpoints kept per thread. Defaults to
+                REACTREE_CHECKPOINTS_PER_THREAD or 5.
+            max_threads (int): Threads kept in memory. Defaults to REACTREE_CHECKPOINT_MAX_THREADS or 1000.
+            thread_ttl (Optional[float]): Idle seconds before a thread is evicted; None or 0 never
+                expires. Defaults to REACTREE_CHECKPOINT_THREAD_TTL or 3600.
+            compact_min_bytes (int): Smallest serialized value that is deduplicated by content.
+                Defaults to 1024.
+            serde (Optional[Any]): The LangGraph serializer. Defaults to the MemorySaver default.
+        """
+        super().__init__(serde=serde)
+        self.max_checkpoints_per_thread = max(1, max_checkpoints_per_thread)
+        self.max_threads = max_threads
+        self.thread_ttl = thread_ttl or None
+        self.compact_min_bytes = compact_min_bytes
+
+        self._lock = threading.RLock()
+        # Last access time per thread, least recently used first
+        self._threads: "OrderedDict[str, float]" = OrderedDict()
+        # Channel versions of every stored checkpoint, to find blobs no checkpoint references
+        self._versions: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._blob_keys: Dict[Tuple[str, str], Set[tuple]] = {}
+        # Checkpoint ids with pending writes; writes can arrive after their checkpoint was pruned
+        self._write_ids: Dict[Tuple[str, str], Set[str]] = {}
+        # Content-addressed store: digest -> [bytes, reference count]
+        self._contents: Dict[bytes, list] = {}
+        self._digests: Dict[tuple, bytes] = {}
+        self.counters: Dict[str, int] = {"checkpoints_pruned": 0, "threads_evicted": 0, "dedup_hits": 0}
+
+    def _intern(self, ref: tuple, typed: Tuple[str, bytes]) -> Tuple[str, bytes]:
+        kind, data = typed
+        if len(data) < self.compact_min_bytes:
+            return typed
+        self._release(ref)
+        digest = hashlib.sha256(data).digest()
+        entry = self._contents.get(digest)
+        if entry is None:
+            entry = self._contents[digest] = [data, 0]
+        else:
+            self.counters["dedup_hits"] += 1
+        entry[1] += 1
+        self._digests[ref] = digest
+        return kind, entry[0]
+
+    def _release(self, ref: tuple):
+        digest = self._digests.pop(ref, None)
+        if digest is None:
+            return
+        entry = self._contents[digest]
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del self._contents[digest]
+
+    def _touch(self, thread_id: str):
+        self._threads[thread_id] = time.monotonic()
+        self._threads.move_to_end(thread_id)
+
+    def put(self, config: Dict[str, Any], checkpoint: Dict[str, Any], metadata: Any,
+            new_versions: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+            thread_id = config["configurable"]["thread_id"]
+            checkpoint_ns = config["configurable"]["checkpoint_ns"]
+            blob_keys = self._blob_keys.setdefault((thread_id, checkpoint_ns), set())
+            for channel, version in new_versions.items():
+                key = (thread_id, checkpoint_ns, channel, version)
+                blob_keys.add(key)
+                self.blobs[key] = self._intern(("blob",) + key, self.blobs[key])
+            # Metadata of input steps carries the whole input, so it is compacted too
+            saved, saved_metadata, parent = self.storage[thread_id][checkpoint_ns][checkpoint["id"]]
+            self.storage[thread_id][checkpoint_ns][checkpoint["id"]] = (
+                saved, self._intern(("metadata", thread_id, checkpoint_ns, checkpoint["id"]), saved_metadata), parent)
+            self._versions[(thread_id, checkpoint_ns, checkpoint["id"])] = dict(checkpoint["channel_versions"])
+            self._touch(thread_id)
+            self._prune(thread_id, checkpoint_ns)
+            self._evict()
+            return next_config
+
+    def put_writes(self, config: Dict[str, Any], writes: Any, task_id: str, task_path: str = "") -> None:
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+            configurable = config["configurable"]
+            thread_id, checkpoint_ns = configurable["thread_id"], configurable.get("checkpoint_ns", "")
+            outer_key = (thread_id, checkpoint_ns, configurable["checkpoint_id"])
+            checkpoints = self.storage[thread_id][checkpoint_ns]
+            if outer_key[2] not in checkpoints and checkpoints and outer_key[2] < min(checkpoints):
+                # The checkpoint was already pruned, so nothing will read these writes
+                self._drop_writes(*outer_key)
+                return
+            self._write_ids.setdefault((thread_id, checkpoint_ns), set()).add(outer_key[2])
+            for inner_key, (write_task_id, channel, value, write_path) in self.writes[outer_key].items():
+                ref = ("write",) + outer_key + inner_key
+                if write_task_id == task_id:
+                    self.writes[outer_key][inner_key] = (write_task_id, channel, self._intern(ref, value), write_path)
+            self._touch(configurable["thread_id"])
+
+    def get_tuple(self, config: Dict[str, Any]) -> Any:
+        with self._lock:
+            thread_id = config["configurable"]["thread_id"]
+            # MemorySaver's defaultdicts would otherwise keep an empty entry per unknown thread
+            if thread_id not in self.storage:
+                return None
+            self._touch(thread_id)
+            return super().get_tuple(config)
+
+    def list(self, config: Optional[Dict[str, Any]], **kwargs) -> Iterator[Any]:
+        # Materialised under the lock so pruning cannot change the dicts mid-iteration
+        with self._lock:
+            items = [*super().list(config, **kwargs)]
+        yield from items
+
+    def _drop_checkpoint(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str):
+        self.storage[thread_id][checkpoint_ns].pop(checkpoint_id, None)
+        self._release(("metadata", thread_id, checkpoint_ns, checkpoint_id))
+        self._versions.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+        self._drop_writes(thread_id, checkpoint_ns, checkpoint_id)
+
+    def _drop_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str):
+        outer_key = (thread_id, checkpoint_ns, checkpoint_id)
+        for inner_key in self.writes.pop(outer_key, {}):
+            self._release(("write",) + outer_key + inner_key)
+        self._write_ids.get((thread_id, checkpoint_ns), set()).discard(checkpoint_id)
+
+    def _prune(self, thread_id: str, checkpoint_ns: str):
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.max_checkpoints_per_thread:
+            return
+        # Checkpoint ids sort by creation time
+        for checkpoint_id in sorted(checkpoints)[:-self.max_checkpoints_per_thread]:
+            self._drop_checkpoint(thread_id, checkpoint_ns, checkpoint_id)
+            self.counters["checkpoints_pruned"] += 1
+        oldest = min(checkpoints)
+        for checkpoint_id in list(self._write_ids.get((thread_id, checkpoint_ns), ())):
+            if checkpoint_id < oldest:
+                self._drop_writes(thread_id, checkpoint_ns, checkpoint_id)
+        referenced = set()
+        for checkpoint_id in checkpoints:
+            versions = self._versions.get((thread_id, checkpoint_ns, checkpoint_id), {})
+            referenced.update((thread_id, checkpoint_ns, channel, version) for channel, version in versions.items())
+        blob_keys = self._blob_keys.get((thread_id, checkpoint_ns), set())
+        for key in blob_keys - referenced:
+            self.blobs.pop(key, None)
+            self._release(("blob",) + key)
+            blob_keys.discard(key)
+
+    def _evict(self):
+        if self.thread_ttl is not None:
+            cutoff = time.monotonic() - self.thread_ttl
+            while self._threads and next(iter(self._threads.values())) < cutoff:
+                self._delete(next(iter(self._threads)))
+                self.counters["threads_evicted"] += 1
+        while len(self._threads) > self.max_threads:
+            self._delete(next(iter(self._threads)))
+            self.counters["threads_evicted"] += 1
+
+    def _delete(self, thread_id: str):
+        self._threads.pop(thread_id, None)
+        for checkpoint_ns, checkpoints in list(self.storage.get(thread_id, {}).items()):
+            for checkpoint_id in list(checkpoints):
+                self._drop_checkpoint(thread_id, checkpoint_ns, checkpoint_id)
+            for checkpoint_id in self._write_ids.pop((thread_id, checkpoint_ns), set()):
+                self._drop_writes(thread_id, checkpoint_ns, checkpoint_id)
+            for key in self._blob_keys.pop((thread_id, checkpoint_ns), set()):
+                self.blobs.pop(key, None)
+                self._release(("blob",) + key)
+        self.storage.pop(thread_id, None)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """
+        Delete every checkpoint, write and blob of a thread.
+
+        Args:
+            thread_id (str): The thread to delete.
+        """
+        with self._lock:
+            self._delete(thread_id)
+
+    def evict_expired(self):
+        """
+        Evict idle threads now instead of waiting for the next checkpoint.
+        """
+        with self._lock:
+            self._evict()
+
+    def memory_stats(self) -> Dict[str, int]:
+        """
+        Report how much serialized state is held and how much deduplication saved.
+
+        Returns:
+            Dict[str, int]: Thread, checkpoint, blob and write counts, stored bytes,
+                bytes saved by content hashing, and pruning/eviction counters.
+        """
+        with self._lock:
+            values = [value for namespaces in self.storage.values() for checkpoints in namespaces.values()
+                      for (_, checkpoint), (_, metadata), _ in checkpoints.values() for value in (checkpoint, metadata)]
+            values += [value for _, value in self.blobs.values()]
+            values += [value for writes in self.writes.values() for _, _, (_, value), _ in writes.values()]
+            logical_bytes = sum(len(value) for value in values)
+            # Interned values are the same bytes object wherever they are referenced
+            stored_bytes = sum(len(value) for value in {id(value): value for value in values}.values())
+            return {
+                "threads": len(self._threads),
+                "checkpoints": len(self._versions),
+                "blobs": len(self.blobs),
+                "writes": sum(len(writes) for writes in self.writes.values()),
+                "unique_contents": len(self._contents),
+                "stored_bytes": stored_bytes,
+                "dedup_saved_bytes": logical_bytes - stored_bytes,
+                **self.counters,
+            }
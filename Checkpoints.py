@@ -0,0 +1,312 @@
+# checkpoints.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Directory holding the checkpoint databases unless explicit paths are given
+CHECKPOINT_DIR = os.environ.get('REACTREE_CHECKPOINT_DIR', '.reactree')
+DEFAULT_TASK_CHECKPOINT_PATH = os.environ.get('REACTREE_TASK_CHECKPOINT_DB',
+                                              os.path.join(CHECKPOINT_DIR, 'task_checkpoints.sqlite'))
+DEFAULT_GRAPH_CHECKPOINT_PATH = os.environ.get('REACTREE_GRAPH_CHECKPOINT_DB',
+                                               os.path.join(CHECKPOINT_DIR, 'graph_checkpoints.sqlite'))
+# "sqlite" persists LangGraph threads to disk, "memory" keeps them in memory; both are bounded
+GRAPH_CHECKPOINTER = os.environ.get('REACTREE_GRAPH_CHECKPOINTER', 'sqlite')
+
+CREATE_TABLES_SQL = """
+CREATE TABLE IF NOT EXISTS checkpoint_runs (
+    run_id TEXT PRIMARY KEY,
+    mode TEXT,
+    status TEXT,
+    question TEXT,
+    task_tree TEXT,
+    created_at REAL,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS checkpoint_tasks (
+    run_id TEXT,
+    task_key TEXT,
+    action TEXT,
+    action_input TEXT,
+    observation TEXT,
+    completed_at REAL,
+    PRIMARY KEY (run_id, task_key)
+);
+"""
+
+
+def _dumps(value: Any) -> str:
+    try:
+        return json.dumps(value)
+    except (TypeError, ValueError):
+        return json.dumps(str(value))
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    # WAL keeps each commit to one append, and NORMAL sync survives a process crash
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def task_paths(task: Dict[str, Any], path: str = "0") -> Dict[int, str]:
+    """
+    Assigns every task in a tree a stable key from its position, e.g. "0.2.1".
+
+    Args:
+        task (Dict[str, Any]): The root task.
+        path (str): The key of the root. Defaults to "0".
+
+    Returns:
+        Dict[int, str]: Task key by id() of the task dictionary.
+    """
+    paths = {}
+    stack = [(task, path)]
+    while stack:
+        current, current_path = stack.pop()
+        paths[id(current)] = current_path
+        for index, sub_task in enumerate(current.get('sub_tasks') or []):
+            stack.append((sub_task, f"{current_path}.{index}"))
+    return paths
+
+
+def _find_task(task: Dict[str, Any], key: str) -> Optional[Dict[str, Any]]:
+    for index in key.split(".")[1:]:
+        sub_tasks = task.get('sub_tasks') or []
+        if not index.isdigit() or int(index) >= len(sub_tasks):
+            return None
+        task = sub_tasks[int(index)]
+    return task
+
+
+class TaskCheckpointStore:
+    """
+    Records each completed task observation to a local SQLite file as it happens,
+    so a run interrupted by a crash or restart can be reloaded and only its
+    unfinished tasks executed again.
+    """
+
+    def __init__(self, path: Optional[str] = None, keep_finished: bool = False):
+        """
+        Initialize the TaskCheckpointStore class.
+
+        Args:
+            path (Optional[str]): The SQLite file. Defaults to REACTREE_TASK_CHECKPOINT_DB
+                or .reactree/task_checkpoints.sqlite.
+            keep_finished (bool): Keep checkpoints of finished runs instead of deleting
+                them. Defaults to False.
+        """
+        self.path = path or DEFAULT_TASK_CHECKPOINT_PATH
+        self.keep_finished = keep_finished
+        self._lock = threading.Lock()
+        self._conn = _connect(self.path)
+        self._conn.executescript(CREATE_TABLES_SQL)
+
+    def save_tree(self, run_id: str, mode: str, task_tree: Dict[str, Any]):
+        """
+        Store the current tree of a running run, at start and after every replan.
+
+        Args:
+            run_id (str): The run identifier.
+            mode (str): The execution mode used to resume it (e.g. "bfs_parallel").
+            task_tree (Dict[str, Any]): The full task tree.
+        """
+        question = task_tree.get('task_tree', {}).get('task', {}).get('original_question')
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO checkpoint_runs (run_id, mode, status, question, task_tree, created_at, updated_at) "
+                "VALUES (?, ?, 'running', ?, ?, ?, ?) "
+                "ON CONFLICT(run_id) DO UPDATE SET mode = excluded.mode, status = 'running', "
+                "question = excluded.question, task_tree = excluded.task_tree, updated_at = excluded.updated_at",
+                (run_id, mode, question, json.dumps(task_tree), now, now))
+
+    def record_task(self, run_id: str, task_key: str, task: Dict[str, Any]):
+        """
+        Store the observation of a completed task.
+
+        Args:
+            run_id (str): The run identifier.
+            task_key (str): The task's key from task_paths.
+            task (Dict[str, Any]): The executed task dictionary.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoint_tasks "
+                "(run_id, task_key, action, action_input, observation, completed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, task_key, task.get('action'), _dumps(task.get('action_input')),
+                 _dumps(task.get('observation')), time.time()))
+
+    def finish_run(self, run_id: str, task_tree: Optional[Dict[str, Any]] = None):
+        """
+        Mark a run as finished, deleting its checkpoints unless keep_finished is set.
+
+        Args:
+            run_id (str): The run identifier.
+            task_tree (Optional[Dict[str, Any]]): The final task tree.
+        """
+        if not self.keep_finished:
+            self.delete_run(run_id)
+            return
+        with self._lock:
+            self._conn.execute(
+                "UPDATE checkpoint_runs SET status = 'finished', task_tree = COALESCE(?, task_tree), "
+                "updated_at = ? WHERE run_id = ?",
+                (json.dumps(task_tree) if task_tree is not None else None, time.time(), run_id))
+
+    def load_run(self, run_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Rebuild a run's task tree with every checkpointed observation filled in.
+
+        An observation is only restored when the task at its position still has the
+        same action and action_input, so a replan that reshaped the tree after the
+        checkpoint was written cannot attach results to the wrong task.
+
+        Args:
+            run_id (str): The run identifier.
+
+        Returns:
+            Optional[Tuple[str, Dict[str, Any]]]: The execution mode and task tree, or None
+                if the run is unknown.
+        """
+        with self._lock:
+            run = self._conn.execute("SELECT mode, task_tree FROM checkpoint_runs WHERE run_id = ?",
+                                     (run_id,)).fetchone()
+            if run is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT task_key, action, action_input, observation FROM checkpoint_tasks WHERE run_id = ?",
+                (run_id,)).fetchall()
+        mode, tree_json = run
+        task_tree = json.loads(tree_json)
+        root = task_tree['task_tree']['task']
+        for task_key, action, action_input, observation in rows:
+            task = _find_task(root, task_key)
+            if task is not None and task.get('action') == action and _dumps(task.get('action_input')) == action_input:
+                task['observation'] = json.loads(observation)
+        return mode, task_tree
+
+    def unfinished_runs(self) -> List[Dict[str, Any]]:
+        """
+        List runs that were started but never finished, oldest first.
+
+        Returns:
+            List[Dict[str, Any]]: run_id, mode, question, completed task count and updated_at of each run.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT r.run_id, r.mode, r.question, COUNT(t.task_key), r.updated_at "
+                "FROM checkpoint_runs r LEFT JOIN checkpoint_tasks t ON t.run_id = r.run_id "
+                "WHERE r.status = 'running' GROUP BY r.run_id ORDER BY r.updated_at").fetchall()
+        return [{"run_id": run_id, "mode": mode, "question": question, "completed_tasks": completed,
+                 "updated_at": updated_at} for run_id, mode, question, completed, updated_at in rows]
+
+    def delete_run(self, run_id: str):
+        """
+        Remove a run and its task checkpoints.
+
+        Args:
+            run_id (str): The run identifier.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM checkpoint_tasks WHERE run_id = ?", (run_id,))
+                self._conn.execute("DELETE FROM checkpoint_runs WHERE run_id = ?", (run_id,))
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+_memory_checkpointer = None
+_memory_checkpointer_lock = threading.Lock()
+
+
+def get_memory_checkpointer() -> Any:
+    """
+    Returns the process-wide BoundedMemorySaver, shared by sync and async graphs.
+
+    Returns:
+        BoundedMemorySaver: The in-memory checkpointer.
+    """
+    global _memory_checkpointer
+    if _memory_checkpointer is None:
+        with _memory_checkpointer_lock:
+            if _memory_checkpointer is None:
+                from BoundedCheckpointer import BoundedMemorySaver
+                _memory_checkpointer = BoundedMemorySaver()
+    return _memory_checkpointer
+
+
+def get_graph_checkpointer(path: Optional[str] = None) -> Any:
+    """
+    Returns a LangGraph checkpointer that persists graph state to a SQLite file.
+
+    The file is bounded like the in-memory store: old checkpoints of each thread are
+    pruned and idle threads evicted. With REACTREE_GRAPH_CHECKPOINTER=memory, or when
+    langgraph-checkpoint-sqlite is not installed, the bounded in-memory checkpointer
+    is returned instead.
+
+    Args:
+        path (Optional[str]): The SQLite file. Defaults to REACTREE_GRAPH_CHECKPOINT_DB
+            or .reactree/graph_checkpoints.sqlite.
+
+    Returns:
+        Any: A BoundedSqliteSaver, or a BoundedMemorySaver.
+    """
+    if GRAPH_CHECKPOINTER == 'memory':
+        return get_memory_checkpointer()
+    try:
+        from SqliteCheckpointer import BoundedSqliteSaver
+    except ImportError:
+        print("langgraph-checkpoint-sqlite is not installed; graph checkpoints are kept in memory only.")
+        return get_memory_checkpointer()
+    return BoundedSqliteSaver(_connect(path or DEFAULT_GRAPH_CHECKPOINT_PATH))
+
+
+async def aget_graph_checkpointer(path: Optional[str] = None) -> Any:
+    """
+    Returns an async LangGraph checkpointer for graphs driven with astream/ainvoke.
+
+    The connection belongs to the running event loop, so create one per loop.
+    Uses the bounded in-memory checkpointer under the same conditions as
+    get_graph_checkpointer.
+
+    Args:
+        path (Optional[str]): The SQLite file. Defaults to REACTREE_GRAPH_CHECKPOINT_DB
+            or .reactree/graph_checkpoints.sqlite.
+
+    Returns:
+        Any: A BoundedAsyncSqliteSaver, or a BoundedMemorySaver.
+    """
+    if GRAPH_CHECKPOINTER == 'memory':
+        return get_memory_checkpointer()
+    try:
+        import aiosqlite
+        from SqliteCheckpointer import BoundedAsyncSqliteSaver
+    except ImportError:
+        print("langgraph-checkpoint-sqlite is not installed; graph checkpoints are kept in memory only.")
+        return get_memory_checkpointer()
+    path = path or DEFAULT_GRAPH_CHECKPOINT_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = await aiosqlite.connect(path)
+    await conn.execute("PRAGMA journal_mode=WAL")
+    await conn.execute("PRAGMA synchronous=NORMAL")
+    return BoundedAsyncSqliteSaver(conn)
@@ -0,0 +1,298 @@
+# circuit_breaker.py
+
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Set
+
+from Deadlines import Deadline, ToolTimeoutError, call_tool
+
+# Extra attempts for a tool call that failed with a transient error
+DEFAULT_RETRIES = int(os.environ.get('REACTREE_TOOL_RETRIES', 2))
+# Backoff before retry n is uniform in [0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** n)]
+RETRY_BASE_DELAY = float(os.environ.get('REACTREE_RETRY_BASE_DELAY', 0.2))
+RETRY_MAX_DELAY = float(os.environ.get('REACTREE_RETRY_MAX_DELAY', 5.0))
+# Consecutive transient failures that open a tool's circuit
+BREAKER_THRESHOLD = int(os.environ.get('REACTREE_BREAKER_THRESHOLD', 5))
+# Seconds an open circuit waits before letting one probe call through
+BREAKER_RESET_TIMEOUT = float(os.environ.get('REACTREE_BREAKER_RESET', 30))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+_TRANSIENT_NAMES = {
+    "ConnectionError", "Timeout", "ConnectTimeout", "ReadTimeout", "ChunkedEncodingError",
+    "TimeoutException", "ConnectError", "ReadError", "WriteError", "PoolTimeout", "RemoteProtocolError",
+}
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a tool whose circuit is open.
+    """
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Tells whether an error is worth retrying: timeouts, connection errors and
+    HTTP 429/5xx, including when a tool re-raised them as another exception.
+
+    Args:
+        error (BaseException): The error a tool call raised.
+
+    Returns:
+        bool: True for transient errors.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None)
+        if status is not None:
+            return status == 429 or status >= 500
+        # requests' and httpx's network errors do not derive from the builtin ones
+        if isinstance(error, (TimeoutError, ConnectionError)) or type(error).__name__ in _TRANSIENT_NAMES:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast while a tool keeps failing, then lets one probe through.
+
+    The circuit opens after `threshold` consecutive transient failures. After
+    `reset_timeout` seconds it is half-open: one call is let through, and the
+    circuit closes if that call succeeds or opens again if it fails.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        """
+        Initialize the CircuitBreaker class.
+
+        Args:
+            threshold (int): Consecutive failures that open the circuit. Defaults to
+                REACTREE_BREAKER_THRESHOLD or 5.
+            reset_timeout (float): Seconds before a probe is allowed. Defaults to REACTREE_BREAKER_RESET or 30.
+        """
+        self.threshold = max(1, threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return CLOSED
+        return HALF_OPEN if time.monotonic() - self.opened_at >= self.reset_timeout else OPEN
+
+    def allow(self) -> bool:
+        """
+        Ask to make a call.
+
+        Returns:
+            bool: True when the circuit is closed, or when this call is the half-open probe.
+        """
+        with self._lock:
+            state = self.state
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.counters["rejected"] += 1
+            return False
+
+    def record_success(self):
+        """
+        Close the circuit after a call that got an answer from the tool.
+        """
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        """
+        Count a transient failure, opening the circuit at the threshold or after a failed probe.
+        """
+        with self._lock:
+            self.failures += 1
+            if self._probing or (self.opened_at is None and self.failures >= self.threshold):
+                if self.opened_at is None:
+                    self.counters["opened"] += 1
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self):
+        """
+        Give back the probe slot of a call that ended without saying anything about
+        the tool, such as one cut short by the run's deadline.
+        """
+        with self._lock:
+            self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: State, consecutive failures, seconds until a probe, and counters.
+        """
+        with self._lock:
+            retry_in = None
+            if self.opened_at is not None:
+                retry_in = round(max(0.0, self.opened_at + self.reset_timeout - time.monotonic()), 3)
+            return {"state": self.state, "failures": self.failures, "retry_in_s": retry_in, **self.counters}
+
+
+class BreakerRegistry:
+    """
+    One circuit breaker per tool name, created on first use.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        """
+        Initialize the BreakerRegistry class.
+
+        Args:
+            threshold (int): Failures that open a circuit. Defaults to REACTREE_BREAKER_THRESHOLD or 5.
+            reset_timeout (float): Seconds before a probe. Defaults to REACTREE_BREAKER_RESET or 30.
+        """
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        """
+        Return the breaker of a tool.
+
+        Args:
+            name (str): The tool name.
+
+        Returns:
+            CircuitBreaker: The breaker.
+        """
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(name, CircuitBreaker(self.threshold, self.reset_timeout))
+        return breaker
+
+    def unavailable(self, names: Optional[Iterable[str]] = None) -> Set[str]:
+        """
+        Return the tools whose circuit is open; half-open tools count as available.
+
+        Args:
+            names (Optional[Iterable[str]]): Restrict the check to these tools.
+
+        Returns:
+            Set[str]: The tool names.
+        """
+        names = list(self._breakers) if names is None else names
+        return {name for name in names if name in self._breakers and self._breakers[name].state == OPEN}
+
+    def available(self, tools: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Drop tools whose circuit is open, so the planner only plans with working tools.
+
+        Args:
+            tools (Dict[str, Any]): Tools keyed by name.
+
+        Returns:
+            Dict[str, Any]: The tools that may be called; the same dict when all are.
+        """
+        down = self.unavailable(tools)
+        return {name: tool for name, tool in tools.items() if name not in down} if down else tools
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            Dict[str, Dict[str, Any]]: Each tool's breaker snapshot.
+        """
+        return {name: breaker.snapshot() for name, breaker in list(self._breakers.items())}
+
+
+# Shared by every engine and the graph, so one run's failures protect the others
+tool_breakers = BreakerRegistry()
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY) -> float:
+    """
+    Full-jitter exponential backoff.
+
+    Args:
+        attempt (int): The retry number, from 0.
+        base (float): The first retry's maximum delay.
+        cap (float): The largest delay.
+
+    Returns:
+        float: Seconds to sleep.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def call_tool_with_retry(tool: Any, tool_input: Any, timeout: Optional[float] = None,
+                         deadline: Optional[Deadline] = None, retries: Optional[int] = None) -> Any:
+    """
+    Run a tool through its circuit breaker, retrying transient errors with backoff.
+
+    Args:
+        tool (Any): The LangChain tool.
+        tool_input (Any): The coerced tool input.
+        timeout (Optional[float]): Seconds each attempt may take.
+        deadline (Optional[Deadline]): The run's deadline; no retry starts or sleeps past it, a timed-out
+            call is not retried with less than its timeout left, and a call the deadline cut short
+            counts neither for nor against the tool.
+        retries (Optional[int]): Extra attempts. Defaults to the tool's declared "retries",
+            else REACTREE_TOOL_RETRIES.
+
+    Returns:
+        Any: The tool's result.
+
+    Raises:
+        CircuitOpenError: If the tool's circuit is open.
+    """
+    breaker = tool_breakers.get(tool.name)
+    if retries is None:
+        retries = (getattr(tool, 'metadata', None) or {}).get("retries")
+    retries = DEFAULT_RETRIES if retries is None else retries
+    attempt = 0
+    while True:
+        if deadline is not None and deadline.expired:
+            # Checked before the breaker, since running out of time says nothing about the tool
+            raise ToolTimeoutError(f"Run deadline passed before {tool.name} started.")
+        if not breaker.allow():
+            raise CircuitOpenError(f"{tool.name} is unavailable after repeated failures; "
+                                   f"retry in {breaker.snapshot()['retry_in_s']}s.")
+        remaining = deadline.remaining() if deadline is not None else None
+        # With less time left than the tool's timeout, a timeout is the deadline's, not the tool's
+        cut_by_deadline = remaining is not None and not (timeout and timeout <= remaining)
+        try:
+            result = call_tool(tool, tool_input, timeout, deadline)
+        except Exception as e:
+            if isinstance(e, ToolTimeoutError) and cut_by_deadline:
+                breaker.release()
+                raise
+            if not is_transient(e):
+                # The tool answered, so the upstream is up; the input was at fault
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if attempt >= retries:
+                raise
+            delay = backoff_delay(attempt)
+            remaining = deadline.remaining() if deadline is not None else None
+            if remaining is not None and remaining <= delay:
+                raise
+            if isinstance(e, ToolTimeoutError) and timeout and remaining is not None and remaining < delay + timeout:
+                # The retry would be cut short by the deadline before the tool's own timeout
+                raise
+            print(f"Retrying {tool.name} in {delay:.2f}s after transient error: {e}")
+            time.sleep(delay)
+            attempt += 1
+            continue
+        breaker.record_success()
+        return result
@@ -1,7 +1,10 @@
 # db_helpers.py
 import asyncio
+import csv
+import io
 import pandas as pd
 import psycopg2
+from psycopg2 import sql
 import asyncpg
 from google.cloud import bigquery
 import time
@@ -40,6 +43,91 @@ class PostgresDBHelper:
         self.close_sync()
         return df
 
+    def execute_sync(self, query):
+        """
+        Executes a statement (e.g. DDL) on a short-lived sync connection and commits it.
+
+        Args:
+            query (str): The SQL statement to execute.
+        """
+        self.sync_connect()
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute(query)
+            self.conn.commit()
+        finally:
+            self.close_sync()
+
+    def copy_connect_sync(self):
+        """
+        Opens the long-lived connection used by copy_rows_sync, separate from the
+        short-lived one that the query helpers open and close.
+        """
+        if getattr(self, 'copy_conn', None) is None or self.copy_conn.closed:
+            self.copy_conn = psycopg2.connect(**self.connection_params)
+
+    def close_copy_sync(self):
+        if getattr(self, 'copy_conn', None) is not None and not self.copy_conn.closed:
+            self.copy_conn.close()
+
+    def copy_rows_sync(self, table, columns, rows, skip_conflicts=False):
+        """
+        Bulk loads rows into a table with a single COPY ... FROM STDIN.
+
+        The COPY connection is opened on first use and kept open so that a
+        background writer can stream many batches over one connection; call
+        close_copy_sync() when done.
+
+        Args:
+            table (str): The target table, optionally schema-qualified.
+            columns (List[str]): The column names, in row order.
+            rows (List[tuple]): The rows to load. None is written as NULL.
+            skip_conflicts (bool): COPY into a temporary staging table and insert with
+                ON CONFLICT DO NOTHING, so rows whose key already exists are skipped
+                instead of failing the batch. Defaults to False.
+        """
+        self.copy_connect_sync()
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        target = sql.Identifier(*table.split('.'))
+        column_list = sql.SQL(', ').join(sql.Identifier(column) for column in columns)
+        staging = sql.Identifier("reactree_copy_staging")
+        try:
+            with self.copy_conn.cursor() as cur:
+                if skip_conflicts:
+                    cur.execute(sql.SQL("CREATE TEMP TABLE {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP").format(
+                        staging, target))
+                    cur.copy_expert(sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+                        staging, column_list), buffer)
+                    cur.execute(sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {} ON CONFLICT DO NOTHING").format(
+                        target, column_list, column_list, staging))
+                else:
+                    cur.copy_expert(sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+                        target, column_list), buffer)
+            self.copy_conn.commit()
+        except Exception:
+            self.copy_conn.rollback()
+            raise
+
+    async def copy_rows_async(self, table, columns, rows):
+        """
+        Bulk loads rows into a table using asyncpg's binary COPY protocol.
+
+        Args:
+            table (str): The target table, optionally schema-qualified.
+            columns (List[str]): The column names, in row order.
+            rows (List[tuple]): The rows to load.
+        """
+        schema_name, _, table_name = table.rpartition('.')
+        await self.async_connect()
+        try:
+            await self.conn.copy_records_to_table(
+                table_name, records=rows, columns=columns, schema_name=schema_name or None
+            )
+        finally:
+            await self.close_async()
+
 class BigQueryDBHelper:
     def __init__(self, project_id):
         self.client = bigquery.Client(project=project_id)
@@ -0,0 +1,277 @@
+# deadlines.py
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Deque, Dict, Optional
+
+from ToolRegistry import process_target, tool_arguments, tool_execution_class
+
+# Seconds a single tool call may take unless the tool or the task sets its own; 0 disables
+DEFAULT_TOOL_TIMEOUT = float(os.environ.get('REACTREE_TOOL_TIMEOUT', 60))
+# Seconds a whole run may take; 0 disables
+DEFAULT_RUN_DEADLINE = float(os.environ.get('REACTREE_RUN_DEADLINE', 0))
+# A hedged tool gets a second attempt once the first has run longer than this latency percentile
+HEDGE_PERCENTILE = float(os.environ.get('REACTREE_HEDGE_PERCENTILE', 95))
+# Successful calls observed before a tool is hedged
+HEDGE_MIN_SAMPLES = int(os.environ.get('REACTREE_HEDGE_MIN_SAMPLES', 20))
+# Latency samples kept per tool
+LATENCY_WINDOW = int(os.environ.get('REACTREE_LATENCY_WINDOW', 200))
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_stats_lock = threading.Lock()
+call_stats: Dict[str, int] = {"calls": 0, "timeouts": 0, "hedges": 0, "hedge_wins": 0}
+
+
+class ToolTimeoutError(TimeoutError):
+    """
+    Raised when a tool call does not finish within its timeout or the run's deadline.
+    """
+
+
+class Deadline:
+    """
+    An absolute point in time by which a run must finish, passed down to every task.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        """
+        Initialize the Deadline class.
+
+        Args:
+            seconds (Optional[float]): Seconds from now; None or 0 means no deadline.
+        """
+        self.expires_at = time.monotonic() + seconds if seconds else None
+
+    @classmethod
+    def at(cls, epoch: Optional[float]) -> "Deadline":
+        """
+        Build a deadline from wall-clock time, e.g. one stored in graph state.
+
+        Args:
+            epoch (Optional[float]): Epoch seconds; None or 0 means no deadline.
+
+        Returns:
+            Deadline: The deadline.
+        """
+        deadline = cls()
+        if epoch:
+            deadline.expires_at = time.monotonic() + (epoch - time.time())
+        return deadline
+
+    def epoch(self) -> Optional[float]:
+        """
+        Returns:
+            Optional[float]: The deadline as epoch seconds, or None.
+        """
+        return None if self.expires_at is None else time.time() + (self.expires_at - time.monotonic())
+
+    def remaining(self) -> Optional[float]:
+        """
+        Returns:
+            Optional[float]: Seconds left, never negative, or None without a deadline.
+        """
+        return None if self.expires_at is None else max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def timeout(self, limit: Optional[float] = None) -> Optional[float]:
+        """
+        The time a call may take: its own limit, capped by what is left of the deadline.
+
+        Args:
+            limit (Optional[float]): The call's own timeout in seconds; None or 0 means none.
+
+        Returns:
+            Optional[float]: Seconds, or None for no limit.
+        """
+        candidates = [limit] if limit else []
+        if self.expires_at is not None:
+            candidates.append(self.remaining())
+        return min(candidates) if candidates else None
+
+
+class LatencyTracker:
+    """
+    Keeps a sliding window of successful call durations per tool.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        """
+        Initialize the LatencyTracker class.
+
+        Args:
+            window (int): Samples kept per tool. Defaults to REACTREE_LATENCY_WINDOW or 200.
+        """
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        """
+        Add a duration sample.
+
+        Args:
+            name (str): The tool name.
+            seconds (float): The call's duration.
+        """
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, name: str, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """
+        Return a latency percentile of a tool.
+
+        Args:
+            name (str): The tool name.
+            percentile (float): The percentile, 0 to 100.
+            min_samples (int): Samples required for an answer. Defaults to 1.
+
+        Returns:
+            Optional[float]: Seconds, or None with too few samples.
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(name, ()))
+        if not samples or len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, max(0, math.ceil(percentile / 100 * len(samples)) - 1))]
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns:
+            Dict[str, Dict[str, float]]: Sample count, p50 and p95 per tool.
+        """
+        with self._lock:
+            names = list(self._samples)
+        return {name: {"count": len(self._samples[name]), "p50": self.percentile(name, 50),
+                       "p95": self.percentile(name, 95)} for name in names}
+
+
+# Shared by every engine, so hedging thresholds learn from all runs in the process
+tool_latency = LatencyTracker()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="reactree-async-tools", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def _run_on_thread(tool: Any, tool_input: Any) -> Future:
+    future: Future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(tool.run(tool_input))
+        except BaseException as e:
+            future.set_exception(e)
+
+    # Daemon thread: a call that never returns is abandoned instead of blocking the run or exit
+    threading.Thread(target=run, name=f"reactree-tool-{tool.name}", daemon=True).start()
+    return future
+
+
+def _submit(tool: Any, tool_input: Any) -> Future:
+    target = process_target(tool) if tool_execution_class(tool) == "cpu" else None
+    if target:
+        from ProcessLane import submit_batch_in_process, submit_in_process
+        batch = (getattr(tool, 'metadata', None) or {}).get("batch")
+        if batch:
+            return submit_batch_in_process(*target, tool_arguments(tool, tool_input), batch)
+        return submit_in_process(*target, tool_arguments(tool, tool_input))
+    if getattr(tool, 'coroutine', None) is not None:
+        # Cancelling this future cancels the coroutine on the loop, closing its connections
+        return asyncio.run_coroutine_threadsafe(tool.arun(tool_input), _get_loop())
+    return _run_on_thread(tool, tool_input)
+
+
+def _count(key: str):
+    with _stats_lock:
+        call_stats[key] += 1
+
+
+def call_tool(tool: Any, tool_input: Any, timeout: Optional[float] = DEFAULT_TOOL_TIMEOUT,
+              deadline: Optional[Deadline] = None) -> Any:
+    """
+    Run a tool within a timeout, hedging slow calls of tools declared hedge=True.
+
+    Tools with an async variant run on a shared event loop and are cancelled on
+    timeout; cpu-bound tools go to the process lane; other tools run on a daemon
+    thread that is abandoned on timeout. A hedged tool gets a second attempt once
+    the first is slower than its HEDGE_PERCENTILE latency; the first result wins.
+
+    Args:
+        tool (Any): The LangChain tool.
+        tool_input (Any): The coerced tool input.
+        timeout (Optional[float]): Seconds the call may take; None or 0 for no limit.
+        deadline (Optional[Deadline]): The run's deadline, which caps the timeout.
+
+    Returns:
+        Any: The tool's result.
+
+    Raises:
+        ToolTimeoutError: If no attempt finished in time.
+    """
+    limit = (deadline or Deadline()).timeout(timeout)
+    if limit is not None and limit <= 0:
+        raise ToolTimeoutError(f"Run deadline passed before {tool.name} started.")
+    hedged = bool((getattr(tool, 'metadata', None) or {}).get("hedge"))
+    if not limit and not hedged and tool_execution_class(tool) != "cpu":
+        # Nothing to enforce, so the call runs on the caller's thread
+        started = time.monotonic()
+        result = tool.run(tool_input)
+        tool_latency.record(tool.name, time.monotonic() - started)
+        return result
+    hedge_after = tool_latency.percentile(tool.name, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES) if hedged else None
+
+    _count("calls")
+    started = time.monotonic()
+    first = _submit(tool, tool_input)
+    running = {first}
+    launched = 1
+    try:
+        while True:
+            elapsed = time.monotonic() - started
+            hedge_due = hedge_after is not None and launched == 1
+            waits = [limit - elapsed] if limit is not None else []
+            if hedge_due:
+                waits.append(hedge_after - elapsed)
+            done, running = wait(running, timeout=max(0.0, min(waits)) if waits else None,
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    tool_latency.record(tool.name, time.monotonic() - started)
+                    if future is not first:
+                        _count("hedge_wins")
+                    return future.result()
+            if not running:
+                # Every attempt failed; hedging covers slowness, not errors
+                raise next(iter(done)).exception()
+            elapsed = time.monotonic() - started
+            if limit is not None and elapsed >= limit:
+                _count("timeouts")
+                raise ToolTimeoutError(f"{tool.name} did not finish within {limit:.1f}s.")
+            if hedge_due and elapsed >= hedge_after:
+                running.add(_submit(tool, tool_input))
+                launched += 1
+                _count("hedges")
+    finally:
+        for future in running:
+            future.cancel()
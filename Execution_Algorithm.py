@@ -1,12 +1,34 @@
 import json
+import time
 from collections import deque
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any
-from HelperMethods import clean_json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Optional
+from HelperMethods import clean_json, get_chat_model
+from RunHistory import new_run_id
+from Checkpoints import task_paths
+from ToolRegistry import coerce_tool_input, render_tool_descriptions
+from Deadlines import DEFAULT_RUN_DEADLINE, DEFAULT_TOOL_TIMEOUT, Deadline, ToolTimeoutError
+from CircuitBreaker import CircuitOpenError, call_tool_with_retry, tool_breakers
+from ToolRetriever import select_tools
+from TaskScheduler import MAX_PARALLEL_TASKS, TaskScheduler, needs_execution
+from SingleFlight import call_key, find_duplicates, tool_flights
+from TaskReferences import UnresolvedReferenceError, index_tasks, pending_references, referenced_tasks, resolve_references
+from Speculation import SPECULATE, speculation_stats
 from langchain import PromptTemplate
 from langchain_core.runnables import RunnableLambda
 from BFS_Tree_Planner_Prompt import replanner_prompt_template_json
-from langchain_openai import ChatOpenAI
+
+
+# Observations written for tasks that did not get a result; never reused or cached
+FAILED = "Tool execution failed."
+TIMED_OUT = "Tool execution timed out."
+UNAVAILABLE = "Tool unavailable."
+FAILED_OBSERVATIONS = (FAILED, TIMED_OUT, UNAVAILABLE)
+_STATUSES = {FAILED: "failed", TIMED_OUT: "timeout", UNAVAILABLE: "unavailable"}
+
+
+def _reusable(twin: Optional[dict]) -> bool:
+    return twin is not None and bool(twin.get('observation')) and twin['observation'] not in FAILED_OBSERVATIONS
 
 
 def convert_tools(tools: List[Any]) -> str:
@@ -19,7 +41,7 @@ def convert_tools(tools: List[Any]) -> str:
     Returns:
         str: A formatted string representation of the tools.
     """
-    return "\n".join([f"{tool.name}: {tool.description}" for tool in tools])
+    return render_tool_descriptions(tools)
 
 
 class ExecutionAlgorithm:
@@ -27,7 +49,11 @@ class ExecutionAlgorithm:
     A class to handle the execution and replanning of tasks using BFS and DFS approaches.
     """
 
-    def __init__(self, list_of_tools: List[Any], replan_enable: bool = False, verbose: bool = False):
+    def __init__(self, list_of_tools: List[Any], replan_enable: bool = False, verbose: bool = False,
+                 history_writer: Optional[Any] = None, checkpoint_store: Optional[Any] = None,
+                 tool_timeout: float = DEFAULT_TOOL_TIMEOUT, tool_timeouts: Optional[Dict[str, float]] = None,
+                 run_deadline: float = DEFAULT_RUN_DEADLINE, max_parallel: int = MAX_PARALLEL_TASKS,
+                 speculate: bool = SPECULATE):
         """
         Initialize the ExecutionAlgorithm class.
 
@@ -35,17 +61,60 @@ class ExecutionAlgorithm:
             list_of_tools (List[Any]): A list of tools available for task execution.
             replan_enable (bool): Flag to enable or disable replanning. Defaults to False.
             verbose (bool): Flag to enable or disable verbose output. Defaults to False.
+            history_writer (Optional[Any]): A started RunHistoryWriter that receives every executed
+                task and run. Defaults to None (no persistence).
+            checkpoint_store (Optional[Any]): A TaskCheckpointStore that records each completed
+                task so interrupted runs can be resumed. Defaults to None (no checkpoints).
+            tool_timeout (float): Seconds a tool call may take when neither the task nor the tool
+                sets a timeout; 0 for none. Defaults to REACTREE_TOOL_TIMEOUT or 60.
+            tool_timeouts (Optional[Dict[str, float]]): Per-tool timeouts by tool name, overriding
+                what the tools declare.
+            run_deadline (float): Seconds a whole run may take; 0 for none. Defaults to
+                REACTREE_RUN_DEADLINE or 0.
+            max_parallel (int): Tasks run at once by the parallel modes. Defaults to
+                REACTREE_MAX_PARALLEL_TASKS.
+            speculate (bool): Keep running the next ready tasks while the replanner runs, and keep
+                their results if the replan leaves them unchanged. Defaults to REACTREE_SPECULATE or False.
         """
         self.verbose = verbose
         self.replan_enable = replan_enable
+        self.history_writer = history_writer
+        self.checkpoint_store = checkpoint_store
+        self.tool_timeout = tool_timeout
+        self.tool_timeouts = tool_timeouts or {}
+        self.run_deadline = run_deadline
+        self.max_parallel = max(1, max_parallel)
+        self.speculate = speculate
 
         self.list_of_tools_str = convert_tools(list_of_tools)
         self.tools: Dict[str, Any] = {tool.name: tool for tool in list_of_tools}
-        self.model = ChatOpenAI(model="gpt-4", temperature=0.1, max_tokens=4096)
         self.task_replanner_prompt = PromptTemplate.from_template(replanner_prompt_template_json)
-        self.tree_replanner_chain = (self.task_replanner_prompt
-                                     | self.model
-                                     | RunnableLambda(self.filter_clean_display_pass))
+        # The model client and replanner chain are built on first replan
+        self._tree_replanner_chain = None
+
+    @property
+    def model(self) -> Any:
+        """
+        The replanner's chat model, created on first use.
+
+        Returns:
+            Any: The shared ChatOpenAI client.
+        """
+        return get_chat_model(model="gpt-4", temperature=0.1, max_tokens=4096)
+
+    @property
+    def tree_replanner_chain(self) -> Any:
+        """
+        The replanner chain (prompt | model | cleaner), built on first use.
+
+        Returns:
+            Any: The runnable chain.
+        """
+        if self._tree_replanner_chain is None:
+            self._tree_replanner_chain = (self.task_replanner_prompt
+                                          | self.model
+                                          | RunnableLambda(self.filter_clean_display_pass))
+        return self._tree_replanner_chain
 
     def filter_clean_pass(self, modelResponse: Any) -> str:
         """
@@ -120,13 +189,60 @@ class ExecutionAlgorithm:
         replan_response = self.tree_replanner_chain.invoke({"current_task_tree": task_tree_json, "tools": tools_as_str})
         return replan_response
 
-    def _execute_tool(self, action: str, action_input: str) -> str:
+    def _replan_tools_str(self, root: dict) -> str:
+        """
+        Render the tools offered to the replanner: those relevant to the original
+        question plus every tool the tree already uses, minus tools whose circuit is open.
+
+        Args:
+            root (dict): The current task tree.
+
+        Returns:
+            str: A string representation of the selected tools.
+        """
+        task = root.get('task_tree', {}).get('task', {})
+        question = task.get('original_question') or task.get('prime_objective') or ""
+        used_tools = []
+        stack = [task]
+        while stack:
+            current = stack.pop()
+            if current.get('action') in self.tools:
+                used_tools.append(current['action'])
+            stack.extend(current.get('sub_tasks') or [])
+        selected = select_tools(question, self.tools, always_include=used_tools)
+        tools_str = convert_tools(tool_breakers.available(selected).values())
+        down = sorted(tool_breakers.unavailable(selected))
+        if down:
+            tools_str += f"\nCurrently unavailable, replace tasks that use them: {', '.join(down)}"
+        return tools_str
+
+    def _tool_timeout(self, tool: Any, task_timeout: Any = None) -> Optional[float]:
+        """
+        Resolve a call's timeout: the task's own, then the engine's per-tool override,
+        then what the tool declares, then the engine default.
+
+        Args:
+            tool (Any): The tool to be run.
+            task_timeout (Any): The task's "timeout" field, in seconds.
+
+        Returns:
+            Optional[float]: Seconds, or None for no limit.
+        """
+        for timeout in (task_timeout, self.tool_timeouts.get(tool.name), (tool.metadata or {}).get("timeout")):
+            if timeout not in (None, ""):
+                return float(timeout)
+        return self.tool_timeout
+
+    def _execute_tool(self, action: str, action_input: str, timeout: Any = None,
+                      deadline: Optional[Deadline] = None) -> str:
         """
         Execute a tool with the given action and input.
 
         Args:
             action (str): The action to be executed.
             action_input (str): The input for the action.
+            timeout (Any): The task's own timeout in seconds, if any.
+            deadline (Optional[Deadline]): The run's deadline.
 
         Returns:
             str: The result of the tool execution.
@@ -135,16 +251,34 @@ class ExecutionAlgorithm:
         if not tool:
             raise ValueError(f"Tool {action} not found.")
         print(f"Executing tool {action} with input: {action_input}")
-        result = tool.run(action_input)
+        tool_input = coerce_tool_input(tool, action_input)
+        limit = self._tool_timeout(tool, timeout)
+        if not (tool.metadata or {}).get("coalesce", True):
+            return call_tool_with_retry(tool, tool_input, limit, deadline)
+        # Identical calls in flight, from this tree or a concurrent one, share one execution
+        result = tool_flights.do(call_key(action, tool_input),
+                                 lambda: call_tool_with_retry(tool, tool_input, limit, deadline),
+                                 deadline.remaining() if deadline is not None else None)
         # print(f"Tool {action} executed successfully. Result is {result}")
         return result
 
-    def _execute_task(self, task: dict) -> dict:
+    def _execute_task(self, task: dict, run_id: Optional[str] = None, checkpoint_key: Optional[str] = None,
+                      deadline: Optional[Deadline] = None, twin: Optional[dict] = None,
+                      index: Optional[Dict[str, dict]] = None, count_reuse: bool = True) -> dict:
         """
         Execute a single task.
 
         Args:
             task (dict): The task dictionary to be executed.
+            run_id (Optional[str]): The run this task belongs to, used for run history.
+            checkpoint_key (Optional[str]): The task's position in the tree, used for checkpoints.
+            deadline (Optional[Deadline]): The run's deadline; tasks reached after it are skipped.
+            twin (Optional[dict]): An earlier task of the tree with the same action and input;
+                its observation is reused if it already succeeded.
+            index (Optional[Dict[str, dict]]): The tree's tasks by task_no, used to resolve
+                {{task_N.observation}} references in action_input at dispatch.
+            count_reuse (bool): Count a reused twin observation in tool_flights. Speculation
+                passes False and counts it only if the result is committed. Defaults to True.
 
         Returns:
             dict: The updated task dictionary.
@@ -155,30 +289,393 @@ class ExecutionAlgorithm:
         action_input = task.get('action_input')
         observation = task.get('observation')
 
+        started_at = time.time()
+        start = time.perf_counter()
+        status = "success"
         try:
-            result = self._execute_tool(action, action_input)
-            task['observation'] = result
+            if _reusable(twin):
+                task['observation'] = twin['observation']
+                if count_reuse:
+                    tool_flights.count("reused_in_tree")
+                print(f"Reusing the observation of task {twin.get('task_no')} for identical task {task.get('task_no')}")
+            else:
+                if deadline is not None and deadline.expired:
+                    raise ToolTimeoutError("Run deadline passed before the task started.")
+                if index is not None:
+                    # The tree keeps the reference; only the call sees the referenced values
+                    action_input = resolve_references(action_input, index,
+                                                      lambda observation: observation not in FAILED_OBSERVATIONS)
+                task['observation'] = self._execute_tool(action, action_input, task.get('timeout'), deadline)
+        except ToolTimeoutError as e:
+            task['observation'] = TIMED_OUT
+            status = "timeout"
+            print(f"Tool execution timed out for action: {action}: {e}")
+        except CircuitOpenError as e:
+            # Failing fast; the replanner is only offered tools whose circuit is closed
+            task['observation'] = UNAVAILABLE
+            status = "unavailable"
+            print(f"Tool execution skipped for action: {action}: {e}")
         except Exception as e:
-            task['observation'] = "Tool execution failed."
+            task['observation'] = FAILED
+            status = "failed"
             print(f"Tool execution failed for action: {action} due to error: {e}")
 
+        self._record_task(task, run_id, checkpoint_key, status, started_at, (time.perf_counter() - start) * 1000.0)
+
         # print(f"Task result: \n{task.get('observation')}")
         return task
 
-    def process_task_bfs_parallel(self, json_string: str) -> str:
+    def _record_task(self, task: dict, run_id: Optional[str], checkpoint_key: Optional[str], status: str,
+                     started_at: float, duration_ms: float):
+        """
+        Hand an executed task to the history writer and, if it succeeded, to the checkpoint store.
+
+        Args:
+            task (dict): The executed task.
+            run_id (Optional[str]): The run this task belongs to.
+            checkpoint_key (Optional[str]): The task's position in the tree.
+            status (str): "success", "failed", "timeout" or "unavailable".
+            started_at (float): Start time as epoch seconds.
+            duration_ms (float): Execution time in milliseconds.
+        """
+        if self.history_writer and run_id:
+            self.history_writer.record_task(run_id, task, status, started_at, duration_ms)
+        # Failed tasks are not checkpointed so that a resumed run retries them
+        if self.checkpoint_store and run_id and checkpoint_key is not None and status == "success":
+            self.checkpoint_store.record_task(run_id, checkpoint_key, task)
+
+    def _record_run(self, run_id: str, mode: str, root: dict, started_at: float):
+        """
+        Hand a finished run to the history writer, if one is configured, and report its speculation.
+
+        Args:
+            run_id (str): The run identifier.
+            mode (str): The execution mode that produced the run.
+            root (dict): The final task tree.
+            started_at (float): Start time as epoch seconds.
+        """
+        report = speculation_stats.run(run_id)
+        if report:
+            print(f"Speculation: {report['committed']} of {report['speculated']} speculative task(s) committed, "
+                  f"{report['discarded']} discarded, {report['cancelled']} cancelled, "
+                  f"{report['wasted_s']:.2f}s of work wasted")
+        if not self.history_writer:
+            return
+        question = root.get('task_tree', {}).get('task', {}).get('original_question')
+        self.history_writer.record_run(run_id, "ExecutionAlgorithm", mode, question,
+                                       started_at, time.time(), task_tree=root)
+
+    def _checkpoint_tree(self, run_id: str, mode: str, root: dict) -> Dict[int, str]:
+        """
+        Store the current tree with the checkpoint store, if one is configured.
+
+        Args:
+            run_id (str): The run identifier.
+            mode (str): The execution mode, used to resume the run.
+            root (dict): The current task tree.
+
+        Returns:
+            Dict[int, str]: Checkpoint keys of the tree's tasks by id().
+        """
+        if self.checkpoint_store:
+            self.checkpoint_store.save_tree(run_id, mode, root)
+        return task_paths(root['task_tree']['task'])
+
+    def _run_scheduled(self, tasks: List[dict], scheduler: TaskScheduler, run_id: str, paths: Dict[int, str],
+                       deadline: Deadline, duplicates: Dict[int, dict], index: Dict[str, dict],
+                       follow_sub_tasks: bool = True):
+        """
+        Run tasks on at most max_parallel threads, always starting the ready task the
+        scheduler ranks first.
+
+        Args:
+            tasks (List[dict]): The tasks that are ready now.
+            scheduler (TaskScheduler): The scheduler built for the current tree.
+            run_id (str): The run identifier.
+            paths (Dict[int, str]): Checkpoint keys of the tree's tasks by id().
+            deadline (Deadline): The run's deadline.
+            duplicates (Dict[int, dict]): Earlier identical tasks by id() of their repeats.
+            index (Dict[str, dict]): The tree's tasks by task_no, for observation references.
+            follow_sub_tasks (bool): Make a task's subtasks ready as soon as it finishes,
+                instead of stopping at the given tasks. Defaults to True.
+        """
+        for task in tasks:
+            scheduler.push(task)
+        # Only these tasks run here, so references to any other task cannot be waited for
+        scheduled = set().union(*(task_paths(task) for task in tasks)) if follow_sub_tasks else set(map(id, tasks))
+        # Tasks whose referenced observations are not there yet, and who waits for which task_no
+        deferred: Dict[int, dict] = {}
+        waiting: Dict[str, List[dict]] = {}
+        forced = set()
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            running = {}
+            while scheduler or running or deferred:
+                if not scheduler and not running:
+                    # Nothing left can satisfy them (a reference cycle); run them anyway so that
+                    # resolving the references fails and the failure is recorded
+                    for task in deferred.values():
+                        scheduler.push(task)
+                        forced.add(id(task))
+                    deferred.clear()
+                    waiting.clear()
+                while scheduler and len(running) < self.max_parallel:
+                    task = scheduler.pop()
+                    pending = (pending_references(task, index, scheduled)
+                               if needs_execution(task) and id(task) not in forced else [])
+                    if pending:
+                        deferred[id(task)] = task
+                        for task_no in pending:
+                            waiting.setdefault(task_no, []).append(task)
+                        continue
+                    if needs_execution(task):
+                        future = executor.submit(self._execute_task, task, run_id, paths.get(id(task)), deadline,
+                                                 duplicates.get(id(task)), index)
+                        running[future] = task
+                    elif follow_sub_tasks:
+                        # Nothing to run here (root or already observed), so its subtasks are ready
+                        for sub_task in task.get('sub_tasks') or []:
+                            scheduler.push(sub_task)
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"Task {task.get('task_no')} failed due to {e}")
+                    if follow_sub_tasks and isinstance(task.get('sub_tasks'), list):
+                        for sub_task in task['sub_tasks']:
+                            scheduler.push(sub_task)
+                    for waiter in waiting.pop(str(task.get('task_no')).strip(), []):
+                        if id(waiter) in deferred and not pending_references(waiter, index, scheduled):
+                            scheduler.push(deferred.pop(id(waiter)))
+
+    def _speculable(self, task: dict, index: Dict[str, dict]) -> bool:
+        """
+        Tell whether a ready task may run before the replanner has answered.
+
+        Args:
+            task (dict): A task the run would execute next.
+            index (Dict[str, dict]): The tree's tasks by task_no.
+
+        Returns:
+            bool: True if the task needs executing, its tool allows speculation and every
+                observation it references is already there.
+        """
+        tool = self.tools.get(task.get('action'))
+        return (tool is not None and needs_execution(task) and (tool.metadata or {}).get("speculate", True)
+                and not pending_references(task, index))
+
+    def _speculate(self, task: dict, deadline: Deadline, twin: Optional[dict], index: Dict[str, dict],
+                   started: Dict[int, float]) -> tuple:
+        """
+        Execute a task on a copy while the replanner runs. Nothing is recorded here;
+        _replan records the result if it is committed.
+
+        Args:
+            task (dict): The task to execute.
+            deadline (Deadline): The run's deadline.
+            twin (Optional[dict]): An earlier identical task whose observation may be reused.
+            index (Dict[str, dict]): The tree's tasks by task_no, for observation references.
+            started (Dict[int, float]): Receives the perf_counter() start by id() of the task,
+                so a discarded speculation still running can be timed.
+
+        Returns:
+            tuple: The observation, the start as epoch seconds, the seconds taken, and whether
+                the twin's observation was reused.
+        """
+        # Runs on a copy, so the tree only changes if the result is committed
+        speculative = {key: value for key, value in task.items() if key != 'sub_tasks'}
+        reused = _reusable(twin)
+        started_at = time.time()
+        started[id(task)] = time.perf_counter()
+        self._execute_task(speculative, deadline=deadline, twin=twin, index=index, count_reuse=False)
+        return speculative['observation'], started_at, time.perf_counter() - started[id(task)], reused
+
+    @staticmethod
+    def _unchanged(task: dict, index: Dict[str, dict], new_index: Dict[str, dict]) -> Optional[dict]:
+        """
+        Find a speculated task in the replanned tree, if the replan left it as it was.
+
+        Args:
+            task (dict): The speculated task of the current tree.
+            index (Dict[str, dict]): The current tree's tasks by task_no.
+            new_index (Dict[str, dict]): The replanned tree's tasks by task_no.
+
+        Returns:
+            Optional[dict]: The task with the same task_no in the replanned tree, or None if it is
+                gone, already has an observation, changed its action, input or timeout, or reads
+                observations that changed.
+        """
+        new_task = new_index.get(str(task.get('task_no')).strip())
+        if new_task is None or new_task.get('observation'):
+            return None
+        if any(new_task.get(key) != task.get(key) for key in ('action', 'action_input', 'timeout')):
+            return None
+        # The observations it read must be unchanged too
+        for task_no in referenced_tasks(task.get('action_input')):
+            if (index.get(task_no) or {}).get('observation') != (new_index.get(task_no) or {}).get('observation'):
+                return None
+        return new_task
+
+    def _discard(self, run_id: str, future: Any, task: dict, started: Dict[int, float]):
+        """
+        Drop a speculation the replan invalidated: cancel it if it has not started, and
+        otherwise count the time it took, or has taken so far, as wasted.
+
+        Args:
+            run_id (str): The run identifier.
+            future (Any): The future of the speculation.
+            task (dict): The speculated task.
+            started (Dict[int, float]): perf_counter() starts by id() of the task, from _speculate.
+        """
+        if future.cancel():
+            speculation_stats.count(run_id, "cancelled")
+            return
+        # A speculation still running is abandoned; only its time so far is counted
+        if future.done() and future.exception() is None:
+            seconds = future.result()[2]
+        else:
+            seconds = time.perf_counter() - started.get(id(task), time.perf_counter())
+        speculation_stats.count(run_id, "discarded")
+        speculation_stats.count(run_id, "speculative_s", seconds)
+        speculation_stats.count(run_id, "wasted_s", seconds)
+        print(f"Discarding speculative result of task {task.get('task_no')}, changed by the replan")
+
+    def _replan(self, root: dict, run_id: str, deadline: Deadline, paths: Dict[int, str],
+                duplicates: Dict[int, dict], index: Dict[str, dict], ready: List[dict]) -> Optional[dict]:
+        """
+        Ask the replanner for a new tree. With speculate on, the tasks that would run next
+        are executed on copies meanwhile. Their results are committed if the replanner
+        answers <NO_REPLAN> or keeps those tasks and their inputs unchanged, and are
+        discarded or cancelled otherwise.
+
+        Args:
+            root (dict): The current task tree.
+            run_id (str): The run identifier.
+            deadline (Deadline): The run's deadline.
+            paths (Dict[int, str]): Checkpoint keys of the tree's tasks by id().
+            duplicates (Dict[int, dict]): Earlier identical tasks by id() of their repeats.
+            index (Dict[str, dict]): The tree's tasks by task_no.
+            ready (List[dict]): The tasks the run would execute next if the plan stays.
+
+        Returns:
+            Optional[dict]: The replanned tree, or None if the plan stays.
+        """
+        current_tree = json.dumps(root)
+        tools_str = self._replan_tools_str(root)
+        ready = [task for task in ready if self._speculable(task, index)] if self.speculate else []
+        if not ready:
+            replan_json = self.replanner(current_tree, tools_str)
+            return None if replan_json == "<NO_REPLAN>" else json.loads(replan_json)
+
+        started: Dict[int, float] = {}
+        executor = ThreadPoolExecutor(max_workers=self.max_parallel)
+        try:
+            speculations = {executor.submit(self._speculate, task, deadline, duplicates.get(id(task)), index,
+                                            started): task for task in ready}
+            speculation_stats.count(run_id, "rounds")
+            speculation_stats.count(run_id, "speculated", len(speculations))
+            replan_json = self.replanner(current_tree, tools_str)
+            replanned = None if replan_json == "<NO_REPLAN>" else json.loads(replan_json)
+            new_index = index if replanned is None else index_tasks(replanned['task_tree']['task'])
+
+            kept = []
+            for future, task in speculations.items():
+                target = task if replanned is None else self._unchanged(task, index, new_index)
+                if target is None:
+                    self._discard(run_id, future, task, started)
+                else:
+                    kept.append((future, target))
+            for future, target in kept:
+                observation, started_at, seconds, reused = future.result()
+                target['observation'] = observation
+                if reused:
+                    tool_flights.count("reused_in_tree")
+                # A replanned tree is checkpointed whole, observations included
+                self._record_task(target, run_id, paths.get(id(target)) if replanned is None else None,
+                                  _STATUSES.get(observation, "success"), started_at, seconds * 1000.0)
+                speculation_stats.count(run_id, "committed")
+                speculation_stats.count(run_id, "speculative_s", seconds)
+            return replanned
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _plan_duplicates(self, root: dict) -> Dict[int, dict]:
+        """
+        Find tasks that repeat an earlier task's call, and count them.
+
+        Args:
+            root (dict): The task tree.
+
+        Returns:
+            Dict[int, dict]: The earlier identical task, by id() of each repeat.
+        """
+        duplicates = find_duplicates(root['task_tree']['task'])
+        if duplicates:
+            tool_flights.count("plan_duplicates", len(duplicates))
+            print(f"Plan repeats {len(duplicates)} identical tool call(s)")
+        return duplicates
+
+    def resume(self, run_id: str, deadline: Optional[float] = None) -> str:
+        """
+        Resume an interrupted run from its checkpoints, executing only the tasks
+        that had not completed.
+
+        Args:
+            run_id (str): The run identifier, e.g. from checkpoint_store.unfinished_runs().
+            deadline (Optional[float]): Seconds the resumed run may take. Defaults to run_deadline.
+
+        Returns:
+            str: The final task tree in JSON format after execution and replanning.
+        """
+        if not self.checkpoint_store:
+            raise ValueError("Resuming a run requires a checkpoint_store.")
+        checkpoint = self.checkpoint_store.load_run(run_id)
+        if checkpoint is None:
+            raise ValueError(f"No checkpoint found for run {run_id}.")
+        mode, root = checkpoint
+        processors = {
+            "bfs_parallel": self.process_task_bfs_parallel,
+            "dfs_parallel": self.process_task_dfs_parallel,
+            "bfs": self.process_task_bfs,
+            "dfs": self.process_task_dfs,
+        }
+        if mode not in processors:
+            raise ValueError(f"Unknown execution mode {mode} for run {run_id}.")
+        return processors[mode](json.dumps(root), run_id=run_id, deadline=deadline)
+
+    def process_task_bfs_parallel(self, json_string: str, run_id: Optional[str] = None,
+                                  deadline: Optional[float] = None) -> str:
         """
         Execute tasks in a breadth-first search (BFS) manner and optionally replan.
 
         Args:
             json_string (str): The task tree in JSON format.
+            run_id (Optional[str]): Continue this run instead of starting a new one; used by resume.
+            deadline (Optional[float]): Seconds the run may take; tasks still pending then are
+                skipped. Defaults to run_deadline.
 
         Returns:
             str: The final task tree in JSON format after execution and replanning.
         """
+        run_id = run_id or new_run_id()
+        started_at = time.time()
+        deadline = Deadline(self.run_deadline if deadline is None else deadline)
         json_string = clean_json(json_string)
         root = json.loads(json_string)
-        queue = deque([root['task_tree']['task']])
+        paths = self._checkpoint_tree(run_id, "bfs_parallel", root)
+        duplicates = self._plan_duplicates(root)
+        index = index_tasks(root['task_tree']['task'])
 
+        if not self.replan_enable:
+            # Without replanning there is no level barrier: a task's subtasks become ready
+            # as soon as it finishes, and the longest remaining chains start first
+            self._run_scheduled([root['task_tree']['task']], TaskScheduler(root['task_tree']['task']),
+                                run_id, paths, deadline, duplicates, index)
+
+        queue = deque([root['task_tree']['task']] if self.replan_enable else [])
         while queue:
             level_size = len(queue)
             current_level_tasks = []
@@ -192,48 +689,68 @@ class ExecutionAlgorithm:
                 if 'sub_tasks' in task and isinstance(task['sub_tasks'], list):
                     queue.extend(task['sub_tasks'])
 
-            with ThreadPoolExecutor() as executor:
-                futures = {executor.submit(self._execute_task, task): task for task in current_level_tasks
-                           if str(task.get('level_no')).strip() != "0" and not task.get('observation')}
-                print(f"Futures submitted: {futures}")  # Logging statement
-
-                for future in as_completed(futures):
-                    task = futures[future]
-                    try:
-                        future.result()
-                    except Exception as e:
-                        print(f"Task {task.get('task_no')} failed due to {e}")
-
-            if self.replan_enable:
-                current_tree = json.dumps(root)
-                replan_json = self.replanner(current_tree, self.list_of_tools_str)
-                if replan_json != "<NO_REPLAN>":
-                    root = json.loads(replan_json)
+            # The replanner sees whole levels, so each level runs to completion, highest ranked first
+            self._run_scheduled(current_level_tasks, TaskScheduler(root['task_tree']['task']),
+                                run_id, paths, deadline, duplicates, index, follow_sub_tasks=False)
+
+            # Past the deadline the replanner would only add latency
+            if not deadline.expired:
+                replanned = self._replan(root, run_id, deadline, paths, duplicates, index, list(queue))
+                if replanned is not None:
+                    root = replanned
+                    paths = self._checkpoint_tree(run_id, "bfs_parallel", root)
+                    duplicates = self._plan_duplicates(root)
+                    index = index_tasks(root['task_tree']['task'])
                     queue = deque([root['task_tree']['task']])
 
+        if self.checkpoint_store:
+            self.checkpoint_store.finish_run(run_id, root)
+        self._record_run(run_id, "bfs_parallel", root, started_at)
         response_json = json.dumps(root)
         return response_json
 
-    def process_task_dfs_parallel(self, json_string: str) -> str:
+    def process_task_dfs_parallel(self, json_string: str, run_id: Optional[str] = None,
+                                  deadline: Optional[float] = None) -> str:
         """
         Execute tasks in a depth-first search (DFS) manner and optionally replan.
 
         Args:
             json_string (str): The task tree in JSON format.
+            run_id (Optional[str]): Continue this run instead of starting a new one; used by resume.
+            deadline (Optional[float]): Seconds the run may take; tasks still pending then are
+                skipped. Defaults to run_deadline.
 
         Returns:
             str: The final task tree in JSON format after execution and replanning.
         """
+        run_id = run_id or new_run_id()
+        started_at = time.time()
+        deadline = Deadline(self.run_deadline if deadline is None else deadline)
         json_string = clean_json(json_string)
         root = json.loads(json_string)
+        paths = self._checkpoint_tree(run_id, "dfs_parallel", root)
+        duplicates = self._plan_duplicates(root)
+        index = index_tasks(root['task_tree']['task'])
+        scheduler = TaskScheduler(root['task_tree']['task'])
         stack = [root['task_tree']['task']]
-
-        while stack:
-            task = stack.pop()
-
-            if str(task.get('level_no')).strip() != "0" and not task.get('observation'):
-                with ThreadPoolExecutor() as executor:
-                    future = executor.submit(self._execute_task, task)
+        deferrals = 0
+
+        # One bounded pool for the whole run, as in _run_scheduled
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            while stack:
+                task = stack.pop()
+
+                # A task whose referenced tasks are still pending waits at the bottom of the stack,
+                # after every task and subtree above it, unless nothing else can progress
+                if needs_execution(task) and pending_references(task, index) and deferrals < len(stack):
+                    stack.insert(0, task)
+                    deferrals += 1
+                    continue
+                deferrals = 0
+
+                if str(task.get('level_no')).strip() != "0" and not task.get('observation'):
+                    future = executor.submit(self._execute_task, task, run_id, paths.get(id(task)), deadline,
+                                             duplicates.get(id(task)), index)
                     print(f"Future submitted: {future}")  # Logging statement
 
                     try:
@@ -241,90 +758,152 @@ class ExecutionAlgorithm:
                     except Exception as e:
                         print(f"Task {task.get('task_no')} failed due to {e}")
 
-            # Push subtasks onto the stack in reverse order to maintain order
-            if 'sub_tasks' in task and isinstance(task['sub_tasks'], list):
-                stack.extend(reversed(task['sub_tasks']))
-
-            if self.replan_enable:
-                current_tree = json.dumps(root)
-                replan_json = self.replanner(current_tree, self.list_of_tools_str)
-                if replan_json != "<NO_REPLAN>":
-                    root = json.loads(replan_json)
-                    stack = [root['task_tree']['task']]
-
+                # Push subtasks in reverse, so the highest ranked sibling is popped first
+                if 'sub_tasks' in task and isinstance(task['sub_tasks'], list):
+                    stack.extend(reversed(scheduler.order(task['sub_tasks'])))
+
+                # Past the deadline the replanner would only add latency
+                if self.replan_enable and not deadline.expired:
+                    replanned = self._replan(root, run_id, deadline, paths, duplicates, index, stack[-1:])
+                    if replanned is not None:
+                        root = replanned
+                        paths = self._checkpoint_tree(run_id, "dfs_parallel", root)
+                        duplicates = self._plan_duplicates(root)
+                        index = index_tasks(root['task_tree']['task'])
+                        scheduler = TaskScheduler(root['task_tree']['task'])
+                        stack = [root['task_tree']['task']]
+
+        if self.checkpoint_store:
+            self.checkpoint_store.finish_run(run_id, root)
+        self._record_run(run_id, "dfs_parallel", root, started_at)
         response_json = json.dumps(root)
         return response_json
 
-    def process_task_bfs(self, json_string: str) -> str:
+    def process_task_bfs(self, json_string: str, run_id: Optional[str] = None,
+                         deadline: Optional[float] = None) -> str:
         """
         Execute tasks in a breadth-first search (BFS) manner without parallelism and optionally replan.
 
         Args:
             json_string (str): The task tree in JSON format.
+            run_id (Optional[str]): Continue this run instead of starting a new one; used by resume.
+            deadline (Optional[float]): Seconds the run may take; tasks still pending then are
+                skipped. Defaults to run_deadline.
 
         Returns:
             str: The final task tree in JSON format after execution and replanning.
         """
+        run_id = run_id or new_run_id()
+        started_at = time.time()
+        deadline = Deadline(self.run_deadline if deadline is None else deadline)
         json_string = clean_json(json_string)
         root = json.loads(json_string)
+        paths = self._checkpoint_tree(run_id, "bfs", root)
+        duplicates = self._plan_duplicates(root)
+        index = index_tasks(root['task_tree']['task'])
+        scheduler = TaskScheduler(root['task_tree']['task'])
         queue = deque([root['task_tree']['task']])
+        deferrals = 0
 
         while queue:
             task = queue.popleft()
 
+            # A task whose referenced tasks are still queued goes to the back, unless nothing else can progress
+            if needs_execution(task) and pending_references(task, index) and deferrals < len(queue):
+                queue.append(task)
+                deferrals += 1
+                continue
+            deferrals = 0
+
             if str(task.get('level_no')).strip() != "0" and not task.get('observation'):
                 try:
-                    self._execute_task(task)
+                    self._execute_task(task, run_id, paths.get(id(task)), deadline, duplicates.get(id(task)),
+                                       index)
                 except Exception as e:
                     print(f"Task {task.get('task_no')} failed due to {e}")
 
-            # Enqueue subtasks for next level
+            # Enqueue subtasks for next level, highest ranked first
             if 'sub_tasks' in task and isinstance(task['sub_tasks'], list):
-                queue.extend(task['sub_tasks'])
-
-            if self.replan_enable:
-                current_tree = json.dumps(root)
-                replan_json = self.replanner(current_tree, self.list_of_tools_str)
-                if replan_json != "<NO_REPLAN>":
-                    root = json.loads(replan_json)
+                queue.extend(scheduler.order(task['sub_tasks']))
+
+            # Past the deadline the replanner would only add latency
+            if self.replan_enable and not deadline.expired:
+                replanned = self._replan(root, run_id, deadline, paths, duplicates, index, list(queue)[:1])
+                if replanned is not None:
+                    root = replanned
+                    paths = self._checkpoint_tree(run_id, "bfs", root)
+                    duplicates = self._plan_duplicates(root)
+                    index = index_tasks(root['task_tree']['task'])
+                    scheduler = TaskScheduler(root['task_tree']['task'])
                     queue = deque([root['task_tree']['task']])
 
+        if self.checkpoint_store:
+            self.checkpoint_store.finish_run(run_id, root)
+        self._record_run(run_id, "bfs", root, started_at)
         response_json = json.dumps(root)
         return response_json
 
-    def process_task_dfs(self, json_string: str) -> str:
+    def process_task_dfs(self, json_string: str, run_id: Optional[str] = None,
+                         deadline: Optional[float] = None) -> str:
         """
         Execute tasks in a depth-first search (DFS) manner without parallelism and optionally replan.
 
         Args:
             json_string (str): The task tree in JSON format.
+            run_id (Optional[str]): Continue this run instead of starting a new one; used by resume.
+            deadline (Optional[float]): Seconds the run may take; tasks still pending then are
+                skipped. Defaults to run_deadline.
 
         Returns:
             str: The final task tree in JSON format after execution and replanning.
         """
+        run_id = run_id or new_run_id()
+        started_at = time.time()
+        deadline = Deadline(self.run_deadline if deadline is None else deadline)
         json_string = clean_json(json_string)
         root = json.loads(json_string)
+        paths = self._checkpoint_tree(run_id, "dfs", root)
+        duplicates = self._plan_duplicates(root)
+        index = index_tasks(root['task_tree']['task'])
+        scheduler = TaskScheduler(root['task_tree']['task'])
         stack = [root['task_tree']['task']]
+        deferrals = 0
 
         while stack:
             task = stack.pop()
 
+            # A task whose referenced tasks are still pending waits at the bottom of the stack,
+            # after every task and subtree above it, unless nothing else can progress
+            if needs_execution(task) and pending_references(task, index) and deferrals < len(stack):
+                stack.insert(0, task)
+                deferrals += 1
+                continue
+            deferrals = 0
+
             if str(task.get('level_no')).strip() != "0" and not task.get('observation'):
                 try:
-                    self._execute_task(task)
+                    self._execute_task(task, run_id, paths.get(id(task)), deadline, duplicates.get(id(task)),
+                                       index)
                 except Exception as e:
                     print(f"Task {task.get('task_no')} failed due to {e}")
 
-            # Push subtasks onto the stack in reverse order to maintain order
+            # Push subtasks in reverse, so the highest ranked sibling is popped first
             if 'sub_tasks' in task and isinstance(task['sub_tasks'], list):
-                stack.extend(reversed(task['sub_tasks']))
-
-            if self.replan_enable:
-                current_tree = json.dumps(root)
-                replan_json = self.replanner(current_tree, self.list_of_tools_str)
-                if replan_json != "<NO_REPLAN>":
-                    root = json.loads(replan_json)
+                stack.extend(reversed(scheduler.order(task['sub_tasks'])))
+
+            # Past the deadline the replanner would only add latency
+            if self.replan_enable and not deadline.expired:
+                replanned = self._replan(root, run_id, deadline, paths, duplicates, index, stack[-1:])
+                if replanned is not None:
+                    root = replanned
+                    paths = self._checkpoint_tree(run_id, "dfs", root)
+                    duplicates = self._plan_duplicates(root)
+                    index = index_tasks(root['task_tree']['task'])
+                    scheduler = TaskScheduler(root['task_tree']['task'])
                     stack = [root['task_tree']['task']]
 
+        if self.checkpoint_store:
+            self.checkpoint_store.finish_run(run_id, root)
+        self._record_run(run_id, "dfs", root, started_at)
         response_json = json.dumps(root)
         return response_json
\ No newline at end of file
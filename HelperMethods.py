@@ -1,5 +1,6 @@
 import re
 import json
+from functools import lru_cache
 from typing import Any, Dict
 
 def clean_code_block(raw: str, language: str = None) -> str:
@@ -206,4 +207,42 @@ def generate_unique_id(prefix: str = '', length: int = 8) -> str:
     """
     import uuid
     unique_id = prefix + uuid.uuid4().hex[:length]
-    return unique_id
\ No newline at end of file
+    return unique_id
+
+@lru_cache(maxsize=None)
+def load_environment() -> bool:
+    """
+    Loads variables from a .env file once, if python-dotenv is installed.
+
+    The file is looked up from the working directory first, then from this
+    module's directory, where the entry points used to load it from.
+
+    Returns:
+        bool: True if a .env file was loaded.
+    """
+    try:
+        from dotenv import find_dotenv, load_dotenv
+    except ImportError:
+        return False
+    path = find_dotenv(usecwd=True) or find_dotenv()
+    return load_dotenv(path) if path else False
+
+@lru_cache(maxsize=None)
+def get_chat_model(model: str = "gpt-4", temperature: float = 0.1, max_tokens: int = 4096) -> Any:
+    """
+    Returns a shared ChatOpenAI client, constructing it on first use.
+
+    Deferring construction keeps the OpenAI client and its HTTP pools out of
+    import time; clients with the same settings are shared process-wide.
+
+    Args:
+        model (str, optional): The model name.
+        temperature (float, optional): The sampling temperature.
+        max_tokens (int, optional): The completion token limit.
+
+    Returns:
+        ChatOpenAI: The chat model client.
+    """
+    load_environment()
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model=model, temperature=temperature, max_tokens=max_tokens)
@@ -0,0 +1,155 @@
+# http_client.py
+
+import os
+import threading
+import weakref
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    # asyncio is imported inside the async helpers so sync-only callers skip its import cost
+    import asyncio
+
+# (connect, read) timeouts in seconds applied to every request unless overridden
+DEFAULT_TIMEOUT: Tuple[float, float] = (
+    float(os.environ.get('REACTREE_HTTP_CONNECT_TIMEOUT', 3.05)),
+    float(os.environ.get('REACTREE_HTTP_READ_TIMEOUT', 10.0)),
+)
+# Maximum concurrent connections to a single host
+MAX_CONNECTIONS_PER_HOST = int(os.environ.get('REACTREE_HTTP_MAX_PER_HOST', 10))
+# Number of distinct hosts whose pools are kept alive
+MAX_POOLED_HOSTS = int(os.environ.get('REACTREE_HTTP_MAX_HOSTS', 20))
+
+_session = None
+_session_lock = threading.Lock()
+# One httpx client per event loop, since async clients cannot be shared across loops
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+_host_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = \
+    weakref.WeakKeyDictionary()
+
+Timeout = Union[float, Tuple[float, float], None]
+
+
+def get_http_session():
+    """
+    Returns the process-wide requests session with keep-alive connection pooling.
+
+    Each host gets a pool of at most MAX_CONNECTIONS_PER_HOST connections; callers
+    block for a free connection instead of opening more.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=MAX_POOLED_HOSTS, pool_maxsize=MAX_CONNECTIONS_PER_HOST,
+                                      pool_block=True, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+def get_async_http_client():
+    """
+    Returns the httpx.AsyncClient for the running event loop, creating it on first use.
+
+    Returns:
+        httpx.AsyncClient: The pooled async client.
+    """
+    import asyncio
+    import httpx
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        connect, read = DEFAULT_TIMEOUT
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS_PER_HOST * MAX_POOLED_HOSTS,
+                                max_keepalive_connections=MAX_CONNECTIONS_PER_HOST * MAX_POOLED_HOSTS),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def _host_semaphore(url: str) -> "asyncio.Semaphore":
+    import asyncio
+    loop = asyncio.get_running_loop()
+    semaphores = _host_semaphores.setdefault(loop, {})
+    host = urlsplit(url).netloc
+    if host not in semaphores:
+        semaphores[host] = asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST)
+    return semaphores[host]
+
+
+def _httpx_timeout(timeout: Timeout):
+    import httpx
+    if timeout is None:
+        return httpx.USE_CLIENT_DEFAULT
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+def http_get_json(url: str, params: Optional[Dict[str, Any]] = None, timeout: Timeout = None) -> Any:
+    """
+    Performs a GET request over the shared session and decodes the JSON body.
+
+    Args:
+        url (str): The URL to request.
+        params (Optional[Dict[str, Any]]): Query string parameters.
+        timeout (Timeout): Seconds, or a (connect, read) tuple. Defaults to DEFAULT_TIMEOUT.
+
+    Returns:
+        Any: The decoded JSON response.
+    """
+    response = get_http_session().get(url, params=params, timeout=timeout or DEFAULT_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+async def ahttp_get_json(url: str, params: Optional[Dict[str, Any]] = None, timeout: Timeout = None) -> Any:
+    """
+    Performs a GET request over the pooled async client and decodes the JSON body.
+
+    Args:
+        url (str): The URL to request.
+        params (Optional[Dict[str, Any]]): Query string parameters.
+        timeout (Timeout): Seconds, or a (connect, read) tuple. Defaults to DEFAULT_TIMEOUT.
+
+    Returns:
+        Any: The decoded JSON response.
+    """
+    async with _host_semaphore(url):
+        response = await get_async_http_client().get(url, params=params, timeout=_httpx_timeout(timeout))
+    response.raise_for_status()
+    return response.json()
+
+
+def close_http_session():
+    """
+    Closes the shared sync session and its pooled connections.
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+async def aclose_http_client():
+    """
+    Closes the async client bound to the running event loop.
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    client = _async_clients.pop(loop, None)
+    _host_semaphores.pop(loop, None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,305 @@
+# plan_cache.py
+
+import copy
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set
+
+from TaskReferences import REFERENCE
+from ToolRetriever import HashingEmbeddings
+
+# Minimum cosine similarity for a cached plan to be reused
+DEFAULT_SIMILARITY_THRESHOLD = float(os.environ.get('REACTREE_PLAN_CACHE_THRESHOLD', 0.9))
+DEFAULT_MAX_ENTRIES = int(os.environ.get('REACTREE_PLAN_CACHE_SIZE', 1000))
+
+_QUOTED = re.compile(r'"([^"]+)"|\u201c([^\u201d]+)\u201d')
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+_CAPITALIZED = re.compile(r"\b[A-Z][\w-]+")
+
+
+def clear_observations(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Blanks every observation and final answer in a task subtree, in place.
+
+    Args:
+        task (Dict[str, Any]): The task to clear.
+
+    Returns:
+        Dict[str, Any]: The same task.
+    """
+    if 'observation' in task:
+        task['observation'] = ""
+    if 'final_answer' in task:
+        task['final_answer'] = ""
+    for sub_task in task.get('sub_tasks') or []:
+        clear_observations(sub_task)
+    return task
+
+
+def tree_actions(task: Dict[str, Any]) -> set:
+    """
+    Collects the actions used anywhere in a task subtree.
+
+    Args:
+        task (Dict[str, Any]): The root task.
+
+    Returns:
+        set: The action names.
+    """
+    actions = set()
+    stack = [task]
+    while stack:
+        current = stack.pop()
+        if current.get('action'):
+            actions.add(current['action'])
+        stack.extend(current.get('sub_tasks') or [])
+    return actions
+
+
+def _tasks(task: Dict[str, Any]):
+    stack = [task]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(current.get('sub_tasks') or [])
+
+
+def specific_terms(text: str, sentence_starts: bool = True) -> Set[str]:
+    """
+    Collects the terms that tie a text to one particular question: quoted phrases,
+    numbers and capitalized words (names, places, currency codes), lowercased.
+
+    Args:
+        text (str): A question or action_input.
+        sentence_starts (bool): Count capitalized words that start a sentence. Defaults to True;
+            pass False for questions, whose first word is capitalized anyway.
+
+    Returns:
+        Set[str]: The terms.
+    """
+    text = REFERENCE.sub(" ", text)
+    terms = {(double or curly).strip().lower() for double, curly in _QUOTED.findall(text)}
+    terms.update(_NUMBER.findall(text))
+    for match in _CAPITALIZED.finditer(text):
+        before = text[:match.start()].rstrip()
+        if sentence_starts or (before and before[-1] not in ".?!:"):
+            terms.add(match.group(0).lower())
+    return terms
+
+
+def input_terms(task: Dict[str, Any]) -> Set[str]:
+    """
+    Collects the specific terms of every action_input in a task subtree.
+
+    Args:
+        task (Dict[str, Any]): The root task.
+
+    Returns:
+        Set[str]: The terms.
+    """
+    terms: Set[str] = set()
+    stack = [task.get('action_input') for task in _tasks(task)]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            terms |= specific_terms(value)
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            terms.add(str(value))
+    return terms
+
+
+def _mentions(text: str, term: str) -> bool:
+    return re.search(r"(?<!\w)" + re.escape(term) + r"(?!\w)", text) is not None
+
+
+class PlanCache:
+    """
+    Reuses task trees planned for earlier questions when a new question is a close
+    paraphrase, skipping the planner call. Questions are embedded into a FAISS
+    inner-product index; entries are evicted least-recently-used and by age.
+
+    Similar questions can differ in exactly what the plan's inputs depend on
+    ("... of France" and "... of Germany" embed close together), so a plan is only
+    reused when the new question mentions every quoted phrase, number and name in its
+    action_inputs, and names nothing of its own that the stored question did not.
+    """
+
+    def __init__(self, embeddings: Optional[Any] = None, threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, ttl: Optional[float] = None):
+        """
+        Initialize the PlanCache class.
+
+        Args:
+            embeddings (Optional[Any]): A LangChain Embeddings object. Defaults to HashingEmbeddings.
+            threshold (float): Minimum cosine similarity for a hit. Defaults to 0.9.
+            max_entries (int): Entries kept before the least recently used is evicted. Defaults to 1000.
+            ttl (Optional[float]): Seconds an entry stays valid. Defaults to None (no expiry).
+        """
+        self.embeddings = embeddings or HashingEmbeddings()
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._vectors: Dict[int, Any] = {}
+        self._index = None
+        self._use_faiss = True
+        self._next_id = 0
+        self._lock = threading.RLock()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "mismatches": 0, "stores": 0, "evictions": 0}
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Fraction of lookups served from the cache.
+
+        Returns:
+            float: Hits divided by lookups, or 0.0 before any lookup.
+        """
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def _embed(self, question: str):
+        import numpy as np
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _ensure_index(self, dimensions: int):
+        if self._index is not None or not self._use_faiss:
+            return
+        try:
+            import faiss
+            self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(dimensions))
+        except ImportError:
+            # Brute-force search over self._vectors gives the same results
+            self._use_faiss = False
+
+    def _search(self, vector):
+        import numpy as np
+        if not self._entries:
+            return None, 0.0
+        if self._index is not None:
+            scores, ids = self._index.search(vector.reshape(1, -1), 1)
+            return (int(ids[0][0]), float(scores[0][0])) if ids[0][0] >= 0 else (None, 0.0)
+        entry_ids = list(self._vectors)
+        scores = np.stack([self._vectors[i] for i in entry_ids]) @ vector
+        best = int(np.argmax(scores))
+        return entry_ids[best], float(scores[best])
+
+    def _remove(self, entry_id: int):
+        import numpy as np
+        self._entries.pop(entry_id, None)
+        self._vectors.pop(entry_id, None)
+        if self._index is not None:
+            self._index.remove_ids(np.asarray([entry_id], dtype=np.int64))
+
+    def _evict(self, entry_id: int):
+        self._remove(entry_id)
+        self.stats["evictions"] += 1
+
+    def lookup(self, question: str, available_tools: Optional[Iterable[str]] = None) -> Optional[str]:
+        """
+        Return a cached task tree for a near-duplicate question, if any.
+
+        The tree comes back with observations cleared and original_question set to
+        the new question. Plans using a tool that is not available are not reused,
+        and neither are plans whose inputs do not fit the new question; those count
+        as misses and as mismatches.
+
+        Args:
+            question (str): The new question.
+            available_tools (Optional[Iterable[str]]): Names of the tools that can run now.
+
+        Returns:
+            Optional[str]: The task tree JSON, or None on a miss.
+        """
+        vector = self._embed(question)
+        with self._lock:
+            entry_id, score = self._search(vector)
+            entry = self._entries.get(entry_id) if entry_id is not None else None
+            if entry and self.ttl is not None and time.time() - entry["stored_at"] > self.ttl:
+                self._evict(entry_id)
+                entry = None
+            if (entry is None or score < self.threshold
+                    or (available_tools is not None and not entry["actions"] <= set(available_tools))):
+                self.stats["misses"] += 1
+                return None
+            if not self._fits(entry, question):
+                self.stats["misses"] += 1
+                self.stats["mismatches"] += 1
+                return None
+            self._entries.move_to_end(entry_id)
+            entry["hits"] += 1
+            self.stats["hits"] += 1
+            tree = copy.deepcopy(entry["tree"])
+
+        root = tree['task_tree']['task']
+        if 'original_question' in root:
+            root['original_question'] = question
+        return json.dumps(tree)
+
+    @staticmethod
+    def _fits(entry: Dict[str, Any], question: str) -> bool:
+        asked = question.lower()
+        if not all(_mentions(asked, term) for term in entry["inputs"]):
+            return False
+        stored = entry["question"].lower()
+        return all(_mentions(stored, term) for term in specific_terms(question, sentence_starts=False))
+
+    def store(self, question: str, task_tree_json: str) -> bool:
+        """
+        Index a question with its validated task tree.
+
+        Args:
+            question (str): The question the tree was planned for.
+            task_tree_json (str): The task tree JSON; observations are cleared before storing.
+
+        Returns:
+            bool: True if stored, False if the tree could not be parsed.
+        """
+        try:
+            tree = json.loads(task_tree_json)
+            root = tree['task_tree']['task']
+        except (ValueError, KeyError, TypeError):
+            return False
+        clear_observations(root)
+        vector = self._embed(question)
+        with self._lock:
+            existing_id, score = self._search(vector)
+            if existing_id is not None and score >= 0.999:
+                # Same question again; refresh its plan instead of adding a duplicate
+                self._remove(existing_id)
+            while len(self._entries) >= self.max_entries:
+                self._evict(next(iter(self._entries)))
+            entry_id = self._next_id
+            self._next_id += 1
+            self._ensure_index(vector.shape[0])
+            if self._index is not None:
+                import numpy as np
+                self._index.add_with_ids(vector.reshape(1, -1), np.asarray([entry_id], dtype=np.int64))
+            self._vectors[entry_id] = vector
+            self._entries[entry_id] = {"question": question, "tree": tree, "actions": tree_actions(root),
+                                       "inputs": input_terms(root), "stored_at": time.time(), "hits": 0}
+            self.stats["stores"] += 1
+        return True
+
+    def clear(self):
+        """
+        Drop every entry and reset the index.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+            self._index = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,250 @@
+# process_lane.py
+
+import importlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+# Worker processes for cpu-bound tools
+CPU_WORKERS = int(os.environ.get('REACTREE_CPU_WORKERS', os.cpu_count() or 1))
+# "spawn" avoids forking a process that already runs tool and HTTP threads
+START_METHOD = os.environ.get('REACTREE_CPU_START_METHOD', 'spawn')
+# Modules imported by every worker at start-up so the first task does not pay for them
+WARM_MODULES: Sequence[str] = tuple(
+    module for module in os.environ.get('REACTREE_CPU_WARM_MODULES', 'UtilityTools').split(',') if module
+)
+# Fewest items a batch tool's chunk gets before the batch is split across another worker
+MIN_CHUNK_ITEMS = int(os.environ.get('REACTREE_CPU_MIN_CHUNK_ITEMS', 16))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_in_worker = False
+
+
+def _init_worker(modules: Sequence[str]):
+    global _in_worker
+    _in_worker = True
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            print(f"Process lane could not preload {module}: {e}")
+
+
+def _call(module: str, function: str, kwargs: Dict[str, Any]) -> Any:
+    return getattr(importlib.import_module(module), function)(**kwargs)
+
+
+def _noop() -> int:
+    return os.getpid()
+
+
+def in_worker() -> bool:
+    """
+    Tells whether the caller runs inside a process-lane worker.
+
+    Returns:
+        bool: True in a worker; work there should not be fanned out to the pool again.
+    """
+    return _in_worker
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Returns the shared process pool, creating it on first use.
+
+    Returns:
+        ProcessPoolExecutor: The pool of CPU_WORKERS processes.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=CPU_WORKERS,
+                                            mp_context=multiprocessing.get_context(START_METHOD),
+                                            initializer=_init_worker, initargs=(tuple(WARM_MODULES),))
+    return _pool
+
+
+def warm_process_pool() -> int:
+    """
+    Starts every worker now and waits until they have imported WARM_MODULES.
+
+    Returns:
+        int: The number of distinct worker processes that answered.
+    """
+    pool = get_process_pool()
+    return len({future.result() for future in [pool.submit(_noop) for _ in range(CPU_WORKERS)]})
+
+
+def _reset_broken_pool(pool: ProcessPoolExecutor):
+    global _pool
+    # A worker died (e.g. killed by the OOM killer); the next call gets a fresh pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_in_process(module: str, function: str, kwargs: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+    """
+    Calls a module-level function in the process pool and waits for its result.
+
+    Only the module and function names and the arguments are pickled, not the
+    tool object, so transfer cost is the size of the arguments and the result.
+
+    Args:
+        module (str): The module defining the function.
+        function (str): The function name.
+        kwargs (Dict[str, Any]): Keyword arguments for the call.
+        timeout (Optional[float]): Seconds to wait for the result.
+
+    Returns:
+        Any: The function's return value.
+    """
+    return submit_in_process(module, function, kwargs).result(timeout)
+
+
+def submit_in_process(module: str, function: str, kwargs: Dict[str, Any]) -> Future:
+    """
+    Submits a call of a module-level function to the process pool without waiting.
+
+    Cancelling the future only helps while the call is queued; a call that is
+    already running finishes in its worker and its result is discarded.
+
+    Args:
+        module (str): The module defining the function.
+        function (str): The function name.
+        kwargs (Dict[str, Any]): Keyword arguments for the call.
+
+    Returns:
+        Future: The pending result.
+    """
+    pool = get_process_pool()
+    try:
+        future = pool.submit(_call, module, function, kwargs)
+    except BrokenProcessPool:
+        _reset_broken_pool(pool)
+        raise
+
+    def check(done: Future):
+        if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool):
+            _reset_broken_pool(pool)
+
+    future.add_done_callback(check)
+    return future
+
+
+def merge_chunk_results(results: List[Any]) -> Any:
+    """
+    Joins the results of a batch's chunks in chunk order.
+
+    Args:
+        results (List[Any]): One result per chunk: lists, or dicts of lists as
+            returned by columnar batch tools.
+
+    Returns:
+        Any: The concatenated list, or a dict concatenating each key's lists.
+    """
+    if all(isinstance(result, dict) for result in results):
+        return {key: merge_chunk_results([result[key] for result in results]) for key in results[0]}
+    if all(isinstance(result, list) for result in results):
+        return [item for result in results for item in result]
+    raise TypeError("Batch tool chunks must return lists or dicts of lists.")
+
+
+def submit_batch_in_process(module: str, function: str, kwargs: Dict[str, Any], batch: str) -> Future:
+    """
+    Submits a batch tool call to the process pool split into one chunk per worker.
+
+    Inside a worker a batch tool runs inline rather than fanning out again, so
+    the batch is split here instead: the list argument named batch is cut into
+    up to CPU_WORKERS chunks of at least MIN_CHUNK_ITEMS items, each chunk is a
+    call of its own, and the results are merged with merge_chunk_results. A
+    string holding a JSON array is split as that array.
+    Cancelling the returned future cancels the chunks still queued.
+
+    Args:
+        module (str): The module defining the function.
+        function (str): The function name.
+        kwargs (Dict[str, Any]): Keyword arguments for the call.
+        batch (str): The argument holding the list of items.
+
+    Returns:
+        Future: The pending merged result.
+    """
+    items = kwargs.get(batch)
+    if isinstance(items, str):
+        # Batch tools also take their list as a JSON array, the form planners write
+        try:
+            items = json.loads(items)
+        except json.JSONDecodeError:
+            pass
+    chunks = min(CPU_WORKERS, len(items) // max(1, MIN_CHUNK_ITEMS)) if isinstance(items, list) else 1
+    if chunks <= 1:
+        return submit_in_process(module, function, kwargs)
+    chunk_size = -(-len(items) // chunks)
+    parts = [submit_in_process(module, function, {**kwargs, batch: items[i:i + chunk_size]})
+             for i in range(0, len(items), chunk_size)]
+    merged: Future = Future()
+    lock = threading.Lock()
+    pending = [len(parts)]
+
+    def cancel_parts(done: Future):
+        if done.cancelled():
+            for part in parts:
+                part.cancel()
+
+    def collect(_: Future):
+        with lock:
+            pending[0] -= 1
+            if pending[0] or merged.done():
+                return
+        if not merged.set_running_or_notify_cancel():
+            return
+        try:
+            merged.set_result(merge_chunk_results([part.result() for part in parts]))
+        except BaseException as e:
+            merged.set_exception(e)
+
+    merged.add_done_callback(cancel_parts)
+    for part in parts:
+        part.add_done_callback(collect)
+    return merged
+
+
+def map_in_process(func: Callable[..., Any], *iterables: Iterable[Any]) -> List[Any]:
+    """
+    Maps a picklable, module-level function over iterables in the process pool.
+
+    Args:
+        func (Callable[..., Any]): The function.
+        *iterables (Iterable[Any]): Argument iterables, as for map().
+
+    Returns:
+        List[Any]: The results, in input order.
+    """
+    pool = get_process_pool()
+    try:
+        return list(pool.map(func, *iterables))
+    except BrokenProcessPool:
+        _reset_broken_pool(pool)
+        raise
+
+
+def shutdown_process_pool(wait: bool = True):
+    """
+    Shuts the shared process pool down.
+
+    Args:
+        wait (bool): Wait for running tasks to finish. Defaults to True.
+    """
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
@@ -0,0 +1,305 @@
+# run_history.py
+
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+RUNS_TABLE = "reactree_runs"
+TASKS_TABLE = "reactree_task_observations"
+
+RUN_COLUMNS = [
+    "run_id", "source", "mode", "question", "started_at", "finished_at",
+    "duration_ms", "task_tree", "final_answer"
+]
+TASK_COLUMNS = [
+    "run_id", "task_no", "level_no", "action", "action_input",
+    "observation", "status", "started_at", "duration_ms"
+]
+
+CREATE_TABLES_SQL = f"""
+CREATE TABLE IF NOT EXISTS {RUNS_TABLE} (
+    run_id TEXT PRIMARY KEY,
+    source TEXT,
+    mode TEXT,
+    question TEXT,
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ,
+    duration_ms DOUBLE PRECISION,
+    task_tree JSONB,
+    final_answer TEXT
+);
+CREATE TABLE IF NOT EXISTS {TASKS_TABLE} (
+    run_id TEXT,
+    task_no TEXT,
+    level_no TEXT,
+    action TEXT,
+    action_input TEXT,
+    observation TEXT,
+    status TEXT,
+    started_at TIMESTAMPTZ,
+    duration_ms DOUBLE PRECISION
+);
+CREATE INDEX IF NOT EXISTS {TASKS_TABLE}_run_id_idx ON {TASKS_TABLE} (run_id);
+"""
+
+TABLE_COLUMNS = {RUNS_TABLE: RUN_COLUMNS, TASKS_TABLE: TASK_COLUMNS}
+
+
+def new_run_id() -> str:
+    """
+    Generates a unique identifier for a run.
+
+    Returns:
+        str: The run identifier.
+    """
+    return uuid.uuid4().hex
+
+
+def _timestamp(epoch_seconds: Optional[float]) -> Optional[str]:
+    if epoch_seconds is None:
+        return None
+    return datetime.fromtimestamp(epoch_seconds, tz=timezone.utc).isoformat()
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value
+    try:
+        return json.dumps(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+class RunHistoryWriter:
+    """
+    Batches run and task records in a bounded in-memory queue and flushes them to
+    Postgres with COPY from a background thread, so the request path never waits
+    on the database.
+    """
+
+    def __init__(self, db_helper: Any, batch_size: int = 500, flush_interval: float = 2.0,
+                 max_queue_size: int = 10000, overflow: str = "spill",
+                 spill_path: str = "run_history_spill.jsonl", create_tables: bool = True):
+        """
+        Initialize the RunHistoryWriter class.
+
+        Args:
+            db_helper (Any): A PostgresDBHelper used for COPY.
+            batch_size (int): Flush once this many records are buffered. Defaults to 500.
+            flush_interval (float): Flush at least this often, in seconds. Defaults to 2.0.
+            max_queue_size (int): Capacity of the in-memory queue. Defaults to 10000.
+            overflow (str): What to do with records when the queue is full or a flush
+                fails: "spill" appends them to spill_path, "drop" discards them.
+                Defaults to "spill".
+            spill_path (str): JSON-lines file used for spilled records.
+            create_tables (bool): Create the history tables on start. Defaults to True.
+        """
+        if overflow not in ("spill", "drop"):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.db_helper = db_helper
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.spill_path = spill_path
+        self.create_tables = create_tables
+
+        self._queue: "queue.Queue[Tuple[str, tuple]]" = queue.Queue(maxsize=max_queue_size)
+        self._spill_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._flush_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, int] = {"enqueued": 0, "written": 0, "dropped": 0, "spilled": 0, "flushes": 0,
+                                      "flush_errors": 0}
+
+    def start(self) -> "RunHistoryWriter":
+        """
+        Start the background flush thread.
+
+        Returns:
+            RunHistoryWriter: The writer itself, for chaining.
+        """
+        if self._thread and self._thread.is_alive():
+            return self
+        if self.create_tables:
+            self.db_helper.execute_sync(CREATE_TABLES_SQL)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="run-history-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = 10.0):
+        """
+        Flush everything still queued and stop the background thread.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for the final flush.
+        """
+        self._stop_event.set()
+        self._flush_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.db_helper.close_copy_sync()
+
+    def flush(self):
+        """
+        Ask the background thread to flush its buffer without waiting for the thresholds.
+        """
+        self._flush_event.set()
+
+    def record_run(self, run_id: str, source: str, mode: str, question: Optional[str],
+                   started_at: float, finished_at: float, task_tree: Any = None,
+                   final_answer: Optional[str] = None):
+        """
+        Queue a finished run.
+
+        Args:
+            run_id (str): The run identifier.
+            source (str): The component that produced the run (e.g. "ExecutionAlgorithm").
+            mode (str): The execution mode (e.g. "bfs_parallel").
+            question (Optional[str]): The original question, if known.
+            started_at (float): Start time as epoch seconds.
+            finished_at (float): End time as epoch seconds.
+            task_tree (Any): The executed task tree, as a dict or JSON string.
+            final_answer (Optional[str]): The final answer, if any.
+        """
+        row = (run_id, source, mode, question, _timestamp(started_at), _timestamp(finished_at),
+               (finished_at - started_at) * 1000.0, _text(task_tree), final_answer)
+        self._put(RUNS_TABLE, row)
+
+    def record_task(self, run_id: str, task: Dict[str, Any], status: str,
+                    started_at: Optional[float] = None, duration_ms: Optional[float] = None):
+        """
+        Queue the observation and timing of a single executed task.
+
+        Args:
+            run_id (str): The run identifier.
+            task (Dict[str, Any]): The executed task dictionary.
+            status (str): "success", "failed", "timeout" or "unavailable".
+            started_at (Optional[float]): Start time as epoch seconds.
+            duration_ms (Optional[float]): Execution time in milliseconds.
+        """
+        row = (run_id, _text(task.get('task_no')), _text(task.get('level_no')), task.get('action'),
+               _text(task.get('action_input')), _text(task.get('observation')), status,
+               _timestamp(started_at), duration_ms)
+        self._put(TASKS_TABLE, row)
+
+    def replay_spill(self) -> int:
+        """
+        Load previously spilled records into Postgres. Each table is written on its own,
+        and only the records of tables that were written are removed from the spill file,
+        so a failed replay can be retried. Runs already in the table are skipped.
+
+        Returns:
+            int: The number of records written.
+        """
+        with self._spill_lock:
+            if not os.path.exists(self.spill_path):
+                return 0
+            batches: Dict[str, List[tuple]] = {}
+            with open(self.spill_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        batches.setdefault(entry["table"], []).append(tuple(entry["row"]))
+            written = 0
+            try:
+                for table in list(batches):
+                    self._copy(table, batches[table])
+                    written += len(batches.pop(table))
+            finally:
+                if batches:
+                    self._rewrite_spill(batches)
+                else:
+                    os.remove(self.spill_path)
+        return written
+
+    def _rewrite_spill(self, batches: Dict[str, List[tuple]]):
+        path = self.spill_path + ".tmp"
+        with open(path, "w", encoding="utf-8") as f:
+            for table, rows in batches.items():
+                for row in rows:
+                    f.write(json.dumps({"table": table, "row": list(row)}) + "\n")
+        os.replace(path, self.spill_path)
+
+    def _copy(self, table: str, rows: List[tuple]):
+        # run_id is the runs table's key; a replayed or resumed run must not fail the batch
+        self.db_helper.copy_rows_sync(table, TABLE_COLUMNS[table], rows, skip_conflicts=table == RUNS_TABLE)
+
+    def _count(self, key: str, n: int = 1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _put(self, table: str, row: tuple):
+        try:
+            self._queue.put_nowait((table, row))
+            self._count("enqueued")
+        except queue.Full:
+            self._overflow([(table, row)])
+            self._flush_event.set()
+
+    def _overflow(self, records: List[Tuple[str, tuple]]):
+        if self.overflow == "drop":
+            self._count("dropped", len(records))
+            return
+        with self._spill_lock:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for table, row in records:
+                    f.write(json.dumps({"table": table, "row": list(row)}) + "\n")
+        self._count("spilled", len(records))
+
+    def _drain(self, buffer: List[Tuple[str, tuple]]):
+        while len(buffer) < self.batch_size:
+            try:
+                buffer.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+    def _write(self, buffer: List[Tuple[str, tuple]]):
+        if not buffer:
+            return
+        batches: Dict[str, List[tuple]] = {}
+        for table, row in buffer:
+            batches.setdefault(table, []).append(row)
+        for table in (RUNS_TABLE, TASKS_TABLE):
+            rows = batches.get(table)
+            if not rows:
+                continue
+            try:
+                self._copy(table, rows)
+                self._count("written", len(rows))
+            except Exception as e:
+                self._count("flush_errors")
+                print(f"Run history flush to {table} failed due to {e}")
+                self._overflow([(table, row) for row in rows])
+        self._count("flushes")
+
+    def _run(self):
+        buffer: List[Tuple[str, tuple]] = []
+        last_flush = time.monotonic()
+        while True:
+            wait = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                buffer.append(self._queue.get(timeout=min(wait, 0.1) if wait else 0.0))
+            except queue.Empty:
+                pass
+            self._drain(buffer)
+
+            stopping = self._stop_event.is_set()
+            due = time.monotonic() - last_flush >= self.flush_interval
+            if len(buffer) >= self.batch_size or due or self._flush_event.is_set() or stopping:
+                self._flush_event.clear()
+                self._write(buffer)
+                buffer = []
+                last_flush = time.monotonic()
+
+            if stopping and self._queue.empty():
+                break
@@ -0,0 +1,133 @@
+# single_flight.py
+
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from Deadlines import ToolTimeoutError
+
+
+def call_key(action: str, tool_input: Any) -> Tuple[str, str]:
+    """
+    Identifies a tool call, so that identical calls compare equal.
+
+    Args:
+        action (str): The tool name.
+        tool_input (Any): The coerced tool input; dicts compare regardless of key order.
+
+    Returns:
+        Tuple[str, str]: The key.
+    """
+    if isinstance(tool_input, str):
+        return action, tool_input.strip()
+    return action, json.dumps(tool_input, sort_keys=True, default=str)
+
+
+def find_duplicates(root: dict) -> Dict[int, dict]:
+    """
+    Finds tasks that repeat an earlier task's action and action_input.
+
+    Args:
+        root (dict): The root task.
+
+    Returns:
+        Dict[int, dict]: The first occurrence of each repeated call, keyed by id() of the repeats.
+    """
+    first: Dict[Tuple[str, str], dict] = {}
+    duplicates: Dict[int, dict] = {}
+    stack = [root]
+    while stack:
+        task = stack.pop()
+        if task.get('action') and str(task.get('level_no')).strip() != "0":
+            key = call_key(task['action'], task.get('action_input'))
+            if key in first:
+                duplicates[id(task)] = first[key]
+            else:
+                first[key] = task
+        stack.extend(reversed(task.get('sub_tasks') or []))
+    return duplicates
+
+
+class SingleFlight:
+    """
+    Lets concurrent identical calls share one execution.
+
+    The first caller for a key runs the call; callers arriving while it is in
+    flight wait for and share its result or error. Nothing is kept once the
+    call finishes, so this is not a cache.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"calls": 0, "executions": 0, "coalesced": 0,
+                                      "plan_duplicates": 0, "reused_in_tree": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run fn, or wait for the identical call already in flight.
+
+        Args:
+            key (Hashable): Identifies the call, e.g. from call_key.
+            fn (Callable[[], Any]): The call.
+            timeout (Optional[float]): Seconds a waiting caller waits for the call in flight.
+
+        Returns:
+            Any: The call's result.
+
+        Raises:
+            ToolTimeoutError: If the shared call did not finish within timeout.
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+                self.stats["executions"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            try:
+                return flight.result(timeout)
+            except TimeoutError:
+                if flight.done():
+                    raise
+                raise ToolTimeoutError(f"Identical call {key[0] if isinstance(key, tuple) else key} "
+                                       f"did not finish within {timeout:.1f}s.")
+        try:
+            result = fn()
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+
+    def count(self, key: str, n: int = 1):
+        """
+        Add to a duplicate-work counter.
+
+        Args:
+            key (str): "plan_duplicates" or "reused_in_tree".
+            n (int): The amount. Defaults to 1.
+        """
+        with self._lock:
+            self.stats[key] += n
+
+    def snapshot(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: Calls, executions, calls that shared an execution, duplicate
+                leaves found in plans, and duplicates answered from an earlier task of the tree.
+        """
+        with self._lock:
+            return dict(self.stats, in_flight=len(self._flights))
+
+
+# Shared by every engine and the graph, so identical calls from concurrent trees coalesce
+tool_flights = SingleFlight()
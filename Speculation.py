@@ -0,0 +1,86 @@
+# speculation.py
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Run ready tasks while the replanner deliberates, keeping their results if the plan does not change them
+SPECULATE = os.environ.get('REACTREE_SPECULATE', '0').lower() in ('1', 'true', 'yes')
+# Runs whose speculation counts are kept for lookup by run_id
+SPECULATION_HISTORY = int(os.environ.get('REACTREE_SPECULATION_HISTORY', 100))
+
+
+def _empty() -> Dict[str, Any]:
+    return {"rounds": 0, "speculated": 0, "committed": 0, "discarded": 0, "cancelled": 0,
+            "speculative_s": 0.0, "wasted_s": 0.0}
+
+
+class SpeculationLedger:
+    """
+    Counts speculative task executions and how much of that work was thrown away.
+
+    A speculated task is committed when the replan keeps it unchanged, cancelled
+    when it had not started yet, and discarded otherwise; the seconds spent on
+    discarded tasks are wasted work. Counts are kept in total and for recent runs.
+    """
+
+    def __init__(self, history: int = SPECULATION_HISTORY):
+        """
+        Initialize the SpeculationLedger class.
+
+        Args:
+            history (int): Runs kept for run(). Defaults to REACTREE_SPECULATION_HISTORY or 100.
+        """
+        self.history = history
+        self.stats: Dict[str, Any] = _empty()
+        self._runs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count(self, run_id: str, key: str, n: float = 1):
+        """
+        Add to a counter of a run and to the totals.
+
+        Args:
+            run_id (str): The run identifier.
+            key (str): One of rounds, speculated, committed, discarded, cancelled,
+                speculative_s or wasted_s.
+            n (float): The amount. Defaults to 1.
+        """
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None:
+                run = self._runs[run_id] = _empty()
+                while len(self._runs) > self.history:
+                    self._runs.popitem(last=False)
+            run[key] += n
+            self.stats[key] += n
+
+    def run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the counters of one run.
+
+        Args:
+            run_id (str): The run identifier.
+
+        Returns:
+            Optional[Dict[str, Any]]: The counters, or None if the run did not speculate
+                or is no longer kept.
+        """
+        with self._lock:
+            run = self._runs.get(run_id)
+            return None if run is None else dict(run)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return the counters summed over every run.
+
+        Returns:
+            Dict[str, Any]: The totals, with seconds rounded to milliseconds.
+        """
+        with self._lock:
+            return {key: round(value, 3) if isinstance(value, float) else value for key, value in self.stats.items()}
+
+
+# Shared by every engine, so /service/stats reports speculation across runs
+speculation_stats = SpeculationLedger()
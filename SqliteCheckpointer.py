@@ -0,0 +1,206 @@
+# sqlite_checkpointer.py
+
+import time
+from typing import Any, Dict, List, Optional
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from BoundedCheckpointer import DEFAULT_CHECKPOINTS_PER_THREAD, DEFAULT_MAX_THREADS, DEFAULT_THREAD_TTL
+
+# Last checkpoint time per thread; LangGraph's own tables carry no timestamps
+CREATE_ACTIVITY_SQL = """
+CREATE TABLE IF NOT EXISTS thread_activity (
+    thread_id TEXT PRIMARY KEY,
+    last_used REAL
+);
+CREATE INDEX IF NOT EXISTS thread_activity_last_used ON thread_activity (last_used);
+"""
+TOUCH_SQL = ("INSERT INTO thread_activity (thread_id, last_used) VALUES (?, ?) "
+             "ON CONFLICT(thread_id) DO UPDATE SET last_used = excluded.last_used")
+# Checkpoint ids sort by creation time, so the newest are the largest
+PRUNE_CHECKPOINTS_SQL = (
+    "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN "
+    "(SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+    "ORDER BY checkpoint_id DESC LIMIT ?)")
+# Writes of pruned checkpoints; those of the kept ones and of newer, not yet stored ones stay
+PRUNE_WRITES_SQL = (
+    "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < "
+    "(SELECT MIN(checkpoint_id) FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?)")
+EXPIRED_THREADS_SQL = "SELECT thread_id FROM thread_activity WHERE last_used < ?"
+EXCESS_THREADS_SQL = "SELECT thread_id FROM thread_activity ORDER BY last_used DESC LIMIT -1 OFFSET ?"
+DELETE_THREAD_SQL = ("DELETE FROM checkpoints WHERE thread_id = ?",
+                     "DELETE FROM writes WHERE thread_id = ?",
+                     "DELETE FROM thread_activity WHERE thread_id = ?")
+
+
+class _Bounds:
+    """
+    The limits and counters shared by the sync and async bounded SQLite savers.
+    """
+
+    def _init_bounds(self, max_checkpoints_per_thread: int, max_threads: int, thread_ttl: Optional[float]):
+        self.max_checkpoints_per_thread = max(1, max_checkpoints_per_thread)
+        self.max_threads = max_threads
+        self.thread_ttl = thread_ttl or None
+        self.counters: Dict[str, int] = {"checkpoints_pruned": 0, "threads_evicted": 0}
+
+    def _prune_params(self, thread_id: str, checkpoint_ns: str) -> List[tuple]:
+        return [(PRUNE_CHECKPOINTS_SQL, (thread_id, checkpoint_ns, thread_id, checkpoint_ns,
+                                         self.max_checkpoints_per_thread)),
+                (PRUNE_WRITES_SQL, (thread_id, checkpoint_ns, thread_id, checkpoint_ns))]
+
+    def _cutoff(self) -> float:
+        return time.time() - self.thread_ttl if self.thread_ttl is not None else float("-inf")
+
+
+class BoundedSqliteSaver(_Bounds, SqliteSaver):
+    """
+    A SQLite LangGraph checkpointer with bounded growth.
+
+    Only the latest checkpoints of each thread and namespace are kept, with the
+    writes of the pruned ones deleted, and threads are evicted least-recently-used
+    beyond max_threads and after thread_ttl seconds without a new checkpoint, the
+    same limits BoundedMemorySaver applies in memory.
+    """
+
+    def __init__(self, conn: Any, max_checkpoints_per_thread: int = DEFAULT_CHECKPOINTS_PER_THREAD,
+                 max_threads: int = DEFAULT_MAX_THREADS, thread_ttl: Optional[float] = DEFAULT_THREAD_TTL,
+                 serde: Optional[Any] = None):
+        """
+        Initialize the BoundedSqliteSaver class.
+
+        Args:
+            conn (sqlite3.Connection): The database connection.
+            max_checkpoints_per_thread (int): Checkpoints kept per thread. Defaults to
+                REACTREE_CHECKPOINTS_PER_THREAD or 5.
+            max_threads (int): Threads kept. Defaults to REACTREE_CHECKPOINT_MAX_THREADS or 1000.
+            thread_ttl (Optional[float]): Seconds without a new checkpoint before a thread is evicted;
+                None or 0 never expires. Defaults to REACTREE_CHECKPOINT_THREAD_TTL or 3600.
+            serde (Optional[Any]): The LangGraph serializer. Defaults to the SqliteSaver default.
+        """
+        super().__init__(conn, serde=serde)
+        self._init_bounds(max_checkpoints_per_thread, max_threads, thread_ttl)
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        super().setup()
+        self.conn.executescript(CREATE_ACTIVITY_SQL)
+
+    def put(self, config: Dict[str, Any], checkpoint: Dict[str, Any], metadata: Any,
+            new_versions: Dict[str, Any]) -> Dict[str, Any]:
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = str(config["configurable"]["thread_id"])
+        with self.cursor() as cur:
+            cur.execute(TOUCH_SQL, (thread_id, time.time()))
+            for sql, params in self._prune_params(thread_id, config["configurable"]["checkpoint_ns"]):
+                cur.execute(sql, params)
+                if sql is PRUNE_CHECKPOINTS_SQL:
+                    self.counters["checkpoints_pruned"] += max(cur.rowcount, 0)
+            self._evict(cur)
+        return next_config
+
+    def _evict(self, cur: Any):
+        expired = [row[0] for row in cur.execute(EXPIRED_THREADS_SQL, (self._cutoff(),)).fetchall()]
+        excess = [row[0] for row in cur.execute(EXCESS_THREADS_SQL, (self.max_threads,)).fetchall()]
+        for thread_id in set(expired) | set(excess):
+            for sql in DELETE_THREAD_SQL:
+                cur.execute(sql, (thread_id,))
+            self.counters["threads_evicted"] += 1
+
+    def delete_thread(self, thread_id: str) -> None:
+        """
+        Delete every checkpoint and write of a thread.
+
+        Args:
+            thread_id (str): The thread to delete.
+        """
+        with self.cursor() as cur:
+            for sql in DELETE_THREAD_SQL:
+                cur.execute(sql, (str(thread_id),))
+
+    def evict_expired(self):
+        """
+        Evict idle threads now instead of waiting for the next checkpoint.
+        """
+        with self.cursor() as cur:
+            self._evict(cur)
+
+
+class BoundedAsyncSqliteSaver(_Bounds, AsyncSqliteSaver):
+    """
+    The async counterpart of BoundedSqliteSaver, for graphs driven with astream/ainvoke.
+    """
+
+    def __init__(self, conn: Any, max_checkpoints_per_thread: int = DEFAULT_CHECKPOINTS_PER_THREAD,
+                 max_threads: int = DEFAULT_MAX_THREADS, thread_ttl: Optional[float] = DEFAULT_THREAD_TTL,
+                 serde: Optional[Any] = None):
+        """
+        Initialize the BoundedAsyncSqliteSaver class.
+
+        Args:
+            conn (aiosqlite.Connection): The database connection.
+            max_checkpoints_per_thread (int): Checkpoints kept per thread. Defaults to
+                REACTREE_CHECKPOINTS_PER_THREAD or 5.
+            max_threads (int): Threads kept. Defaults to REACTREE_CHECKPOINT_MAX_THREADS or 1000.
+            thread_ttl (Optional[float]): Seconds without a new checkpoint before a thread is evicted;
+                None or 0 never expires. Defaults to REACTREE_CHECKPOINT_THREAD_TTL or 3600.
+            serde (Optional[Any]): The LangGraph serializer. Defaults to the AsyncSqliteSaver default.
+        """
+        super().__init__(conn, serde=serde)
+        self._init_bounds(max_checkpoints_per_thread, max_threads, thread_ttl)
+
+    async def setup(self) -> None:
+        if self.is_setup:
+            return
+        await super().setup()
+        async with self.lock:
+            await self.conn.executescript(CREATE_ACTIVITY_SQL)
+            await self.conn.commit()
+
+    async def aput(self, config: Dict[str, Any], checkpoint: Dict[str, Any], metadata: Any,
+                   new_versions: Dict[str, Any]) -> Dict[str, Any]:
+        next_config = await super().aput(config, checkpoint, metadata, new_versions)
+        thread_id = str(config["configurable"]["thread_id"])
+        async with self.lock:
+            await self.conn.execute(TOUCH_SQL, (thread_id, time.time()))
+            for sql, params in self._prune_params(thread_id, config["configurable"]["checkpoint_ns"]):
+                async with self.conn.execute(sql, params) as cur:
+                    if sql is PRUNE_CHECKPOINTS_SQL:
+                        self.counters["checkpoints_pruned"] += max(cur.rowcount, 0)
+            await self._aevict()
+            await self.conn.commit()
+        return next_config
+
+    async def _aevict(self):
+        async with self.conn.execute(EXPIRED_THREADS_SQL, (self._cutoff(),)) as cur:
+            expired = [row[0] for row in await cur.fetchall()]
+        async with self.conn.execute(EXCESS_THREADS_SQL, (self.max_threads,)) as cur:
+            excess = [row[0] for row in await cur.fetchall()]
+        for thread_id in set(expired) | set(excess):
+            for sql in DELETE_THREAD_SQL:
+                await self.conn.execute(sql, (thread_id,))
+            self.counters["threads_evicted"] += 1
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """
+        Delete every checkpoint and write of a thread.
+
+        Args:
+            thread_id (str): The thread to delete.
+        """
+        await self.setup()
+        async with self.lock:
+            for sql in DELETE_THREAD_SQL:
+                await self.conn.execute(sql, (str(thread_id),))
+            await self.conn.commit()
+
+    async def aevict_expired(self):
+        """
+        Evict idle threads now instead of waiting for the next checkpoint.
+        """
+        await self.setup()
+        async with self.lock:
+            await self._aevict()
+            await self.conn.commit()
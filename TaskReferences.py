@@ -0,0 +1,155 @@
+# task_references.py
+
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# {{task_3.observation}}, or a path into a JSON observation: {{task_3.observation.items[0].title}}
+REFERENCE = re.compile(
+    r"\{\{\s*task_([\w-]+)\.observation((?:\.[A-Za-z_]\w*|\[\d+\]|\[\s*['\"][^'\"]+['\"]\s*\])*)\s*\}\}")
+_PATH_STEP = re.compile(r"\.([A-Za-z_]\w*)|\[(\d+)\]|\[\s*['\"]([^'\"]+)['\"]\s*\]")
+
+
+class UnresolvedReferenceError(ValueError):
+    """
+    Raised when an action_input refers to a task that does not exist, has no usable
+    observation yet, or whose observation does not contain the referenced path.
+    """
+
+
+def index_tasks(root: dict) -> Dict[str, dict]:
+    """
+    Maps task numbers to tasks, for resolving references.
+
+    Args:
+        root (dict): The root task.
+
+    Returns:
+        Dict[str, dict]: Tasks keyed by str(task_no).
+    """
+    tasks: Dict[str, dict] = {}
+    stack = [root]
+    while stack:
+        task = stack.pop()
+        if task.get('task_no') is not None:
+            tasks.setdefault(str(task['task_no']).strip(), task)
+        stack.extend(task.get('sub_tasks') or [])
+    return tasks
+
+
+def referenced_tasks(action_input: Any) -> Set[str]:
+    """
+    Returns the task numbers an action_input refers to.
+
+    Args:
+        action_input (Any): A string, or a dict or list containing strings.
+
+    Returns:
+        Set[str]: The referenced task numbers.
+    """
+    if isinstance(action_input, str):
+        return {match.group(1) for match in REFERENCE.finditer(action_input)}
+    if isinstance(action_input, dict):
+        return set().union(*(referenced_tasks(value) for value in action_input.values()))
+    if isinstance(action_input, list):
+        return set().union(*(referenced_tasks(value) for value in action_input))
+    return set()
+
+
+def pending_references(task: dict, tasks: Dict[str, dict], scheduled: Optional[Set[int]] = None) -> List[str]:
+    """
+    Returns the referenced tasks of a task that have not produced an observation yet
+    but still can before it runs.
+
+    The root (level 0) is never executed, and the task's own subtasks only run after
+    it, so references to either cannot be satisfied by waiting; neither can references
+    to tasks outside the scheduled ones. Such references are left to resolve_references,
+    which fails them.
+
+    Args:
+        task (dict): The task about to run.
+        tasks (Dict[str, dict]): The tree's tasks from index_tasks.
+        scheduled (Optional[Set[int]]): id() of the tasks that will still run. Defaults to
+            every task of the tree.
+
+    Returns:
+        List[str]: Task numbers to wait for.
+    """
+    descendants = set()
+    stack = list(task.get('sub_tasks') or [])
+    while stack:
+        sub_task = stack.pop()
+        descendants.add(id(sub_task))
+        stack.extend(sub_task.get('sub_tasks') or [])
+
+    def satisfiable(referenced: dict) -> bool:
+        return (referenced is not task and not referenced.get('observation')
+                and str(referenced.get('level_no')).strip() != "0" and id(referenced) not in descendants
+                and (scheduled is None or id(referenced) in scheduled))
+
+    return [task_no for task_no in referenced_tasks(task.get('action_input'))
+            if task_no in tasks and satisfiable(tasks[task_no])]
+
+
+def _select(value: Any, path: str, reference: str) -> Any:
+    if not path:
+        return value
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            raise UnresolvedReferenceError(f"{reference}: the observation is not JSON, so it has no fields.")
+    for key, index, quoted in _PATH_STEP.findall(path):
+        try:
+            value = value[int(index)] if index else value[key or quoted]
+        except (KeyError, IndexError, TypeError):
+            raise UnresolvedReferenceError(f"{reference}: the observation has no {key or quoted or index}.")
+    return value
+
+
+def resolve_references(action_input: Any, tasks: Dict[str, dict],
+                       usable: Callable[[Any], bool] = bool) -> Any:
+    """
+    Replaces observation references in an action_input with the referenced values.
+
+    A string that is exactly one reference becomes the referenced value itself,
+    so structured observations pass through as dicts or lists; references inside
+    longer strings are substituted as text (JSON for non-string values).
+
+    Args:
+        action_input (Any): The task's action_input.
+        tasks (Dict[str, dict]): The tree's tasks from index_tasks.
+        usable (Callable[[Any], bool]): Tells whether an observation is a result rather than
+            a failure message. Defaults to any non-empty observation.
+
+    Returns:
+        Any: The action_input with every reference resolved.
+
+    Raises:
+        UnresolvedReferenceError: If a reference cannot be resolved.
+    """
+    if isinstance(action_input, dict):
+        return {key: resolve_references(value, tasks, usable) for key, value in action_input.items()}
+    if isinstance(action_input, list):
+        return [resolve_references(value, tasks, usable) for value in action_input]
+    if not isinstance(action_input, str) or "{{" not in action_input:
+        return action_input
+
+    def value_of(match: re.Match) -> Any:
+        task = tasks.get(match.group(1))
+        if task is None:
+            raise UnresolvedReferenceError(f"{match.group(0)}: there is no task {match.group(1)}.")
+        observation = task.get('observation')
+        if not observation or not usable(observation):
+            raise UnresolvedReferenceError(f"{match.group(0)}: task {match.group(1)} has no result.")
+        return _select(observation, match.group(2), match.group(0))
+
+    whole = REFERENCE.fullmatch(action_input.strip())
+    if whole:
+        return value_of(whole)
+
+    def substitute(match: re.Match) -> str:
+        value = value_of(match)
+        return value if isinstance(value, str) else json.dumps(value, default=str)
+
+    return REFERENCE.sub(substitute, action_input)
@@ -0,0 +1,198 @@
+# task_scheduler.py
+
+import heapq
+import itertools
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from Deadlines import tool_latency
+from TaskReferences import index_tasks, referenced_tasks
+
+# Seconds assumed for a tool that has no latency history yet
+DEFAULT_TASK_COST = float(os.environ.get('REACTREE_DEFAULT_TASK_COST', 1.0))
+# Tasks run at once by the parallel modes
+MAX_PARALLEL_TASKS = int(os.environ.get('REACTREE_MAX_PARALLEL_TASKS', min(32, (os.cpu_count() or 1) + 4)))
+
+
+def needs_execution(task: dict) -> bool:
+    """
+    Tells whether a task still has to run: it is not the root and has no observation.
+
+    Args:
+        task (dict): The task.
+
+    Returns:
+        bool: True if the task should be executed.
+    """
+    return str(task.get('level_no')).strip() != "0" and not task.get('observation')
+
+
+def _priority(task: dict) -> float:
+    try:
+        return float(task.get('task_priority'))
+    except (TypeError, ValueError):
+        return float('inf')
+
+
+class TaskScheduler:
+    """
+    Orders ready tasks so that the work that unblocks the most remains first.
+
+    A task's critical path is its own estimated duration, the tool's median
+    latency so far, plus the longest critical path among its subtasks and the
+    tasks that reference its observation. Ready tasks run longest critical path
+    first, then by the planner's task_priority (lower first), then by number of
+    descendants, then in tree order.
+    """
+
+    def __init__(self, root: dict, latency: Any = tool_latency, default_cost: float = DEFAULT_TASK_COST):
+        """
+        Initialize the TaskScheduler class.
+
+        Args:
+            root (dict): The root task of the tree to schedule.
+            latency (Any): A LatencyTracker with per-tool history. Defaults to the shared tracker.
+            default_cost (float): Seconds assumed for tools without history. Defaults to
+                REACTREE_DEFAULT_TASK_COST or 1.0.
+        """
+        self.latency = latency
+        self.default_cost = default_cost
+        self._critical: Dict[int, float] = {}
+        self._descendants: Dict[int, int] = {}
+        self._order: Dict[int, int] = {}
+        # Observation references: tasks each task reads from, and tasks reading from it
+        self._requires: Dict[int, List[dict]] = {}
+        self._dependents: Dict[int, List[dict]] = {}
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self._estimate(root)
+
+    def cost(self, task: dict) -> float:
+        """
+        Estimated seconds to run a task; 0 for tasks that will not run.
+
+        Args:
+            task (dict): The task.
+
+        Returns:
+            float: The estimate.
+        """
+        if not needs_execution(task) or not task.get('action'):
+            return 0.0
+        median = self.latency.percentile(task['action'], 50)
+        return self.default_cost if median is None else median
+
+    def _estimate(self, root: dict):
+        tasks = []
+        stack = [root]
+        while stack:
+            task = stack.pop()
+            self._order[id(task)] = len(self._order)
+            tasks.append(task)
+            stack.extend(reversed(self._sub_tasks(task)))
+        index = index_tasks(root)
+        for task in tasks:
+            for task_no in referenced_tasks(task.get('action_input')):
+                if task_no in index and index[task_no] is not task:
+                    self._requires.setdefault(id(task), []).append(index[task_no])
+                    self._dependents.setdefault(id(index[task_no]), []).append(task)
+        # Reversed pre-order visits every subtask before its parent
+        for task in reversed(tasks):
+            self._descendants[id(task)] = sum(1 + self._descendants[id(sub_task)] for sub_task in self._sub_tasks(task))
+        for task in reversed(tasks):
+            self._longest_path(task)
+
+    @staticmethod
+    def _sub_tasks(task: dict) -> List[dict]:
+        return task['sub_tasks'] if isinstance(task.get('sub_tasks'), list) else []
+
+    def _longest_path(self, start: dict):
+        # Work that waits on a task is its subtasks and the tasks that reference its observation;
+        # iterative, and a reference cycle is cut where it closes
+        visiting = set()
+        stack = [(start, False)]
+        while stack:
+            task, expanded = stack.pop()
+            waiting = self._sub_tasks(task) + self._dependents.get(id(task), [])
+            if expanded:
+                visiting.discard(id(task))
+                self._critical[id(task)] = self.cost(task) + max(
+                    (self._critical.get(id(next_task), 0.0) for next_task in waiting), default=0.0)
+                continue
+            if id(task) in self._critical or id(task) in visiting:
+                continue
+            visiting.add(id(task))
+            stack.append((task, True))
+            stack.extend((next_task, False) for next_task in waiting
+                         if id(next_task) not in self._critical and id(next_task) not in visiting)
+
+    def critical_path(self, task: dict) -> float:
+        """
+        Estimated seconds from starting a task until all work waiting on it is done.
+
+        Args:
+            task (dict): A task of the scheduled tree.
+
+        Returns:
+            float: The estimate.
+        """
+        return self._critical.get(id(task), self.cost(task))
+
+    def key(self, task: dict) -> tuple:
+        """
+        The sort key of a task; smaller runs first.
+
+        Args:
+            task (dict): The task.
+
+        Returns:
+            tuple: The key.
+        """
+        return (-self.critical_path(task), _priority(task), -self._descendants.get(id(task), 0),
+                self._order.get(id(task), len(self._order)))
+
+    def order(self, tasks: Iterable[dict]) -> List[dict]:
+        """
+        Sort tasks into the order they should start; a task that references another
+        of the given tasks comes after it.
+
+        Args:
+            tasks (Iterable[dict]): The tasks.
+
+        Returns:
+            List[dict]: The sorted tasks.
+        """
+        remaining = sorted(tasks, key=self.key)
+        given = {id(task) for task in remaining}
+        placed = set()
+        ordered = []
+        while remaining:
+            # The highest ranked task whose referenced tasks are placed; on a cycle, the highest ranked
+            position = next((i for i, task in enumerate(remaining)
+                             if all(id(required) not in given or id(required) in placed
+                                    for required in self._requires.get(id(task), ()))), 0)
+            task = remaining.pop(position)
+            placed.add(id(task))
+            ordered.append(task)
+        return ordered
+
+    def push(self, task: dict):
+        """
+        Add a ready task.
+
+        Args:
+            task (dict): The task.
+        """
+        heapq.heappush(self._heap, (self.key(task), next(self._counter), task))
+
+    def pop(self) -> Optional[dict]:
+        """
+        Take the ready task that should start next.
+
+        Returns:
+            Optional[dict]: The task, or None when no task is ready.
+        """
+        return heapq.heappop(self._heap)[2] if self._heap else None
+
+    def __len__(self) -> int:
+        return len(self._heap)
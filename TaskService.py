@@ -0,0 +1,331 @@
+# task_service.py
+
+import asyncio
+import json
+import math
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from CircuitBreaker import tool_breakers
+from Speculation import speculation_stats
+from SingleFlight import tool_flights
+
+# Task trees executed at once; also the size of the worker thread pool
+DEFAULT_MAX_WORKERS = int(os.environ.get('REACTREE_SERVICE_WORKERS', 4))
+# Jobs waiting across all tenants before submissions are rejected with 429
+DEFAULT_MAX_QUEUE = int(os.environ.get('REACTREE_SERVICE_QUEUE', 100))
+# Jobs a single tenant may have running, and waiting
+DEFAULT_TENANT_CONCURRENCY = int(os.environ.get('REACTREE_TENANT_CONCURRENCY', 2))
+DEFAULT_TENANT_QUEUE = int(os.environ.get('REACTREE_TENANT_QUEUE', 20))
+# Seconds a finished job stays available for polling
+DEFAULT_JOB_TTL = float(os.environ.get('REACTREE_SERVICE_JOB_TTL', 600))
+
+EXECUTION_MODES = ("graph", "bfs", "dfs", "bfs_parallel", "dfs_parallel")
+
+
+class QueueFullError(Exception):
+    """
+    Raised when a job cannot be admitted; retry_after is the suggested wait in seconds.
+    """
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Job:
+    """
+    A submitted question or task tree, its progress events and its result.
+    """
+
+    def __init__(self, tenant: str, mode: str, question: Optional[str] = None, task_tree: Optional[str] = None,
+                 deadline: Optional[float] = None):
+        self.job_id = uuid.uuid4().hex
+        self.tenant = tenant
+        self.mode = mode
+        self.question = question
+        self.task_tree = task_tree
+        # Seconds from submission; time spent queued counts against it
+        self.deadline = deadline
+        self.status = "queued"
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.events: List[Dict[str, Any]] = []
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Replaced after every event; stream() waits on the instance it saw last
+        self._updated = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def publish(self, event: str, data: Any):
+        """
+        Append a progress event and wake the streams waiting on this job. Must run on the event loop.
+
+        Args:
+            event (str): The event name.
+            data (Any): JSON-serialisable event payload.
+        """
+        self.events.append({"event": event, "data": data})
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+    async def stream(self):
+        """
+        Yield every event of the job, from the first, until it finishes.
+        """
+        index = 0
+        while True:
+            updated = self._updated
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.done:
+                return
+            await updated.wait()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return the job's status and, once finished, its result or error.
+
+        Returns:
+            Dict[str, Any]: The JSON-serialisable job description.
+        """
+        return {"job_id": self.job_id, "tenant": self.tenant, "mode": self.mode, "status": self.status,
+                "question": self.question, "deadline": self.deadline, "result": self.result, "error": self.error,
+                "created_at": self.created_at, "started_at": self.started_at, "finished_at": self.finished_at}
+
+
+class TaskService:
+    """
+    Runs task trees for many tenants on a fixed pool of worker threads.
+
+    Admission is bounded by a global and a per-tenant queue; anything beyond is
+    rejected with QueueFullError instead of spawning more threads. Tenants are
+    served round-robin, each with at most tenant_concurrency jobs running, so a
+    burst from one tenant cannot starve the others.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, max_queue: int = DEFAULT_MAX_QUEUE,
+                 tenant_concurrency: int = DEFAULT_TENANT_CONCURRENCY, tenant_queue: int = DEFAULT_TENANT_QUEUE,
+                 job_ttl: float = DEFAULT_JOB_TTL):
+        """
+        Initialize the TaskService class.
+
+        Args:
+            max_workers (int): Jobs executed at once. Defaults to REACTREE_SERVICE_WORKERS or 4.
+            max_queue (int): Jobs waiting across all tenants. Defaults to REACTREE_SERVICE_QUEUE or 100.
+            tenant_concurrency (int): Jobs one tenant may have running. Defaults to
+                REACTREE_TENANT_CONCURRENCY or 2.
+            tenant_queue (int): Jobs one tenant may have waiting. Defaults to REACTREE_TENANT_QUEUE or 20.
+            job_ttl (float): Seconds a finished job can still be polled. Defaults to 600.
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.tenant_concurrency = tenant_concurrency
+        self.tenant_queue = tenant_queue
+        self.job_ttl = job_ttl
+
+        self.jobs: Dict[str, Job] = {}
+        self._queues: Dict[str, Deque[Job]] = {}
+        # Tenants with waiting jobs, in round-robin order
+        self._ring: Deque[str] = deque()
+        self._running: Dict[str, int] = {}
+        self._finished: Deque[Job] = deque()
+        self._queued = 0
+        # Moving average of job duration, used to estimate Retry-After
+        self._avg_duration = 5.0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._graph = None
+        self._engine = None
+        self.stats: Dict[str, int] = {"submitted": 0, "rejected": 0, "succeeded": 0, "failed": 0}
+
+    async def start(self):
+        """
+        Start the worker pool and the dispatcher on the running event loop.
+        """
+        if self._dispatcher is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="reactree-job")
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def stop(self):
+        """
+        Stop dispatching and wait for running jobs to finish.
+        """
+        if self._dispatcher is None:
+            return
+        self._dispatcher.cancel()
+        self._dispatcher = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def _retry_after(self, waiting: int, concurrency: int) -> int:
+        return max(1, math.ceil(self._avg_duration * (waiting + 1) / max(concurrency, 1)))
+
+    def submit(self, tenant: str, mode: str = "graph", question: Optional[str] = None,
+               task_tree: Optional[str] = None, deadline: Optional[float] = None) -> Job:
+        """
+        Queue a job, or reject it when the service or the tenant is saturated.
+
+        Args:
+            tenant (str): The tenant the job is accounted to.
+            mode (str): "graph" to plan and answer a question with AgenticSystemGraph, or an
+                ExecutionAlgorithm mode ("bfs", "dfs", "bfs_parallel", "dfs_parallel") to execute task_tree.
+            question (Optional[str]): The question, for "graph".
+            task_tree (Optional[str]): The task tree JSON, for the ExecutionAlgorithm modes.
+            deadline (Optional[float]): Seconds from submission by which tool execution must
+                finish. Defaults to REACTREE_RUN_DEADLINE.
+
+        Returns:
+            Job: The queued job.
+        """
+        if self._dispatcher is None:
+            raise RuntimeError("TaskService is not started.")
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown mode {mode}; expected one of {', '.join(EXECUTION_MODES)}.")
+        if mode == "graph" and not question:
+            raise ValueError("mode 'graph' requires a question.")
+        if mode != "graph" and not task_tree:
+            raise ValueError(f"mode '{mode}' requires a task_tree.")
+        if deadline is not None and deadline <= 0:
+            raise ValueError("deadline must be positive.")
+
+        self._expire()
+        tenant_waiting = len(self._queues.get(tenant, ()))
+        if self._queued >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise QueueFullError("Service queue is full.", self._retry_after(self._queued, self.max_workers))
+        if tenant_waiting >= self.tenant_queue:
+            self.stats["rejected"] += 1
+            raise QueueFullError(f"Queue for tenant {tenant} is full.",
+                                 self._retry_after(tenant_waiting, self.tenant_concurrency))
+
+        job = Job(tenant, mode, question=question, task_tree=task_tree, deadline=deadline)
+        self.jobs[job.job_id] = job
+        if tenant not in self._queues:
+            self._queues[tenant] = deque()
+            self._ring.append(tenant)
+        self._queues[tenant].append(job)
+        self._queued += 1
+        self.stats["submitted"] += 1
+        job.publish("queued", {"job_id": job.job_id})
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Return a job by id, or None if unknown or expired.
+
+        Args:
+            job_id (str): The job identifier.
+
+        Returns:
+            Optional[Job]: The job.
+        """
+        return self.jobs.get(job_id)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return queue depth, running jobs per tenant, counters, tool circuit states,
+        duplicate-call counts and speculative work.
+
+        Returns:
+            Dict[str, Any]: The service statistics.
+        """
+        return {"queued": self._queued, "running": sum(self._running.values()),
+                "running_by_tenant": {tenant: n for tenant, n in self._running.items() if n},
+                "queued_by_tenant": {tenant: len(queue) for tenant, queue in self._queues.items()},
+                "avg_duration_s": round(self._avg_duration, 3), **self.stats,
+                "tool_breakers": tool_breakers.snapshot(), "tool_dedup": tool_flights.snapshot(),
+                "speculation": speculation_stats.snapshot()}
+
+    def _expire(self):
+        cutoff = time.time() - self.job_ttl
+        while self._finished and self._finished[0].finished_at < cutoff:
+            self.jobs.pop(self._finished.popleft().job_id, None)
+
+    def _next_job(self) -> Optional[Job]:
+        for _ in range(len(self._ring)):
+            tenant = self._ring[0]
+            self._ring.rotate(-1)
+            if self._running.get(tenant, 0) >= self.tenant_concurrency:
+                continue
+            queue = self._queues[tenant]
+            job = queue.popleft()
+            if not queue:
+                # tenant was rotated to the end of the ring
+                self._ring.pop()
+                del self._queues[tenant]
+            self._queued -= 1
+            return job
+        return None
+
+    async def _dispatch(self):
+        while True:
+            await self._slots.acquire()
+            job = self._next_job()
+            while job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                job = self._next_job()
+            self._running[job.tenant] = self._running.get(job.tenant, 0) + 1
+            task = asyncio.create_task(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: Job):
+        loop = asyncio.get_running_loop()
+        job.status = "running"
+        job.started_at = time.time()
+        job.publish("running", {"job_id": job.job_id})
+        try:
+            job.result = await loop.run_in_executor(self._executor, self._execute, job, loop)
+            job.status = "succeeded"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        job.finished_at = time.time()
+        self.stats[job.status] += 1
+        self._avg_duration = 0.8 * self._avg_duration + 0.2 * (job.finished_at - job.started_at)
+        self._running[job.tenant] -= 1
+        self._finished.append(job)
+        job.publish(job.status, job.result if job.status == "succeeded" else {"error": job.error})
+        self._slots.release()
+        self._wakeup.set()
+
+    def _execute(self, job: Job, loop: asyncio.AbstractEventLoop) -> Dict[str, Any]:
+        # Runs on a worker thread; events are handed back to the loop
+        deadline = None if job.deadline is None else max(0.001, job.created_at + job.deadline - time.time())
+        if job.mode == "graph":
+            if self._graph is None:
+                from agentic_system_graph import AgenticSystemGraph
+                self._graph = AgenticSystemGraph()
+            final_state = None
+            for node, state in self._graph.stream(job.question, deadline):
+                loop.call_soon_threadsafe(job.publish, node, {"content": state['messages'][-1].content})
+                final_state = state
+            return {"final_answer": final_state.get('final_answer'),
+                    "task_tree": json.loads(final_state['execution_result'])
+                    if final_state.get('execution_result') else None}
+        if self._engine is None:
+            from Execution_Algorithm import ExecutionAlgorithm
+            from TaskTreePrompting import tool_registry
+            self._engine = ExecutionAlgorithm(list(tool_registry.tools().values()))
+        response = getattr(self._engine, f"process_task_{job.mode}")(job.task_tree, deadline=deadline)
+        return {"task_tree": json.loads(response)}
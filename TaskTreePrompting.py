@@ -1,17 +1,28 @@
 # task_tree_planner.py
 
 import json
-from typing import List, Dict, Any
+import os
+from typing import List, Dict, Any, Optional
 from typing_extensions import TypedDict
 from langchain.schema import BaseMessage, HumanMessage, AIMessage
 from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
-from langchain.agents import Tool
-from HelperMethods import clean_json
+from langchain_core.tools import BaseTool
+from HelperMethods import clean_json, get_chat_model
+from ToolRegistry import ToolRegistry, coerce_tool_input, render_tool_descriptions, render_tool_names
+from ToolRetriever import select_tools
+from PlanCache import PlanCache
+from Deadlines import DEFAULT_TOOL_TIMEOUT, Deadline
+from CircuitBreaker import call_tool_with_retry, tool_breakers
+from SingleFlight import call_key, find_duplicates, tool_flights
+from TaskReferences import index_tasks, resolve_references
 from BFS_Tree_Planner_Prompt import task_planner_prompt_template_json, final_answer_prompt_template_json
 
-# Initialize the language model
-llm = ChatOpenAI(model="gpt-4", temperature=0.1, max_tokens=4096)
+# The language model client is created on first use, not at import
+def get_llm():
+    """
+    Returns the shared model used by the planning and final answer nodes.
+    """
+    return get_chat_model(model="gpt-4", temperature=0.1, max_tokens=4096)
 
 # Create prompt templates
 task_planner_prompt = PromptTemplate.from_template(task_planner_prompt_template_json)
@@ -24,63 +35,57 @@ class State(TypedDict):
     task_tree_json: str
     execution_result: str
     final_answer: str
-    tools: Dict[str, Tool]
+    tools: Dict[str, BaseTool]
+    plan_from_cache: bool
+    # Epoch seconds by which tool execution must finish; 0 for no deadline
+    deadline_at: float
     # Additional variables as needed
 
-# Initialize tools (import your tools here)
-from UtilityTools import (
-    calculator,
-    web_search,
-    unit_converter,
-    translate_text,
-    summarize_text,
-    # Include other tools as needed
+# Reuses task trees for near-duplicate questions; set REACTREE_PLAN_CACHE=0 to disable
+plan_cache = PlanCache() if os.environ.get('REACTREE_PLAN_CACHE', '1') != '0' else None
+
+# Declare tools; UtilityTools is imported and the LangChain tools are generated
+# from each function's signature and docstring the first time they are needed
+tool_registry = ToolRegistry()
+tool_registry.register("calculator", "UtilityTools", "calculator")
+tool_registry.register("web_search", "UtilityTools", "web_search", coroutine="aweb_search", hedge=True)
+tool_registry.register("unit_converter", "UtilityTools", "unit_converter")
+tool_registry.register("translate_text", "UtilityTools", "translate_text")
+tool_registry.register("summarize_text", "UtilityTools", "summarize_text", args=("text",), execution="cpu")
+tool_registry.register(
+    "sentiment_analysis_batch", "UtilityTools", "sentiment_analysis_batch", args=("texts",), execution="cpu",
+    batch="texts",
+    description="Analyses the sentiment of several texts at once. Input is a JSON array of texts; "
+                "returns polarity and subjectivity lists in the same order."
 )
-
-# Wrap utility functions into LangChain tools
-langchain_tools = [
-    Tool(
-        name="calculator",
-        func=calculator,
-        description="Performs mathematical calculations."
-    ),
-    Tool(
-        name="web_search",
-        func=web_search,
-        description="Performs a web search and returns summarized results."
-    ),
-    Tool(
-        name="unit_converter",
-        func=unit_converter,
-        description="Converts units from one type to another."
-    ),
-    Tool(
-        name="translate_text",
-        func=translate_text,
-        description="Translates text to the specified language."
-    ),
-    Tool(
-        name="summarize_text",
-        func=summarize_text,
-        description="Summarizes the given text."
-    ),
-    # Add more tools as needed
-]
-
-# Create a dictionary of tools for easy access
-tools_dict = {tool.name: tool for tool in langchain_tools}
+# Register more tools as needed
+
+def __getattr__(name):
+    # llm, langchain_tools and tools_dict are built lazily on first access
+    if name == "llm":
+        return get_llm()
+    if name == "tools_dict":
+        return tool_registry.tools()
+    if name == "langchain_tools":
+        return list(tool_registry.tools().values())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Helper functions
 def tool_name_and_description(tools):
-    return "\n".join([f"{tool.name}: {tool.description}" for tool in tools.values()])
+    return render_tool_descriptions(tools.values())
 
 def tool_name(tools):
-    return ", ".join([tool.name for tool in tools.values()])
+    return render_tool_names(tools.values())
 
-def execute_task_tree(task_tree: dict, tools: Dict[str, Tool]) -> dict:
+def execute_task_tree(task_tree: dict, tools: Dict[str, BaseTool], deadline: Optional[Deadline] = None) -> dict:
     """
-    Executes the task tree using the provided tools.
+    Executes the task tree using the provided tools, each call bounded by the task's
+    or tool's timeout and by the deadline. A call repeated in the tree reuses the
+    first one's result, and identical calls from concurrent trees share one execution.
     """
+    results: Dict[tuple, Any] = {}
+    index = index_tasks(task_tree['task_tree']['task'])
+
     def execute_task(task: dict):
         # If the task is a leaf node
         if task.get('is_leaf', '').lower() == 'yes':
@@ -90,7 +95,19 @@ def execute_task_tree(task_tree: dict, tools: Dict[str, Tool]) -> dict:
             if tool:
                 try:
                     print(f"Executing tool {action} with input: {action_input}")
-                    result = tool.run(action_input)
+                    timeout = float(task.get('timeout') or (tool.metadata or {}).get('timeout') or DEFAULT_TOOL_TIMEOUT)
+                    # {{task_N.observation}} references are filled in from earlier tasks
+                    tool_input = coerce_tool_input(tool, resolve_references(action_input, index, observation_usable))
+                    key = call_key(action, tool_input)
+                    if key in results:
+                        tool_flights.count("reused_in_tree")
+                        result = results[key]
+                    elif (tool.metadata or {}).get("coalesce", True):
+                        result = tool_flights.do(key, lambda: call_tool_with_retry(tool, tool_input, timeout, deadline),
+                                                 deadline.remaining() if deadline is not None else None)
+                    else:
+                        result = call_tool_with_retry(tool, tool_input, timeout, deadline)
+                    results[key] = result
                     task['observation'] = result
                     print(f"Result: {result}")
                 except Exception as e:
@@ -103,9 +120,28 @@ def execute_task_tree(task_tree: dict, tools: Dict[str, Tool]) -> dict:
         for sub_task in task.get('sub_tasks', []):
             execute_task(sub_task)
 
+    duplicates = find_duplicates(task_tree['task_tree']['task'])
+    if duplicates:
+        tool_flights.count("plan_duplicates", len(duplicates))
     execute_task(task_tree['task_tree']['task'])
     return task_tree
 
+def observation_usable(observation: Any) -> bool:
+    """
+    Checks that an observation is a result, not an error written by execute_task_tree.
+    """
+    observation = str(observation)
+    return not (observation.startswith("Error executing") or
+                (observation.startswith("Tool ") and observation.endswith(" not found.")))
+
+def tree_succeeded(task: dict) -> bool:
+    """
+    Checks that no task in the tree recorded a tool error.
+    """
+    if not observation_usable(task.get('observation', '')):
+        return False
+    return all(tree_succeeded(sub_task) for sub_task in task.get('sub_tasks', []))
+
 def extract_thoughts_and_observations(execution_result: str) -> str:
     """
     Extracts thoughts and observations from the execution result.
@@ -130,14 +166,25 @@ def task_planning_node(state: State) -> State:
     """
     Task Planning Node: Generates the task tree based on the user's input.
     """
+    # A paraphrase of an earlier question reuses its plan without calling the model
+    # Tools whose circuit is open are hidden from the planner until they recover
+    available_tools = tool_breakers.available(state['tools'])
+    cached_tree = plan_cache.lookup(state['user_input'], available_tools.keys()) if plan_cache is not None else None
+    if cached_tree is not None:
+        state['task_tree_json'] = cached_tree
+        state['plan_from_cache'] = True
+        state['messages'].append(AIMessage(content=cached_tree))
+        return state
+    # Only the tools relevant to the question go into the prompt
+    tools = tool_breakers.available(select_tools(state['user_input'], state['tools']))
     # Format the prompt
     prompt = task_planner_prompt.format(
         input_question=state['user_input'],
-        tools=tool_name_and_description(state['tools']),
-        tools_available=tool_name(state['tools'])
+        tools=tool_name_and_description(tools),
+        tools_available=tool_name(tools)
     )
     # Invoke the model
-    response = llm(prompt)
+    response = get_llm().invoke(prompt)
     # Clean the response
     task_tree_json = clean_json(response.content)
     # Update the state
@@ -153,9 +200,12 @@ def task_execution_node(state: State) -> State:
     # Parse the task tree
     task_tree = json.loads(state['task_tree_json'])
     # Execute the tasks
-    execution_result = execute_task_tree(task_tree, state['tools'])
+    execution_result = execute_task_tree(task_tree, state['tools'], Deadline.at(state.get('deadline_at')))
     # Update the state
     state['execution_result'] = json.dumps(execution_result)
+    # Plans whose tools all ran are cached for similar future questions
+    if plan_cache is not None and not state.get('plan_from_cache') and tree_succeeded(execution_result['task_tree']['task']):
+        plan_cache.store(state['user_input'], state['task_tree_json'])
     # Append to messages
     state['messages'].append(AIMessage(content=state['execution_result']))
     return state
@@ -173,7 +223,7 @@ def final_answer_node(state: State) -> State:
         thought_process=thought_process
     )
     # Invoke the model
-    response = llm(prompt)
+    response = get_llm().invoke(prompt)
     # Update the state
     state['final_answer'] = response.content.strip()
     # Append to messages
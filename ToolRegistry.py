@@ -0,0 +1,410 @@
+# tool_registry.py
+
+import importlib
+import inspect
+import json
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+_ARG_LINE = re.compile(r'^\s*(\w+)\s*(?:\(([^)]*)\))?\s*:\s*(.+)$')
+
+# "io" tools run on the engine's threads; "cpu" tools are sent to the process lane
+EXECUTION_CLASSES = ("io", "cpu")
+
+
+def parse_docstring(func: Callable) -> Tuple[str, Dict[str, str]]:
+    """
+    Splits a Google-style docstring into its summary and per-argument descriptions.
+
+    Args:
+        func (Callable): The documented function.
+
+    Returns:
+        Tuple[str, Dict[str, str]]: The summary paragraph and a mapping of argument name to description.
+    """
+    doc = inspect.getdoc(func) or ""
+    summary = " ".join(doc.split("\n\n", 1)[0].split())
+    arg_docs: Dict[str, str] = {}
+    in_args = False
+    for line in doc.splitlines():
+        stripped = line.strip()
+        if stripped in ("Args:", "Arguments:"):
+            in_args = True
+            continue
+        if in_args:
+            if stripped.endswith(":") and not line.startswith(" "):
+                break
+            match = _ARG_LINE.match(line)
+            if match and line.startswith("    ") and not line.startswith("        "):
+                arg_docs[match.group(1)] = match.group(3).strip()
+            elif stripped and arg_docs:
+                last = next(reversed(arg_docs))
+                arg_docs[last] += " " + stripped
+    return summary, arg_docs
+
+
+def build_structured_tool(name: str, func: Callable, coroutine: Optional[Callable] = None,
+                          description: Optional[str] = None, args: Optional[Sequence[str]] = None,
+                          execution: str = "io", timeout: Optional[float] = None, hedge: bool = False,
+                          retries: Optional[int] = None, coalesce: bool = True, speculate: bool = True,
+                          batch: Optional[str] = None):
+    """
+    Generates a LangChain StructuredTool from a function's signature and docstring.
+
+    Args:
+        name (str): The tool name.
+        func (Callable): The function the tool runs.
+        coroutine (Optional[Callable]): An async variant used by arun.
+        description (Optional[str]): Overrides the docstring summary.
+        args (Optional[Sequence[str]]): Parameters exposed to the model. Defaults to all;
+            hidden parameters keep their defaults.
+        execution (str): "io" or "cpu", recorded in the tool's metadata. Defaults to "io".
+        timeout (Optional[float]): Seconds a call may take, recorded in the tool's metadata.
+            Defaults to None (the engine's default).
+        hedge (bool): Whether slow calls may be retried in parallel, recorded in the tool's
+            metadata. Defaults to False.
+        retries (Optional[int]): Retries after transient errors, recorded in the tool's metadata.
+            Defaults to None (the engine's default).
+        coalesce (bool): Whether identical concurrent calls may share one execution, recorded in
+            the tool's metadata. Defaults to True.
+        speculate (bool): Whether calls may run speculatively while the replanner runs, recorded
+            in the tool's metadata. Defaults to True.
+        batch (Optional[str]): The list argument of a cpu batch tool, which the process lane
+            splits across its workers, recorded in the tool's metadata. Defaults to None.
+
+    Returns:
+        StructuredTool: The generated tool.
+
+    Raises:
+        ValueError: If batch does not name an exposed parameter.
+    """
+    from pydantic import create_model, Field
+    from langchain_core.tools import StructuredTool
+
+    summary, arg_docs = parse_docstring(func)
+    fields = {}
+    for parameter in inspect.signature(func).parameters.values():
+        if args is not None and parameter.name not in args:
+            continue
+        annotation = parameter.annotation if parameter.annotation is not inspect.Parameter.empty else Any
+        default = parameter.default if parameter.default is not inspect.Parameter.empty else ...
+        fields[parameter.name] = (annotation, Field(default, description=arg_docs.get(parameter.name, "")))
+    if batch is not None and batch not in fields:
+        raise ValueError(f"Batch argument {batch} is not a parameter of {name}.")
+    args_schema = create_model(f"{name}_input", **fields)
+    return StructuredTool.from_function(func=func, coroutine=coroutine, name=name,
+                                        description=description or summary, args_schema=args_schema,
+                                        metadata={"execution": execution, "timeout": timeout, "hedge": hedge,
+                                                  "retries": retries, "coalesce": coalesce,
+                                                  "speculate": speculate, "batch": batch})
+
+
+def coerce_tool_input(tool: Any, action_input: Any) -> Any:
+    """
+    Adapts a planner's action_input to what a tool accepts.
+
+    Multi-argument tools receive a dict: either action_input itself, or a JSON object
+    decoded from it. Everything else is passed through unchanged.
+
+    Args:
+        tool (Any): The LangChain tool to be run.
+        action_input (Any): The action_input from the task tree.
+
+    Returns:
+        Any: The input to pass to tool.run.
+    """
+    if isinstance(action_input, str) and len(getattr(tool, 'args', None) or {}) > 1:
+        stripped = action_input.strip()
+        if stripped.startswith("{"):
+            try:
+                parsed = json.loads(stripped)
+                if isinstance(parsed, dict):
+                    return parsed
+            except json.JSONDecodeError:
+                pass
+    return action_input
+
+
+def tool_execution_class(tool: Any) -> str:
+    """
+    Returns the execution class a tool declared.
+
+    Args:
+        tool (Any): The LangChain tool.
+
+    Returns:
+        str: "cpu" or "io"; tools without a declaration are "io".
+    """
+    return (getattr(tool, 'metadata', None) or {}).get("execution", "io")
+
+
+def process_target(tool: Any) -> Optional[Tuple[str, str]]:
+    """
+    Finds the module-level function behind a tool, so a worker process can import
+    it by name instead of receiving the pickled tool.
+
+    Args:
+        tool (Any): The LangChain tool.
+
+    Returns:
+        Optional[Tuple[str, str]]: (module, function name), or None for lambdas,
+            closures, methods and tools without a plain function.
+    """
+    func = getattr(tool, 'func', None)
+    module, qualname = getattr(func, '__module__', None), getattr(func, '__qualname__', '')
+    if not module or not qualname or '.' in qualname or '<' in qualname or module == '__main__':
+        return None
+    return module, qualname
+
+
+def tool_arguments(tool: Any, tool_input: Any) -> Dict[str, Any]:
+    """
+    Turns a tool input into validated keyword arguments for the tool's function.
+
+    Args:
+        tool (Any): The LangChain tool.
+        tool_input (Any): A dict of arguments, or a single value for the first argument.
+
+    Returns:
+        Dict[str, Any]: The keyword arguments, coerced by the tool's args_schema.
+    """
+    kwargs = dict(tool_input) if isinstance(tool_input, dict) else {next(iter(tool.args)): tool_input}
+    schema = getattr(tool, 'args_schema', None)
+    if schema is None or not hasattr(schema, 'model_validate'):
+        return kwargs
+    validated = schema.model_validate(kwargs)
+    return {name: getattr(validated, name) for name in kwargs if hasattr(validated, name)}
+
+
+def render_tool_description(tool: Any) -> str:
+    """
+    Renders one tool for a prompt, listing its arguments when it takes more than one.
+
+    Args:
+        tool (Any): The LangChain tool.
+
+    Returns:
+        str: A "name: description" line.
+    """
+    tool_args = getattr(tool, 'args', None) or {}
+    if len(tool_args) > 1:
+        arg_list = ", ".join(f'"{arg}"' for arg in tool_args)
+        return f"{tool.name}: {tool.description} action_input must be a JSON object with keys {arg_list}."
+    return f"{tool.name}: {tool.description}"
+
+
+_render_cache: Dict[Tuple, Tuple[str, str, List[Any]]] = {}
+_render_cache_lock = threading.Lock()
+_RENDER_CACHE_SIZE = 128
+
+
+def _rendered(tools: Iterable[Any]) -> Tuple[str, str]:
+    tools = list(tools)
+    # Tools are keyed by identity; the cached entry holds them so ids are never reused
+    key = tuple((tool.name, id(tool)) for tool in tools)
+    cached = _render_cache.get(key)
+    if cached is None:
+        descriptions = "\n".join(render_tool_description(tool) for tool in tools)
+        names = ", ".join(tool.name for tool in tools)
+        cached = (descriptions, names, tools)
+        with _render_cache_lock:
+            if len(_render_cache) >= _RENDER_CACHE_SIZE:
+                _render_cache.pop(next(iter(_render_cache)))
+            _render_cache[key] = cached
+    return cached[0], cached[1]
+
+
+def render_tool_descriptions(tools: Iterable[Any]) -> str:
+    """
+    Renders a set of tools as "name: description" lines, cached per tool set.
+
+    Args:
+        tools (Iterable[Any]): The LangChain tools.
+
+    Returns:
+        str: One line per tool.
+    """
+    return _rendered(tools)[0]
+
+
+def render_tool_names(tools: Iterable[Any]) -> str:
+    """
+    Renders a comma-separated list of tool names, cached per tool set.
+
+    Args:
+        tools (Iterable[Any]): The LangChain tools.
+
+    Returns:
+        str: The tool names.
+    """
+    return _rendered(tools)[1]
+
+
+class ToolRegistry:
+    """
+    Holds tool declarations by module path and builds the LangChain tools on first use,
+    so importing the planner does not import every tool's dependencies.
+    """
+
+    def __init__(self):
+        self._specs: Dict[str, Dict[str, Any]] = {}
+        self._tools: Dict[str, Any] = {}
+        self._tools_view: Optional[Dict[str, Any]] = None
+        self._lock = threading.RLock()
+        self.version = 0
+
+    def register(self, name: str, module: str, function: str, coroutine: Optional[str] = None,
+                 description: Optional[str] = None, args: Optional[Sequence[str]] = None,
+                 execution: str = "io", timeout: Optional[float] = None, hedge: bool = False,
+                 retries: Optional[int] = None, coalesce: bool = True, speculate: bool = True,
+                 batch: Optional[str] = None):
+        """
+        Declare a tool backed by a module-level function.
+
+        Args:
+            name (str): The tool name shown to the planner.
+            module (str): The module that defines the function, imported on first use.
+            function (str): The function name.
+            coroutine (Optional[str]): Name of an async variant in the same module.
+            description (Optional[str]): Overrides the docstring summary.
+            args (Optional[Sequence[str]]): Parameters exposed to the model. Defaults to all.
+            execution (str): "io" for tools that wait on the network or disk, "cpu" for tools
+                that compute in Python and should run in the process lane. Defaults to "io".
+            timeout (Optional[float]): Seconds a call may take. Defaults to the engine's default.
+            hedge (bool): Fire a second attempt when a call is slower than usual. Only for
+                idempotent, read-only tools. Defaults to False.
+            retries (Optional[int]): Retries after transient errors; 0 for tools with side effects.
+                Defaults to REACTREE_TOOL_RETRIES.
+            coalesce (bool): Let identical concurrent calls share one execution; False for tools
+                whose every call must run. Defaults to True.
+            speculate (bool): Let calls run ahead of a pending replan, whose result may be
+                discarded; False for tools with side effects. Defaults to True.
+            batch (Optional[str]): For cpu tools taking a list of items, the argument holding it;
+                the process lane splits the list across its workers and joins the results,
+                which must be lists or dicts of lists. Defaults to None.
+        """
+        if execution not in EXECUTION_CLASSES:
+            raise ValueError(f"Unknown execution class {execution}; expected one of {', '.join(EXECUTION_CLASSES)}.")
+        with self._lock:
+            self._specs[name] = {'module': module, 'function': function, 'coroutine': coroutine,
+                                 'description': description, 'args': args, 'execution': execution,
+                                 'timeout': timeout, 'hedge': hedge, 'retries': retries, 'coalesce': coalesce,
+                                 'speculate': speculate, 'batch': batch}
+            self._tools.pop(name, None)
+            self._bump()
+
+    def register_tool(self, tool: Any, execution: Optional[str] = None, timeout: Optional[float] = None,
+                      hedge: Optional[bool] = None, retries: Optional[int] = None,
+                      coalesce: Optional[bool] = None, speculate: Optional[bool] = None,
+                      batch: Optional[str] = None):
+        """
+        Add an already constructed LangChain tool.
+
+        Args:
+            tool (Any): The tool.
+            execution (Optional[str]): "io" or "cpu"; stored in the tool's metadata. Defaults to
+                what the tool already declares.
+            timeout (Optional[float]): Seconds a call may take; stored in the tool's metadata.
+            hedge (Optional[bool]): Whether slow calls may be hedged; stored in the tool's metadata.
+            retries (Optional[int]): Retries after transient errors; stored in the tool's metadata.
+            coalesce (Optional[bool]): Whether identical concurrent calls share one execution;
+                stored in the tool's metadata.
+            speculate (Optional[bool]): Whether calls may run ahead of a pending replan; stored
+                in the tool's metadata.
+            batch (Optional[str]): The list argument the process lane splits across its workers;
+                stored in the tool's metadata.
+        """
+        if execution is not None and execution not in EXECUTION_CLASSES:
+            raise ValueError(f"Unknown execution class {execution}; expected one of {', '.join(EXECUTION_CLASSES)}.")
+        declared = {key: value for key, value in (("execution", execution), ("timeout", timeout),
+                                                  ("hedge", hedge), ("retries", retries), ("coalesce", coalesce),
+                                                  ("speculate", speculate), ("batch", batch))
+                    if value is not None}
+        if declared:
+            tool.metadata = {**(tool.metadata or {}), **declared}
+        with self._lock:
+            self._specs[tool.name] = {'tool': tool}
+            self._tools[tool.name] = tool
+            self._bump()
+
+    def unregister(self, name: str):
+        """
+        Remove a tool.
+
+        Args:
+            name (str): The tool name.
+        """
+        with self._lock:
+            self._specs.pop(name, None)
+            self._tools.pop(name, None)
+            self._bump()
+
+    def _bump(self):
+        self.version += 1
+        self._tools_view = None
+
+    def names(self) -> List[str]:
+        """
+        Return the registered tool names without building any tool.
+
+        Returns:
+            List[str]: The tool names, in registration order.
+        """
+        return list(self._specs)
+
+    def get(self, name: str) -> Any:
+        """
+        Return a tool, importing its module and building it on first use.
+
+        Args:
+            name (str): The tool name.
+
+        Returns:
+            Any: The LangChain tool.
+        """
+        tool = self._tools.get(name)
+        if tool is not None:
+            return tool
+        with self._lock:
+            if name in self._tools:
+                return self._tools[name]
+            spec = self._specs.get(name)
+            if spec is None:
+                raise ValueError(f"Tool {name} not found.")
+            module = importlib.import_module(spec['module'])
+            coroutine = getattr(module, spec['coroutine']) if spec['coroutine'] else None
+            tool = build_structured_tool(name, getattr(module, spec['function']), coroutine=coroutine,
+                                         description=spec['description'], args=spec['args'],
+                                         execution=spec['execution'], timeout=spec['timeout'],
+                                         hedge=spec['hedge'], retries=spec['retries'],
+                                         coalesce=spec['coalesce'], speculate=spec['speculate'],
+                                         batch=spec['batch'])
+            self._tools[name] = tool
+            return tool
+
+    def tools(self) -> Dict[str, Any]:
+        """
+        Return every registered tool keyed by name.
+
+        The same dict is returned until the registry changes, so rendered
+        descriptions stay cached across requests.
+
+        Returns:
+            Dict[str, Any]: The tools.
+        """
+        view = self._tools_view
+        if view is None:
+            with self._lock:
+                view = {name: self.get(name) for name in self._specs}
+                self._tools_view = view
+        return view
+
+    def describe(self) -> str:
+        """
+        Return the cached "name: description" rendering of every tool.
+
+        Returns:
+            str: One line per tool.
+        """
+        return render_tool_descriptions(self.tools().values())
@@ -0,0 +1,232 @@
+# tool_retriever.py
+
+import os
+import re
+import threading
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Number of tools injected into planner and replanner prompts
+DEFAULT_TOOL_TOP_K = int(os.environ.get('REACTREE_TOOL_TOP_K', 8))
+# Below this cosine similarity the best match is noise, and every tool is offered instead
+MIN_TOOL_SCORE = float(os.environ.get('REACTREE_TOOL_MIN_SCORE', 0.05))
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in into is it its of on or that the this to was were will with "
+    "you your given returns return".split()
+)
+
+
+class HashingEmbeddings:
+    """
+    A local, dependency-free embedding backend using the hashing trick over words and
+    word bigrams. It needs no model download or network access, and implements the
+    LangChain Embeddings interface (embed_documents / embed_query).
+    """
+
+    def __init__(self, dimensions: int = 512):
+        """
+        Initialize the HashingEmbeddings class.
+
+        Args:
+            dimensions (int): Size of the embedding vectors. Defaults to 512.
+        """
+        self.dimensions = dimensions
+
+    def _features(self, text: str) -> List[str]:
+        words = [word for word in _TOKEN.findall(text.lower().replace("_", " ")) if word not in _STOP_WORDS]
+        # Crude stemming so "converts"/"conversion"/"convert" land close together
+        stems = [word[:6] for word in words]
+        return stems + [f"{a} {b}" for a, b in zip(stems, stems[1:])]
+
+    def _embed(self, text: str):
+        import numpy as np
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature in self._features(text):
+            # crc32 is stable across processes, unlike hash()
+            digest = zlib.crc32(feature.encode("utf-8"))
+            vector[digest % self.dimensions] += 1.0 if digest & 0x80000000 else -1.0
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a list of documents.
+
+        Args:
+            texts (List[str]): The texts to embed.
+
+        Returns:
+            List[List[float]]: One vector per text.
+        """
+        return [self._embed(text).tolist() for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query.
+
+        Args:
+            text (str): The query text.
+
+        Returns:
+            List[float]: The query vector.
+        """
+        return self._embed(text).tolist()
+
+
+def tool_document(tool: Any) -> str:
+    """
+    Builds the text embedded for a tool: its name, description and argument names.
+
+    Args:
+        tool (Any): The LangChain tool.
+
+    Returns:
+        str: The text to embed.
+    """
+    tool_args = getattr(tool, 'args', None) or {}
+    return f"{tool.name.replace('_', ' ')}: {tool.description} {' '.join(tool_args)}"
+
+
+class ToolRetriever:
+    """
+    Embeds tool descriptions once into a FAISS inner-product index and returns the
+    tools most relevant to a question, so prompts stay small as the toolset grows.
+    """
+
+    def __init__(self, tools: Iterable[Any], embeddings: Optional[Any] = None, top_k: int = DEFAULT_TOOL_TOP_K,
+                 min_score: float = MIN_TOOL_SCORE):
+        """
+        Initialize the ToolRetriever class.
+
+        Args:
+            tools (Iterable[Any]): The LangChain tools to index.
+            embeddings (Optional[Any]): A LangChain Embeddings object. Defaults to HashingEmbeddings.
+            top_k (int): Tools returned per query. Defaults to REACTREE_TOOL_TOP_K or 8.
+            min_score (float): Similarity the best match must reach for select() to narrow the
+                toolset. Defaults to REACTREE_TOOL_MIN_SCORE or 0.05.
+        """
+        import numpy as np
+        self.tools = list(tools)
+        self.embeddings = embeddings or HashingEmbeddings()
+        self.top_k = top_k
+        self.min_score = min_score
+
+        vectors = np.asarray(self.embeddings.embed_documents([tool_document(tool) for tool in self.tools]),
+                             dtype=np.float32).reshape(len(self.tools), -1)
+        self._vectors = self._normalize(vectors)
+        try:
+            import faiss
+            self._index = faiss.IndexFlatIP(self._vectors.shape[1])
+            self._index.add(self._vectors)
+        except ImportError:
+            # Brute-force inner product is equivalent, just without FAISS's SIMD kernels
+            self._index = None
+
+    @staticmethod
+    def _normalize(vectors):
+        import numpy as np
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return np.ascontiguousarray(vectors / np.where(norms == 0, 1.0, norms), dtype=np.float32)
+
+    def _ranked(self, question: str, k: int) -> List[Tuple[int, float]]:
+        import numpy as np
+        k = min(k, len(self.tools))
+        if k <= 0:
+            return []
+        query = self._normalize(np.asarray([self.embeddings.embed_query(question)], dtype=np.float32))
+        if self._index is not None:
+            scores, indices = self._index.search(query, k)
+            return [(int(i), float(score)) for i, score in zip(indices[0], scores[0]) if i >= 0]
+        scores = self._vectors @ query[0]
+        return [(i, float(scores[i])) for i in np.argsort(-scores)[:k].tolist()]
+
+    def search(self, question: str, k: Optional[int] = None) -> List[Any]:
+        """
+        Return the k tools most similar to the question, best first.
+
+        Args:
+            question (str): The user question or task description.
+            k (Optional[int]): Number of tools. Defaults to top_k.
+
+        Returns:
+            List[Any]: The selected tools.
+        """
+        return [self.tools[i] for i, _ in self._ranked(question, k or self.top_k)]
+
+    def select(self, question: str, k: Optional[int] = None, always_include: Sequence[str] = ()) -> Dict[str, Any]:
+        """
+        Return the relevant tools keyed by name, preserving registration order.
+
+        When the toolset is no larger than k, every tool is returned without a search.
+        So is it when even the best match scores below min_score (an empty or unrelated
+        question), so the planner is never left with an arbitrary or empty toolset.
+
+        Args:
+            question (str): The user question or task description.
+            k (Optional[int]): Number of tools. Defaults to top_k.
+            always_include (Sequence[str]): Tool names to keep regardless of score,
+                e.g. tools already used in a tree being replanned.
+
+        Returns:
+            Dict[str, Any]: The selected tools.
+        """
+        k = k or self.top_k
+        ranked = self._ranked(question, k) if len(self.tools) > k else []
+        if not ranked or ranked[0][1] < self.min_score:
+            return {tool.name: tool for tool in self.tools}
+        chosen = {self.tools[i].name for i, _ in ranked} | set(always_include)
+        return {tool.name: tool for tool in self.tools if tool.name in chosen}
+
+
+_retrievers: Dict[tuple, ToolRetriever] = {}
+_retrievers_lock = threading.Lock()
+_RETRIEVER_CACHE_SIZE = 32
+
+
+def get_tool_retriever(tools: Iterable[Any], embeddings: Optional[Any] = None) -> ToolRetriever:
+    """
+    Returns a ToolRetriever for a tool set, building its index only the first time.
+
+    Args:
+        tools (Iterable[Any]): The LangChain tools.
+        embeddings (Optional[Any]): A LangChain Embeddings object. Defaults to HashingEmbeddings.
+
+    Returns:
+        ToolRetriever: The cached retriever.
+    """
+    tools = list(tools)
+    # Keyed by identity; each retriever holds its tools, so cached ids are never reused
+    key = tuple((tool.name, id(tool)) for tool in tools) + (id(embeddings),)
+    retriever = _retrievers.get(key)
+    if retriever is None:
+        with _retrievers_lock:
+            retriever = _retrievers.get(key)
+            if retriever is None:
+                retriever = ToolRetriever(tools, embeddings=embeddings)
+                if len(_retrievers) >= _RETRIEVER_CACHE_SIZE:
+                    _retrievers.pop(next(iter(_retrievers)))
+                _retrievers[key] = retriever
+    return retriever
+
+
+def select_tools(question: str, tools: Dict[str, Any], k: Optional[int] = None,
+                 always_include: Sequence[str] = ()) -> Dict[str, Any]:
+    """
+    Narrows a tool dict to the tools relevant to a question.
+
+    Args:
+        question (str): The user question or task description.
+        tools (Dict[str, Any]): All available tools keyed by name.
+        k (Optional[int]): Number of tools. Defaults to REACTREE_TOOL_TOP_K or 8.
+        always_include (Sequence[str]): Tool names to keep regardless of score.
+
+    Returns:
+        Dict[str, Any]: The selected tools keyed by name.
+    """
+    k = k or DEFAULT_TOOL_TOP_K
+    if len(tools) <= k:
+        return tools
+    return get_tool_retriever(tools.values()).select(question, k, always_include)
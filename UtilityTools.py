@@ -1,9 +1,72 @@
 import math
-import requests
+import os
+import re
 import json
-from typing import List, Dict, Any, Tuple
+from typing import TYPE_CHECKING, List, Dict, Any, Tuple, Optional, Callable, Union
 from datetime import datetime
+from functools import lru_cache
+import threading
+import time
 import uuid
+from HttpClient import http_get_json, ahttp_get_json
+from ProcessLane import in_worker, map_in_process
+
+if TYPE_CHECKING:
+    # Only for annotations; the async methods import it when they run
+    import asyncio
+
+# Names an expression may reference; built once instead of on every call.
+_SAFE_MATH_NAMES = {k: v for k, v in math.__dict__.items() if not k.startswith("__")}
+_SAFE_MATH_GLOBALS = {"__builtins__": {}, **_SAFE_MATH_NAMES}
+
+# math functions whose NumPy ufunc has a different name
+_NUMPY_ALIASES = {
+    'asin': 'arcsin', 'acos': 'arccos', 'atan': 'arctan', 'atan2': 'arctan2',
+    'asinh': 'arcsinh', 'acosh': 'arccosh', 'atanh': 'arctanh', 'pow': 'power', 'fabs': 'abs',
+}
+# math functions that only accept integers; expressions using them are evaluated per element in exact arithmetic
+_INTEGER_FUNCTIONS = frozenset({'factorial', 'gcd', 'lcm', 'comb', 'perm', 'isqrt'})
+_numpy_math_names = None
+
+@lru_cache(maxsize=512)
+def _compile_expression(expression: str, variables: frozenset = frozenset()):
+    """
+    Compiles an expression and checks that it only references math names or the given variables.
+
+    Args:
+        expression (str): The mathematical expression.
+        variables (frozenset): Extra names the expression may reference.
+
+    Returns:
+        The validated code object.
+    """
+    code = compile(expression, "<string>", "eval")
+    for name in code.co_names:
+        if name not in _SAFE_MATH_NAMES and name not in variables:
+            raise NameError(f"The use of '{name}' is not allowed.")
+    return code
+
+def _get_numpy_math_names() -> Dict[str, Any]:
+    """
+    Maps every allowed math name to an array-aware equivalent, built on first use.
+
+    Returns:
+        Dict[str, Any]: The NumPy-backed namespace.
+    """
+    global _numpy_math_names
+    if _numpy_math_names is None:
+        import numpy as np
+        names = {}
+        for name, value in _SAFE_MATH_NAMES.items():
+            np_name = _NUMPY_ALIASES.get(name, name)
+            if not callable(value):
+                names[name] = value
+            elif hasattr(np, np_name):
+                names[name] = getattr(np, np_name)
+            else:
+                names[name] = np.vectorize(value)
+        _numpy_math_names = names
+    return _numpy_math_names
 
 def calculator(expression: str) -> float:
     """
@@ -16,21 +79,77 @@ def calculator(expression: str) -> float:
         float: The result of the calculation.
     """
     try:
-        # Define allowed names
-        allowed_names = {
-            k: v for k, v in math.__dict__.items() if not k.startswith("__")
-        }
-        # Compile the expression
-        code = compile(expression, "<string>", "eval")
-        # Check for disallowed names
-        for name in code.co_names:
-            if name not in allowed_names:
-                raise NameError(f"The use of '{name}' is not allowed.")
-        result = eval(code, {"__builtins__": {}}, allowed_names)
+        code = _compile_expression(expression)
+        # A fresh locals dict keeps assignment expressions out of the shared namespace
+        result = eval(code, _SAFE_MATH_GLOBALS, {})
         return result
     except Exception as e:
         raise ValueError(f"Calculation error: {e}")
 
+def _integral(value: Any) -> Any:
+    return int(value) if isinstance(value, float) and value.is_integer() else value
+
+def _evaluate_per_element(code, variables: Dict[str, Any]):
+    import numpy as np
+    names = list(variables)
+    # Object arrays keep Python ints, which do not overflow
+    columns = np.broadcast_arrays(*(np.asarray(variables[name], dtype=object) for name in names)) if names else []
+    shape = columns[0].shape if columns else ()
+    rows = zip(*(column.ravel() for column in columns)) if columns else [()]
+    results = [eval(code, _SAFE_MATH_GLOBALS, {name: _integral(value) for name, value in zip(names, row)})
+               for row in rows]
+    return np.asarray(results, dtype=float).reshape(shape)
+
+def calculator_batch(expression: str, variables: Dict[str, List[float]]) -> List[float]:
+    """
+    Evaluates one expression over arrays of variables in a single vectorized call.
+
+    numexpr is used when it supports the expression; otherwise the expression is
+    evaluated with NumPy ufuncs standing in for the math functions. Both work in
+    floating point. Expressions using integer-only functions such as factorial or
+    gcd are evaluated element by element with Python integers.
+
+    Args:
+        expression (str): The mathematical expression, e.g. 'sqrt(x**2 + y**2)'.
+        variables (Dict[str, List[float]]): Arrays (or scalars) keyed by variable name.
+
+    Returns:
+        List[float]: The result for each element of the broadcast inputs.
+    """
+    try:
+        import numpy as np
+        code = _compile_expression(expression, frozenset(variables))
+        if _INTEGER_FUNCTIONS.intersection(code.co_names):
+            return _evaluate_per_element(code, variables).tolist()
+        # Float arithmetic: fixed-width integers would wrap around silently on overflow
+        arrays = {name: np.asarray(values, dtype=float) for name, values in variables.items()}
+        try:
+            import numexpr
+            constants = {name: value for name, value in _SAFE_MATH_NAMES.items()
+                         if name in code.co_names and not callable(value)}
+            result = numexpr.evaluate(expression, local_dict={**constants, **arrays}, global_dict={})
+        except Exception:
+            namespace = {"__builtins__": {}, **_get_numpy_math_names()}
+            result = eval(code, namespace, dict(arrays))
+        return np.asarray(result, dtype=float).tolist()
+    except Exception as e:
+        raise ValueError(f"Calculation error: {e}")
+
+WEB_SEARCH_URL = 'https://www.googleapis.com/customsearch/v1'
+WEATHER_URL = 'http://api.openweathermap.org/data/2.5/weather'
+EXCHANGE_RATE_URL = 'https://v6.exchangerate-api.com/v6'
+
+def _web_search_params(query: str) -> Dict[str, str]:
+    # Note: Replace 'YOUR_API_KEY' and 'YOUR_SEARCH_ENGINE_ID' with actual values.
+    api_key = 'YOUR_API_KEY'
+    search_engine_id = 'YOUR_SEARCH_ENGINE_ID'
+    return {'key': api_key, 'cx': search_engine_id, 'q': query}
+
+def _web_search_summary(data: Dict[str, Any]) -> str:
+    snippets = [item['snippet'] for item in data.get('items', [])]
+    summary = ' '.join(snippets[:3])  # Return first 3 snippets
+    return summary if summary else "No results found."
+
 def web_search(query: str) -> str:
     """
     Performs a web search and returns summarized results.
@@ -42,19 +161,73 @@ def web_search(query: str) -> str:
         str: The summary of search results.
     """
     try:
-        # Note: Replace 'YOUR_API_KEY' and 'YOUR_SEARCH_ENGINE_ID' with actual values.
-        api_key = 'YOUR_API_KEY'
-        search_engine_id = 'YOUR_SEARCH_ENGINE_ID'
-        url = 'https://www.googleapis.com/customsearch/v1'
-        params = {'key': api_key, 'cx': search_engine_id, 'q': query}
-        response = requests.get(url, params=params)
-        data = response.json()
-        snippets = [item['snippet'] for item in data.get('items', [])]
-        summary = ' '.join(snippets[:3])  # Return first 3 snippets
-        return summary if summary else "No results found."
+        data = http_get_json(WEB_SEARCH_URL, params=_web_search_params(query))
+        return _web_search_summary(data)
     except Exception as e:
         raise ValueError(f"Web search error: {e}")
 
+async def aweb_search(query: str) -> str:
+    """
+    Async variant of web_search using the pooled async HTTP client.
+
+    Args:
+        query (str): The search query.
+
+    Returns:
+        str: The summary of search results.
+    """
+    try:
+        data = await ahttp_get_json(WEB_SEARCH_URL, params=_web_search_params(query))
+        return _web_search_summary(data)
+    except Exception as e:
+        raise ValueError(f"Web search error: {e}")
+
+_unit_registry = None
+_unit_registry_lock = threading.Lock()
+
+def get_unit_registry():
+    """
+    Returns the process-wide pint UnitRegistry, building it on first use.
+
+    Building a registry parses pint's whole definitions file, so it is done once
+    and shared by every conversion.
+
+    Returns:
+        pint.UnitRegistry: The shared unit registry.
+    """
+    global _unit_registry
+    if _unit_registry is None:
+        with _unit_registry_lock:
+            if _unit_registry is None:
+                import pint
+                _unit_registry = pint.UnitRegistry()
+    return _unit_registry
+
+@lru_cache(maxsize=1024)
+def _parse_unit(unit: str):
+    """
+    Parses a unit expression once and caches the result.
+
+    Args:
+        unit (str): A unit expression such as 'km/h' or 'degC'.
+
+    Returns:
+        The parsed pint Unit, or a Quantity for expressions that carry a magnitude (e.g. '100 m').
+    """
+    ureg = get_unit_registry()
+    try:
+        return ureg.parse_units(unit)
+    except Exception:
+        return ureg.parse_expression(unit)
+
+def _to_quantity(value, from_unit: str):
+    ureg = get_unit_registry()
+    unit = _parse_unit(from_unit)
+    if isinstance(unit, ureg.Unit):
+        # Quantity() rather than multiplication so offset units like degC work
+        return ureg.Quantity(value, unit)
+    return value * unit
+
 def unit_converter(value: float, from_unit: str, to_unit: str) -> str:
     """
     Converts units from one type to another.
@@ -68,14 +241,32 @@ def unit_converter(value: float, from_unit: str, to_unit: str) -> str:
         str: The result of the conversion.
     """
     try:
-        import pint
-        ureg = pint.UnitRegistry()
-        quantity = value * ureg(from_unit)
-        converted = quantity.to(to_unit)
+        quantity = _to_quantity(float(value), from_unit)
+        converted = quantity.to(_parse_unit(to_unit))
         return f"{quantity} = {converted}"
     except Exception as e:
         raise ValueError(f"Conversion error: {e}")
 
+def unit_converter_batch(values: List[float], from_unit: str, to_unit: str) -> List[float]:
+    """
+    Converts many values between the same pair of units in one vectorized call.
+
+    Args:
+        values (List[float]): The numerical values to convert.
+        from_unit (str): The unit of the input values.
+        to_unit (str): The unit to convert to.
+
+    Returns:
+        List[float]: The converted magnitudes, in input order.
+    """
+    try:
+        import numpy as np
+        quantity = _to_quantity(np.asarray(values, dtype=float), from_unit)
+        converted = quantity.to(_parse_unit(to_unit))
+        return np.asarray(converted.magnitude, dtype=float).tolist()
+    except Exception as e:
+        raise ValueError(f"Conversion error: {e}")
+
 def translate_text(text: str, target_language: str) -> str:
     """
     Translates text to the specified language.
@@ -97,24 +288,174 @@ def translate_text(text: str, target_language: str) -> str:
     except Exception as e:
         raise ValueError(f"Translation error: {e}")
 
-def summarize_text(text: str) -> str:
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=["\'(\[]?[A-Z0-9])|\n\s*\n')
+_SUMMARY_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_SUMMARY_STOP_WORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further had has have having he her
+here hers him his how i if in into is it its itself just me more most my no nor not now of off on once only
+or other our ours out over own same she should so some such than that the their theirs them then there
+these they this those through to too under until up very was we were what when where which while who whom
+why will with would you your yours
+""".split())
+# Sentences ranked in one similarity graph; longer texts are ranked in consecutive blocks, bounding memory
+TEXTRANK_MAX_SENTENCES = int(os.environ.get('REACTREE_TEXTRANK_MAX_SENTENCES', 300))
+
+def _split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in _SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+
+def _textrank_scores(sentences: List[str], damping: float = 0.85, max_iter: int = 100, tol: float = 1e-6):
+    """
+    Ranks sentences with TextRank over TF-IDF cosine similarity.
+
+    Texts longer than TEXTRANK_MAX_SENTENCES are ranked in blocks of that many
+    consecutive sentences, so the term and similarity matrices stay bounded.
+
+    Args:
+        sentences (List[str]): The sentences to rank.
+        damping (float): The PageRank damping factor.
+        max_iter (int): Maximum power iterations.
+        tol (float): L1 convergence tolerance.
+
+    Returns:
+        numpy.ndarray: One score per sentence.
+    """
+    import numpy as np
+    n = len(sentences)
+    block = max(1, TEXTRANK_MAX_SENTENCES)
+    if n > block:
+        # A block's scores sum to 1; weighting by its share of the sentences puts all blocks on one scale
+        return np.concatenate([_textrank_scores(sentences[start:start + block], damping, max_iter, tol)
+                               * (min(block, n - start) / n) for start in range(0, n, block)])
+    vocabulary: Dict[str, int] = {}
+    rows, cols = [], []
+    for i, sentence in enumerate(sentences):
+        for word in _SUMMARY_WORD.findall(sentence.lower()):
+            if word not in _SUMMARY_STOP_WORDS:
+                rows.append(i)
+                cols.append(vocabulary.setdefault(word, len(vocabulary)))
+    if not vocabulary:
+        return np.full(n, 1.0 / n)
+
+    counts = np.zeros((n, len(vocabulary)))
+    np.add.at(counts, (rows, cols), 1.0)
+    document_frequency = np.count_nonzero(counts, axis=0)
+    tfidf = np.log1p(counts) * (np.log((1 + n) / (1 + document_frequency)) + 1.0)
+    norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    vectors = tfidf / np.where(norms == 0, 1.0, norms)
+
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0.0)
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    # Sentences sharing no terms with any other spread their rank uniformly
+    transition = np.where(row_sums > 0, similarity / np.where(row_sums == 0, 1.0, row_sums), 1.0 / n)
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        updated = (1.0 - damping) / n + damping * (transition.T @ scores)
+        converged = np.abs(updated - scores).sum() < tol
+        scores = updated
+        if converged:
+            break
+    return scores
+
+def summarize_text(text: str, ratio: float = 0.3, word_count: Optional[int] = None) -> str:
     """
     Summarizes the given text.
 
+    Extracts the most central sentences using TextRank computed with NumPy, and
+    returns them in their original order.
+
     Args:
         text (str): The text to summarize.
+        ratio (float, optional): Fraction of sentences to keep. Defaults to 0.3.
+        word_count (Optional[int], optional): Approximate word budget; overrides ratio when set.
 
     Returns:
         str: The summary of the text.
     """
     try:
-        # Simple summarization by extracting key sentences.
-        from gensim.summarization import summarize
-        summary = summarize(text, ratio=0.3)
-        return summary
+        sentences = _split_sentences(text)
+        if len(sentences) <= 1:
+            return text.strip()
+        scores = _textrank_scores(sentences)
+        ranked = sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True)
+        if word_count is not None:
+            selected, words = [], 0
+            for i in ranked:
+                if selected and words >= word_count:
+                    break
+                selected.append(i)
+                words += len(sentences[i].split())
+        else:
+            selected = ranked[:max(1, int(round(len(sentences) * ratio)))]
+        return "\n".join(sentences[i] for i in sorted(selected))
     except Exception as e:
         raise ValueError(f"Summarization error: {e}")
 
+def summarize_text_batch(texts: List[str], ratio: float = 0.3, word_count: Optional[int] = None) -> List[str]:
+    """
+    Summarizes many documents with the same settings.
+
+    Args:
+        texts (List[str]): The texts to summarize.
+        ratio (float, optional): Fraction of sentences to keep. Defaults to 0.3.
+        word_count (Optional[int], optional): Approximate word budget per document.
+
+    Returns:
+        List[str]: The summary of each text, in input order.
+    """
+    return [summarize_text(text, ratio=ratio, word_count=word_count) for text in texts]
+
+def _map_chunks(chunk_func: Callable[..., List[Any]], items: List[Any], processes: Optional[int],
+                min_items_per_process: int, *args: Any) -> List[Any]:
+    """
+    Applies a chunk-level function to items, across the shared process pool when the batch is large enough.
+
+    Inside a process-lane worker the items are processed inline, whatever processes
+    says; batch tools called through the engine are registered with batch= so the
+    lane splits them across its workers instead.
+
+    Args:
+        chunk_func (Callable[..., List[Any]]): A picklable, module-level function taking a list of
+            items plus args and returning one result per item.
+        items (List[Any]): The items to process.
+        processes (Optional[int]): Worker processes to use. Defaults to the CPU count;
+            1 disables multiprocessing.
+        min_items_per_process (int): Minimum items per worker before another worker is used.
+        *args (Any): Extra arguments passed to every chunk_func call.
+
+    Returns:
+        List[Any]: One result per item, in input order.
+    """
+    workers = min(processes or os.cpu_count() or 1, max(1, len(items) // min_items_per_process))
+    # Inside a process-lane worker the batch is already off the main process
+    if workers <= 1 or in_worker():
+        return chunk_func(items, *args)
+    chunk_size = -(-len(items) // workers)
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    results = map_in_process(chunk_func, chunks, *[[arg] * len(chunks) for arg in args])
+    return [result for chunk in results for result in chunk]
+
+_text_blob = None
+
+def get_sentiment_analyzer() -> Callable[[str], Any]:
+    """
+    Imports TextBlob once and returns its constructor.
+
+    Returns:
+        Callable[[str], Any]: The TextBlob class.
+    """
+    global _text_blob
+    if _text_blob is None:
+        from textblob import TextBlob
+        _text_blob = TextBlob
+    return _text_blob
+
+def _sentiment_chunk(texts: List[str]) -> List[Tuple[float, float]]:
+    text_blob = get_sentiment_analyzer()
+    return [tuple(text_blob(text).sentiment) for text in texts]
+
 def sentiment_analysis(text: str) -> Dict[str, float]:
     """
     Performs sentiment analysis on the given text.
@@ -126,10 +467,7 @@ def sentiment_analysis(text: str) -> Dict[str, float]:
         Dict[str, float]: The sentiment scores (positive, negative, neutral).
     """
     try:
-        from textblob import TextBlob
-        blob = TextBlob(text)
-        polarity = blob.sentiment.polarity
-        subjectivity = blob.sentiment.subjectivity
+        polarity, subjectivity = _sentiment_chunk([text])[0]
         sentiment = {
             'polarity': polarity,
             'subjectivity': subjectivity
@@ -138,6 +476,38 @@ def sentiment_analysis(text: str) -> Dict[str, float]:
     except Exception as e:
         raise ValueError(f"Sentiment analysis error: {e}")
 
+def sentiment_analysis_batch(texts: Union[List[str], str], processes: Optional[int] = None,
+                             min_docs_per_process: int = 256) -> Dict[str, List[float]]:
+    """
+    Performs sentiment analysis on many texts in one call.
+
+    A string input is read as a JSON array of texts, so a single tree task can
+    analyse all sibling observations at once.
+
+    Args:
+        texts (Union[List[str], str]): The texts to analyze, or a JSON array of them.
+        processes (Optional[int]): Worker processes for large batches. Defaults to the CPU count;
+            1 disables multiprocessing.
+        min_docs_per_process (int): Minimum texts per worker before another worker is used.
+
+    Returns:
+        Dict[str, List[float]]: Columnar scores: 'polarity' and 'subjectivity', one entry per text.
+    """
+    try:
+        if isinstance(texts, str):
+            try:
+                parsed = json.loads(texts)
+            except json.JSONDecodeError:
+                parsed = [texts]
+            texts = parsed if isinstance(parsed, list) else [texts]
+        scores = _map_chunks(_sentiment_chunk, [str(text) for text in texts], processes, min_docs_per_process)
+        return {
+            'polarity': [polarity for polarity, _ in scores],
+            'subjectivity': [subjectivity for _, subjectivity in scores],
+        }
+    except Exception as e:
+        raise ValueError(f"Sentiment analysis error: {e}")
+
 def current_datetime(timezone: str = 'UTC') -> str:
     """
     Returns the current date and time in the specified timezone.
@@ -156,6 +526,16 @@ def current_datetime(timezone: str = 'UTC') -> str:
     except Exception as e:
         raise ValueError(f"DateTime error: {e}")
 
+def _weather_params(location: str) -> Dict[str, str]:
+    # Note: Replace 'YOUR_API_KEY' with your actual OpenWeatherMap API key.
+    api_key = 'YOUR_API_KEY'
+    return {'q': location, 'appid': api_key, 'units': 'metric'}
+
+def _weather_description(location: str, data: Dict[str, Any]) -> str:
+    weather_desc = data['weather'][0]['description']
+    temp = data['main']['temp']
+    return f"The current weather in {location.title()} is {weather_desc} with a temperature of {temp}°C."
+
 def weather_info(location: str) -> str:
     """
     Retrieves weather information for the specified location.
@@ -167,17 +547,187 @@ def weather_info(location: str) -> str:
         str: The weather information.
     """
     try:
-        # Note: Replace 'YOUR_API_KEY' with your actual OpenWeatherMap API key.
-        api_key = 'YOUR_API_KEY'
-        params = {'q': location, 'appid': api_key, 'units': 'metric'}
-        response = requests.get('http://api.openweathermap.org/data/2.5/weather', params=params)
-        data = response.json()
-        weather_desc = data['weather'][0]['description']
-        temp = data['main']['temp']
-        return f"The current weather in {location.title()} is {weather_desc} with a temperature of {temp}°C."
+        data = http_get_json(WEATHER_URL, params=_weather_params(location))
+        return _weather_description(location, data)
+    except Exception as e:
+        raise ValueError(f"Weather information error: {e}")
+
+async def aweather_info(location: str) -> str:
+    """
+    Async variant of weather_info using the pooled async HTTP client.
+
+    Args:
+        location (str): The location to get weather information for.
+
+    Returns:
+        str: The weather information.
+    """
+    try:
+        data = await ahttp_get_json(WEATHER_URL, params=_weather_params(location))
+        return _weather_description(location, data)
     except Exception as e:
         raise ValueError(f"Weather information error: {e}")
 
+def _exchange_rate_url(from_currency: str) -> str:
+    # Note: Replace 'YOUR_API_KEY' with your actual currency conversion API key.
+    api_key = 'YOUR_API_KEY'
+    return f'{EXCHANGE_RATE_URL}/{api_key}/latest/{from_currency}'
+
+class ExchangeRateCache:
+    """
+    Caches one exchange-rate table and derives every cross rate from it.
+
+    The table is refreshed in a background thread once it is older than
+    refresh_ratio * ttl, so callers keep getting cached rates while it updates;
+    only a table older than ttl is fetched synchronously.
+    """
+
+    def __init__(self, base_currency: str = 'USD', ttl: float = 3600.0, refresh_ratio: float = 0.8):
+        """
+        Initialize the ExchangeRateCache class.
+
+        Args:
+            base_currency (str): Currency whose rate table is downloaded. Defaults to 'USD'.
+            ttl (float): Seconds a table may be used for. Defaults to 3600.
+            refresh_ratio (float): Fraction of ttl after which a background refresh starts. Defaults to 0.8.
+        """
+        self.base_currency = base_currency
+        self.ttl = ttl
+        self.refresh_ratio = refresh_ratio
+        self._rates: Optional[Dict[str, float]] = None
+        self._fetched_at = 0.0
+        # Reentrant, since a synchronous fetch stores its table while holding it
+        self._lock = threading.RLock()
+        self._refreshing = False
+        self._refresh_task = None
+        # The synchronous fetch of a cold table on the async path, awaited by every caller meanwhile
+        self._fetch_task = None
+        self.fetch_count = 0
+
+    @staticmethod
+    def _conversion_rates(data: Dict[str, Any]) -> Dict[str, float]:
+        if data['result'] != 'success':
+            raise ValueError("Failed to retrieve exchange rates.")
+        return data['conversion_rates']
+
+    def _store(self, rates: Dict[str, float]) -> Dict[str, float]:
+        with self._lock:
+            self._rates, self._fetched_at = rates, time.monotonic()
+            self.fetch_count += 1
+        return rates
+
+    def refresh(self) -> Dict[str, float]:
+        """
+        Download a fresh rate table now.
+
+        Returns:
+            Dict[str, float]: Rates relative to the base currency.
+        """
+        return self._store(self._conversion_rates(http_get_json(_exchange_rate_url(self.base_currency))))
+
+    async def arefresh(self) -> Dict[str, float]:
+        """
+        Async variant of refresh, using the pooled async HTTP client.
+
+        Returns:
+            Dict[str, float]: Rates relative to the base currency.
+        """
+        return self._store(self._conversion_rates(await ahttp_get_json(_exchange_rate_url(self.base_currency))))
+
+    def _claim_refresh(self) -> bool:
+        # Only one caller starts a background refresh while the table is stale
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+            return True
+
+    def _refresh_done(self):
+        with self._lock:
+            self._refreshing = False
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Background exchange rate refresh failed due to {e}")
+        finally:
+            self._refresh_done()
+
+    async def _abackground_refresh(self):
+        try:
+            await self.arefresh()
+        except Exception as e:
+            print(f"Background exchange rate refresh failed due to {e}")
+        finally:
+            self._refresh_done()
+
+    def _shared_fetch(self) -> "asyncio.Future":
+        import asyncio
+        loop = asyncio.get_running_loop()
+        task = self._fetch_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = self._fetch_task = loop.create_task(self.arefresh())
+        # Shielded, so one cancelled caller does not cancel the fetch the others wait for
+        return asyncio.shield(task)
+
+    def rates(self) -> Dict[str, float]:
+        """
+        Return the cached rate table, fetching or refreshing it as needed.
+
+        Returns:
+            Dict[str, float]: Rates relative to the base currency.
+        """
+        age = time.monotonic() - self._fetched_at
+        if self._rates is None or age >= self.ttl:
+            with self._lock:
+                # Another caller may have fetched while we waited for the lock
+                if self._rates is None or time.monotonic() - self._fetched_at >= self.ttl:
+                    self.refresh()
+                return self._rates
+        if age >= self.ttl * self.refresh_ratio and self._claim_refresh():
+            threading.Thread(target=self._background_refresh, name="exchange-rate-refresh", daemon=True).start()
+        return self._rates
+
+    async def arates(self) -> Dict[str, float]:
+        """
+        Async variant of rates; fetches and background refreshes use the async HTTP client.
+
+        Returns:
+            Dict[str, float]: Rates relative to the base currency.
+        """
+        age = time.monotonic() - self._fetched_at
+        if self._rates is None or age >= self.ttl:
+            # Concurrent callers share one fetch, as rates() does with its lock
+            return await self._shared_fetch()
+        if age >= self.ttl * self.refresh_ratio and self._claim_refresh():
+            import asyncio
+            # Kept on the instance so the task is not garbage collected while it runs
+            self._refresh_task = asyncio.get_running_loop().create_task(self._abackground_refresh())
+        return self._rates
+
+    @staticmethod
+    def cross_rate(rates: Dict[str, float], from_currency: str, to_currency: str) -> float:
+        """
+        Compute the from -> to rate from a table quoted against any base.
+
+        Args:
+            rates (Dict[str, float]): Rates relative to the base currency.
+            from_currency (str): The source currency code.
+            to_currency (str): The target currency code.
+
+        Returns:
+            float: Units of to_currency per unit of from_currency.
+        """
+        return rates[to_currency.upper()] / rates[from_currency.upper()]
+
+# Shared cache used by the currency tools; adjust ttl/base_currency on it to configure
+exchange_rate_cache = ExchangeRateCache(ttl=float(os.environ.get('REACTREE_FX_TTL', 3600)))
+
+def _format_conversion(amount: float, from_currency: str, to_currency: str, rate: float) -> str:
+    converted_amount = amount * rate
+    return f"{amount} {from_currency} = {converted_amount:.2f} {to_currency}"
+
 def currency_converter(amount: float, from_currency: str, to_currency: str) -> str:
     """
     Converts currency from one type to another.
@@ -191,16 +741,44 @@ def currency_converter(amount: float, from_currency: str, to_currency: str) -> s
         str: The result of the conversion.
     """
     try:
-        # Note: Replace 'YOUR_API_KEY' with your actual currency conversion API key.
-        api_key = 'YOUR_API_KEY'
-        url = f'https://v6.exchangerate-api.com/v6/{api_key}/latest/{from_currency}'
-        response = requests.get(url)
-        data = response.json()
-        if data['result'] != 'success':
-            raise ValueError("Failed to retrieve exchange rates.")
-        rate = data['conversion_rates'][to_currency]
-        converted_amount = amount * rate
-        return f"{amount} {from_currency} = {converted_amount:.2f} {to_currency}"
+        rate = ExchangeRateCache.cross_rate(exchange_rate_cache.rates(), from_currency, to_currency)
+        return _format_conversion(amount, from_currency, to_currency, rate)
+    except Exception as e:
+        raise ValueError(f"Currency conversion error: {e}")
+
+async def acurrency_converter(amount: float, from_currency: str, to_currency: str) -> str:
+    """
+    Async variant of currency_converter.
+
+    Args:
+        amount (float): The amount of money to convert.
+        from_currency (str): The currency code of the input amount (e.g., 'USD').
+        to_currency (str): The currency code to convert to (e.g., 'EUR').
+
+    Returns:
+        str: The result of the conversion.
+    """
+    try:
+        rate = ExchangeRateCache.cross_rate(await exchange_rate_cache.arates(), from_currency, to_currency)
+        return _format_conversion(amount, from_currency, to_currency, rate)
+    except Exception as e:
+        raise ValueError(f"Currency conversion error: {e}")
+
+def currency_converter_batch(conversions: List[Tuple[float, str, str]]) -> List[str]:
+    """
+    Converts many amounts using a single cached rate table.
+
+    Args:
+        conversions (List[Tuple[float, str, str]]): (amount, from_currency, to_currency) triples.
+
+    Returns:
+        List[str]: The result of each conversion, in input order.
+    """
+    try:
+        rates = exchange_rate_cache.rates()
+        return [_format_conversion(amount, from_currency, to_currency,
+                                   ExchangeRateCache.cross_rate(rates, from_currency, to_currency))
+                for amount, from_currency, to_currency in conversions]
     except Exception as e:
         raise ValueError(f"Currency conversion error: {e}")
 
@@ -302,6 +880,62 @@ def json_formatter(json_string: str) -> str:
     except Exception as e:
         raise ValueError(f"JSON formatting error: {e}")
 
+# NLTK data packages required by keyword extraction: (resource path, package name)
+_NLTK_RESOURCES = [('tokenizers/punkt', 'punkt'), ('corpora/stopwords', 'stopwords')]
+# Newer NLTK releases tokenize with punkt_tab; older ones do not know the package
+_NLTK_OPTIONAL_RESOURCES = [('tokenizers/punkt_tab', 'punkt_tab')]
+_nlp_resources = None
+_nlp_resources_lock = threading.Lock()
+
+def _nlp_offline_default() -> bool:
+    return os.environ.get('REACTREE_NLP_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+def get_nlp_resources(offline: Optional[bool] = None) -> Tuple[Callable[[str], List[str]], frozenset]:
+    """
+    Loads the NLTK tokenizer and English stopwords once per process.
+
+    Missing data is downloaded on first use unless offline mode is on, in which
+    case a LookupError is raised immediately instead of touching the network.
+
+    Args:
+        offline (Optional[bool]): Never download missing data. Defaults to the
+            REACTREE_NLP_OFFLINE environment variable.
+
+    Returns:
+        Tuple[Callable[[str], List[str]], frozenset]: The word tokenizer and the stopword set.
+    """
+    global _nlp_resources
+    if _nlp_resources is not None:
+        return _nlp_resources
+    if offline is None:
+        offline = _nlp_offline_default()
+    with _nlp_resources_lock:
+        if _nlp_resources is None:
+            import nltk
+            for resource, package in _NLTK_RESOURCES + _NLTK_OPTIONAL_RESOURCES:
+                try:
+                    nltk.data.find(resource)
+                except LookupError:
+                    required = (resource, package) in _NLTK_RESOURCES
+                    if offline:
+                        if required:
+                            raise LookupError(f"NLTK resource '{package}' is not installed and offline mode is on.")
+                        continue
+                    if not nltk.download(package, quiet=True) and required:
+                        raise LookupError(f"Could not download NLTK resource '{package}'.")
+            from nltk.corpus import stopwords
+            from nltk.tokenize import word_tokenize
+            _nlp_resources = (word_tokenize, frozenset(stopwords.words('english')))
+    return _nlp_resources
+
+def _filter_keywords(text: str, tokenize: Callable[[str], List[str]], stop_words: frozenset) -> List[str]:
+    return [word for word in tokenize(text) if word.isalnum() and word.lower() not in stop_words]
+
+def _extract_keywords_chunk(texts: List[str], offline: bool) -> List[List[str]]:
+    # Runs in worker processes, which load the NLP resources once each
+    tokenize, stop_words = get_nlp_resources(offline)
+    return [_filter_keywords(text, tokenize, stop_words) for text in texts]
+
 def extract_keywords(text: str) -> List[str]:
     """
     Extracts keywords from the given text.
@@ -313,53 +947,260 @@ def extract_keywords(text: str) -> List[str]:
         List[str]: A list of keywords.
     """
     try:
-        import nltk
-        from nltk.corpus import stopwords
-        from nltk.tokenize import word_tokenize
-        nltk.download('punkt', quiet=True)
-        nltk.download('stopwords', quiet=True)
-        stop_words = set(stopwords.words('english'))
-        words = word_tokenize(text)
-        keywords = [word for word in words if word.isalnum() and word.lower() not in stop_words]
-        return keywords
+        tokenize, stop_words = get_nlp_resources()
+        return _filter_keywords(text, tokenize, stop_words)
+    except Exception as e:
+        raise ValueError(f"Keyword extraction error: {e}")
+
+def extract_keywords_batch(texts: List[str], processes: Optional[int] = None,
+                           min_docs_per_process: int = 64) -> List[List[str]]:
+    """
+    Extracts keywords from many documents at once.
+
+    Small batches run in-process; larger ones are split into chunks across a
+    process pool, since tokenization is CPU-bound.
+
+    Args:
+        texts (List[str]): The documents to extract keywords from.
+        processes (Optional[int]): Worker processes to use. Defaults to the CPU count;
+            1 disables multiprocessing.
+        min_docs_per_process (int): Minimum documents per worker before another worker is used.
+
+    Returns:
+        List[List[str]]: The keywords of each document, in input order.
+    """
+    try:
+        return _map_chunks(_extract_keywords_chunk, texts, processes, min_docs_per_process,
+                           _nlp_offline_default())
     except Exception as e:
         raise ValueError(f"Keyword extraction error: {e}")
 
-def html_to_text(html_content: str) -> str:
+# Elements that never contain readable text
+_HTML_NON_TEXT_TAGS = ('script', 'style', 'noscript', 'template', 'svg', 'canvas', 'iframe', 'object', 'head')
+# Page chrome dropped in main-content mode
+_HTML_BOILERPLATE_TAGS = ('nav', 'header', 'footer', 'aside', 'form', 'button', 'menu')
+# Elements that end a line of text
+_HTML_BLOCK_TAGS = ('p', 'div', 'br', 'li', 'tr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'section', 'article',
+                    'main', 'nav', 'header', 'footer', 'aside', 'form', 'blockquote', 'pre', 'table', 'ul', 'ol',
+                    'dt', 'dd', 'title', 'hr')
+_INLINE_SPACE = re.compile(r'[^\S\n]+')
+
+@lru_cache(maxsize=1)
+def _default_html_backend() -> str:
+    try:
+        import lxml.html  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'bs4'
+
+def _html_text_lxml(html_content: str, main_content: bool) -> str:
+    import lxml.html
+    from lxml import etree
+    try:
+        root = lxml.html.document_fromstring(html_content)
+    except (ValueError, etree.ParserError):
+        # lxml rejects str input with an XML encoding declaration, and markup without elements
+        return _html_text_bs4(html_content, main_content)
+    etree.strip_elements(root, etree.Comment, *_HTML_NON_TEXT_TAGS, with_tail=False)
+    if main_content:
+        etree.strip_elements(root, *_HTML_BOILERPLATE_TAGS, with_tail=False)
+        main = root.find('.//main')
+        if main is None:
+            main = root.find('.//article')
+        if main is not None:
+            root = main
+    for element in root.iter(*_HTML_BLOCK_TAGS):
+        element.tail = "\n" + (element.tail or "")
+    return root.text_content()
+
+def _html_text_bs4(html_content: str, main_content: bool) -> str:
+    from bs4 import BeautifulSoup, Comment
+    parser = 'lxml' if _default_html_backend() == 'lxml' else 'html.parser'
+    soup = BeautifulSoup(html_content, parser)
+    tags = _HTML_NON_TEXT_TAGS + (_HTML_BOILERPLATE_TAGS if main_content else ())
+    for element in soup(list(tags)):
+        element.decompose()
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+    root = (soup.find('main') or soup.find('article') or soup) if main_content else soup
+    for element in root.find_all(list(_HTML_BLOCK_TAGS)):
+        element.insert_after("\n")
+    return root.get_text()
+
+def html_to_text(html_content: str, main_content: bool = True, max_chars: Optional[int] = 20000,
+                 backend: Optional[str] = None) -> str:
     """
     Converts HTML content to plain text.
 
+    Scripts, styles and other non-text elements are always removed. lxml is
+    used when installed, with BeautifulSoup as the fallback.
+
     Args:
         html_content (str): The HTML content.
+        main_content (bool, optional): Drop navigation, headers, footers and forms, and keep
+            only <main>/<article> when present. Defaults to True.
+        max_chars (Optional[int], optional): Truncate the text to this many characters.
+            Defaults to 20000; None disables the cap.
+        backend (Optional[str], optional): 'lxml' or 'bs4'. Defaults to the fastest available.
 
     Returns:
         str: The plain text extracted from the HTML.
     """
     try:
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html_content, 'html.parser')
-        text = soup.get_text()
+        if not html_content or not html_content.strip():
+            return ""
+        backend = backend or _default_html_backend()
+        if backend == 'lxml':
+            text = _html_text_lxml(html_content, main_content)
+        elif backend == 'bs4':
+            text = _html_text_bs4(html_content, main_content)
+        else:
+            raise ValueError(f"Unknown backend '{backend}'.")
+        lines = (_INLINE_SPACE.sub(" ", line).strip() for line in text.splitlines())
+        text = "\n".join(line for line in lines if line)
+        if max_chars is not None and len(text) > max_chars:
+            text = text[:max_chars].rstrip() + "..."
         return text
     except Exception as e:
         raise ValueError(f"HTML to text conversion error: {e}")
 
-def parse_csv(csv_content: str) -> List[Dict[str, Any]]:
+def _html_to_text_chunk(html_documents: List[str], main_content: bool, max_chars: Optional[int]) -> List[str]:
+    return [html_to_text(html, main_content=main_content, max_chars=max_chars) for html in html_documents]
+
+def html_to_text_batch(html_documents: List[str], main_content: bool = True, max_chars: Optional[int] = 20000,
+                       processes: Optional[int] = None, min_docs_per_process: int = 16) -> List[str]:
     """
-    Parses CSV content into a list of dictionaries.
+    Converts many HTML documents to plain text, across a process pool for large batches.
 
     Args:
-        csv_content (str): The CSV content as a string.
+        html_documents (List[str]): The HTML documents.
+        main_content (bool, optional): See html_to_text. Defaults to True.
+        max_chars (Optional[int], optional): See html_to_text. Defaults to 20000.
+        processes (Optional[int], optional): Worker processes to use. Defaults to the CPU count;
+            1 disables multiprocessing.
+        min_docs_per_process (int, optional): Minimum documents per worker before another worker is used.
 
     Returns:
-        List[Dict[str, Any]]: A list of dictionaries representing the CSV rows.
+        List[str]: The text of each document, in input order.
+    """
+    return _map_chunks(_html_to_text_chunk, html_documents, processes, min_docs_per_process,
+                       main_content, max_chars)
+
+def _csv_source(csv_content: str) -> Tuple[Any, bool]:
+    """
+    Resolves parse_csv input to something pandas can read.
+
+    Args:
+        csv_content (str): CSV text, or a path to a CSV file.
+
+    Returns:
+        Tuple[Any, bool]: The path or a StringIO over the text, and whether it is a path.
     """
-    import csv
     from io import StringIO
+    if '\n' not in csv_content and os.path.isfile(csv_content):
+        return csv_content, True
+    return StringIO(csv_content), False
+
+def iter_csv_chunks(csv_content: str, chunksize: int = 100_000):
+    """
+    Streams CSV content as typed pandas DataFrame chunks.
+
+    Files are memory-mapped rather than read into a string first.
+
+    Args:
+        csv_content (str): CSV text, or a path to a CSV file.
+        chunksize (int, optional): Rows per chunk.
+
+    Yields:
+        pandas.DataFrame: Successive chunks with inferred column types.
+    """
+    import pandas as pd
+    source, is_path = _csv_source(csv_content)
+    with pd.read_csv(source, chunksize=chunksize, memory_map=is_path) as reader:
+        yield from reader
+
+def _merged_dtype(kinds: set) -> str:
+    # Chunks can infer different types for one column; report the widest
+    if kinds <= {'b'}:
+        return 'bool'
+    if kinds <= {'i', 'u'}:
+        return 'int64'
+    if kinds <= {'i', 'u', 'f'}:
+        return 'float64'
+    return 'string'
+
+def _summarize_csv_chunks(chunks) -> Dict[str, Any]:
+    """
+    Builds a schema and per-column statistics in one pass over the chunks.
+
+    Args:
+        chunks: An iterable of pandas DataFrames.
+
+    Returns:
+        Dict[str, Any]: Row count and, per column, dtype, null count and numeric min/max/mean.
+    """
+    rows = 0
+    stats: Dict[str, Dict[str, Any]] = {}
+    for chunk in chunks:
+        rows += len(chunk)
+        for name in chunk.columns:
+            column = chunk[name]
+            entry = stats.setdefault(name, {'kinds': set(), 'nulls': 0, 'min': None, 'max': None,
+                                            'sum': 0.0, 'count': 0})
+            entry['nulls'] += int(column.isna().sum())
+            entry['kinds'].add(column.dtype.kind)
+            if column.dtype.kind in 'iuf':
+                values = column.dropna()
+                if len(values):
+                    low, high = float(values.min()), float(values.max())
+                    entry['min'] = low if entry['min'] is None else min(entry['min'], low)
+                    entry['max'] = high if entry['max'] is None else max(entry['max'], high)
+                    entry['sum'] += float(values.sum())
+                    entry['count'] += len(values)
+
+    columns = []
+    for name, entry in stats.items():
+        dtype = _merged_dtype(entry['kinds'])
+        summary = {'name': name, 'dtype': dtype, 'nulls': entry['nulls']}
+        if dtype in ('int64', 'float64') and entry['count']:
+            summary.update(min=entry['min'], max=entry['max'], mean=entry['sum'] / entry['count'])
+        columns.append(summary)
+    return {'rows': rows, 'columns': columns}
+
+def parse_csv(csv_content: str, output: str = 'rows', chunksize: int = 100_000) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Parses CSV content into a list of dictionaries, typed columns, or a summary.
+
+    Args:
+        csv_content (str): The CSV content as a string, or a path to a CSV file.
+        output (str, optional): 'rows' for a list of per-row dicts of strings (default),
+            'columns' for a dict of typed value lists keyed by column name (missing values
+            are None), or 'summary' for only the schema and column statistics.
+        chunksize (int, optional): Rows per chunk when streaming for 'summary'.
+
+    Returns:
+        Union[List[Dict[str, Any]], Dict[str, Any]]: The parsed CSV in the requested shape.
+    """
+    import csv
     try:
-        f = StringIO(csv_content)
-        reader = csv.DictReader(f)
-        data = [row for row in reader]
-        return data
+        if output == 'rows':
+            source, is_path = _csv_source(csv_content)
+            if is_path:
+                with open(source, newline='') as f:
+                    return [row for row in csv.DictReader(f)]
+            reader = csv.DictReader(source)
+            data = [row for row in reader]
+            return data
+        if output == 'columns':
+            import pandas as pd
+            source, is_path = _csv_source(csv_content)
+            frame = pd.read_csv(source, memory_map=is_path)
+            # Lists of Python scalars, so the result can be stored as a JSON observation
+            return {name: [None if pd.isna(value) else value for value in frame[name].tolist()]
+                    for name in frame.columns}
+        if output == 'summary':
+            return _summarize_csv_chunks(iter_csv_chunks(csv_content, chunksize))
+        raise ValueError(f"Unknown output '{output}'; expected 'rows', 'columns' or 'summary'.")
     except Exception as e:
         raise ValueError(f"CSV parsing error: {e}")
 
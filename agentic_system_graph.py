@@ -1,55 +1,109 @@
 # agentic_system_graph.py
 
-from typing import List
+import json
+import threading
+import time
+from typing import Any, List, Optional
 from typing_extensions import TypedDict
 from langchain.schema import BaseMessage, HumanMessage, AIMessage
 from langgraph.graph import StateGraph, START, END
 from TaskTreePrompting import (
     State,
-    langchain_tools,
-    tools_dict,
+    tool_registry,
+    observation_usable,
     task_planning_node,
     task_execution_node,
     final_answer_node,
 )
+from RunHistory import new_run_id
+from Deadlines import DEFAULT_RUN_DEADLINE, Deadline
 
 class AgenticSystemGraph:
-    def __init__(self):
+    # The graph has no per-instance configuration, so it is compiled once and shared
+    _compiled_graph = None
+    _compile_lock = threading.Lock()
+
+    def __init__(self, history_writer: Optional[Any] = None):
+        # Optional RunHistoryWriter that persists every run and its task observations
+        self.history_writer = history_writer
+        self.graph = self.compiled_graph()
+
+    @classmethod
+    def compiled_graph(cls):
+        if cls._compiled_graph is None:
+            with cls._compile_lock:
+                if cls._compiled_graph is None:
+                    cls._compiled_graph = cls.build_graph().compile()
+        return cls._compiled_graph
+
+    @staticmethod
+    def build_graph() -> StateGraph:
         # Build the LangGraph
-        self.graph_builder = StateGraph(State)
+        graph_builder = StateGraph(State)
         
         # Add nodes
-        self.graph_builder.add_node('Task_Planning_Node', task_planning_node)
-        self.graph_builder.add_node('Task_Execution_Node', task_execution_node)
-        self.graph_builder.add_node('Final_Answer_Node', final_answer_node)
+        graph_builder.add_node('Task_Planning_Node', task_planning_node)
+        graph_builder.add_node('Task_Execution_Node', task_execution_node)
+        graph_builder.add_node('Final_Answer_Node', final_answer_node)
         
         # Define edges
-        self.graph_builder.add_edge(START, 'Task_Planning_Node')
-        self.graph_builder.add_edge('Task_Planning_Node', 'Task_Execution_Node')
-        self.graph_builder.add_edge('Task_Execution_Node', 'Final_Answer_Node')
-        self.graph_builder.add_edge('Final_Answer_Node', END)
-        
-        # Compile the graph
-        self.graph = self.graph_builder.compile()
+        graph_builder.add_edge(START, 'Task_Planning_Node')
+        graph_builder.add_edge('Task_Planning_Node', 'Task_Execution_Node')
+        graph_builder.add_edge('Task_Execution_Node', 'Final_Answer_Node')
+        graph_builder.add_edge('Final_Answer_Node', END)
+        return graph_builder
     
-    def run(self, user_input: str) -> State:
-        # Initialize the state
-        initial_state = State(
+    def stream(self, user_input: str, deadline: Optional[float] = None):
+        # Yields (node name, state) after each node, for callers that report progress.
+        # deadline (seconds) bounds tool execution; DEFAULT_RUN_DEADLINE applies when None
+        initial_state = self._initial_state(user_input, deadline)
+        for event in self.graph.stream(initial_state):
+            node = next(iter(event))
+            yield node, event[node]
+
+    def _initial_state(self, user_input: str, deadline: Optional[float] = None) -> State:
+        return State(
             messages=[HumanMessage(content=user_input)],
             user_input=user_input,
             task_tree_json="",
             execution_result="",
             final_answer="",
-            tools=tools_dict,
+            tools=tool_registry.tools(),
+            plan_from_cache=False,
+            deadline_at=Deadline(DEFAULT_RUN_DEADLINE if deadline is None else deadline).epoch() or 0.0,
         )
-        
+
+    def run(self, user_input: str, deadline: Optional[float] = None) -> State:
+        run_id = new_run_id()
+        started_at = time.time()
+
         # Run the graph
-        events = self.graph.stream(initial_state)
         final_state = None
-        for event in events:
-            state = event[next(iter(event))]
+        for _, state in self.stream(user_input, deadline):
             last_message = state['messages'][-1].content
             print(last_message)  # Optional: Print the output at each step
             final_state = state  # Keep updating the final state
+
+        if self.history_writer and final_state:
+            self._record_run(run_id, final_state, started_at)
         
-        return final_state  # Return the final state after execution
\ No newline at end of file
+        return final_state  # Return the final state after execution
+
+    def _record_run(self, run_id: str, state: State, started_at: float):
+        # The graph executes tasks inside a node, so per-task timings are not
+        # available here; observations are recorded from the executed tree.
+        task_tree = json.loads(state['execution_result']) if state.get('execution_result') else None
+
+        def record_tasks(task: dict):
+            if str(task.get('level_no')).strip() != "0":
+                # Tool errors are written into the observation, so it is never empty on failure
+                succeeded = bool(task.get('observation')) and observation_usable(task['observation'])
+                self.history_writer.record_task(run_id, task, "success" if succeeded else "failed")
+            for sub_task in task.get('sub_tasks', []):
+                record_tasks(sub_task)
+
+        if task_tree:
+            record_tasks(task_tree['task_tree']['task'])
+        self.history_writer.record_run(run_id, "AgenticSystemGraph", "graph", state['user_input'],
+                                       started_at, time.time(), task_tree=task_tree,
+                                       final_answer=state.get('final_answer'))
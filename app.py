@@ -1,29 +1,36 @@
+import uuid
+
 import chainlit as cl
 
+from HelperMethods import load_environment
+
+# REACTREE_* settings are read when the modules below are imported, so .env is loaded first
+load_environment()
+
 from basic_work_flow import sample_workflow_bot
 
 @cl.on_chat_start
 async def on_chat_start():
-    bot = sample_workflow_bot()
+    # One compiled graph and checkpointer serve every session on this event loop
+    graph = await sample_workflow_bot.acompiled_graph()
 
     # Input
     state = {"input": "hello world"}
     
-    # Thread
-    thread = {"configurable": {"thread_id": "1"}}
+    # Thread; the compiled graph and checkpointer are shared, so each session needs its own id
+    thread = {"configurable": {"thread_id": str(uuid.uuid4())}}
 
-    # Run the graph until the first interruption
-    for event in bot.graph.stream(state, thread, stream_mode="values"):
+    # Run the graph until the first interruption without blocking the event loop
+    async for event in graph.astream(state, thread, stream_mode="values"):
         print(event)
     
-    cl.user_session.set("bot", bot)
     cl.user_session.set("thread", thread)
     cl.user_session.set("state", state)
 
 
 @cl.on_message
 async def on_message(message: cl.Message):
-    bot = cl.user_session.get("bot")
+    graph = await sample_workflow_bot.acompiled_graph()
     thread = cl.user_session.get("thread")
     state = cl.user_session.get("state")
 
@@ -37,8 +44,8 @@ async def on_message(message: cl.Message):
     #     await msg.stream_token(chunk)
 
     # We now update the state as if we are the human_feedback node
-    bot.graph.update_state(thread, {"user_feedback": message.content}, as_node="human_feedback")
+    await graph.aupdate_state(thread, {"user_feedback": message.content}, as_node="human_feedback")
 
     # Continue the graph execution
-    for event in bot.graph.stream(None, thread, stream_mode="values"):
+    async for event in graph.astream(None, thread, stream_mode="values"):
         print(event)
\ No newline at end of file
@@ -1,14 +1,16 @@
-import os
-from dotenv import load_dotenv
+import threading
+import weakref
 import chainlit as cl
 
-# Load environment variables from .env file
-load_dotenv()
-
 from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
-from IPython.display import Image, display
+
+from HelperMethods import load_environment
+
+# REACTREE_* settings are read when the modules below are imported, so .env is loaded first
+load_environment()
+
+from Checkpoints import get_graph_checkpointer, aget_graph_checkpointer
 
 
 class State(TypedDict):
@@ -46,22 +48,72 @@ def router(state):
         return "continue"
 
 class sample_workflow_bot:
+    # One compiled graph and checkpointer serve every instance; sessions are
+    # kept apart by their thread_id
+    _builder = None
+    _memory = None
+    _graph = None
+    _compile_lock = threading.Lock()
+    # Graphs compiled with an async checkpointer for astream, one per event loop
+    _async_graphs = weakref.WeakKeyDictionary()
 
     def __init__(self):
-        self.builder = StateGraph(State)
-        self.builder.add_node("step_1", step_1)
-        self.builder.add_node("human_feedback", human_feedback)
-        self.builder.add_node("step_3", step_3)
-        self.builder.add_node("step_4", step_4)
-        
-        self.builder.add_edge(START, "step_1")
-        self.builder.add_edge("step_1", "human_feedback")
-        self.builder.add_edge("human_feedback", "step_3")
-        self.builder.add_edge("step_3", "step_4")
-        self.builder.add_conditional_edges("step_4", router, {"end": END, "continue":"human_feedback"})
-        
-        # Set up memory
-        self.memory = MemorySaver()
-        
-        # Add
-        self.graph = self.builder.compile(checkpointer=self.memory, interrupt_before=["human_feedback"])
\ No newline at end of file
+        self._compile()
+        self.builder = sample_workflow_bot._builder
+        self.memory = sample_workflow_bot._memory
+        self.graph = sample_workflow_bot._graph
+
+    @classmethod
+    def _compile(cls):
+        if cls._graph is not None:
+            return
+        with cls._compile_lock:
+            if cls._graph is not None:
+                return
+            builder = StateGraph(State)
+            builder.add_node("step_1", step_1)
+            builder.add_node("human_feedback", human_feedback)
+            builder.add_node("step_3", step_3)
+            builder.add_node("step_4", step_4)
+            
+            builder.add_edge(START, "step_1")
+            builder.add_edge("step_1", "human_feedback")
+            builder.add_edge("human_feedback", "step_3")
+            builder.add_edge("step_3", "step_4")
+            builder.add_conditional_edges("step_4", router, {"end": END, "continue":"human_feedback"})
+            
+            # Set up memory; checkpoints go to a SQLite file so threads survive restarts
+            memory = get_graph_checkpointer()
+            
+            # Add
+            cls._builder = builder
+            cls._memory = memory
+            cls._graph = builder.compile(checkpointer=memory, interrupt_before=["human_feedback"])
+
+    @classmethod
+    async def acompiled_graph(cls):
+        """
+        Returns the graph for async use (astream, aupdate_state), shared by every
+        session on the running event loop.
+
+        The sync SQLite checkpointer cannot serve async calls, so this graph is
+        compiled with an async checkpointer on the same database file.
+        """
+        import asyncio
+        cls._compile()
+        loop = asyncio.get_running_loop()
+        graph = cls._async_graphs.get(loop)
+        if graph is None or (graph.done() and (graph.cancelled() or graph.exception() is not None)):
+            # Concurrent first callers await the same task instead of opening extra connections
+            graph = cls._async_graphs[loop] = loop.create_task(cls._acompile())
+        return await asyncio.shield(graph)
+
+    @classmethod
+    async def _acompile(cls):
+        memory = await aget_graph_checkpointer()
+        return cls._builder.compile(checkpointer=memory, interrupt_before=["human_feedback"])
+
+    def display_graph(self):
+        # IPython is only needed for notebook rendering, so it is imported here
+        from IPython.display import Image, display
+        display(Image(self.graph.get_graph().draw_mermaid_png()))
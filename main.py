@@ -1,11 +1,84 @@
-from fastapi import FastAPI
+import json
+from contextlib import asynccontextmanager
+from typing import Optional, Union
+
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
 from chainlit.utils import mount_chainlit
 
-app = FastAPI()
+from HelperMethods import load_environment
+
+# REACTREE_* settings are read when the modules below are imported, so .env is loaded first
+load_environment()
+
+from TaskService import TaskService, QueueFullError
+
+task_service = TaskService()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await task_service.start()
+    yield
+    await task_service.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+class TaskRequest(BaseModel):
+    # "graph" answers question end to end; the other modes execute a given task_tree
+    mode: str = "graph"
+    question: Optional[str] = None
+    task_tree: Optional[Union[str, dict]] = None
+    # Seconds from submission by which tool execution must finish
+    deadline: Optional[float] = None
 
 
 @app.get("/app")
 def read_main():
     return {"message": "Hello World from main app"}
 
-mount_chainlit(app=app, target="app.py", path="/sample")
\ No newline at end of file
+
+@app.post("/tasks", status_code=202)
+async def submit_task(request: TaskRequest, x_tenant_id: str = Header("default")):
+    task_tree = json.dumps(request.task_tree) if isinstance(request.task_tree, dict) else request.task_tree
+    try:
+        job = task_service.submit(x_tenant_id, request.mode, question=request.question, task_tree=task_tree,
+                                  deadline=request.deadline)
+    except QueueFullError as e:
+        return JSONResponse(status_code=429, content={"detail": str(e)},
+                            headers={"Retry-After": str(e.retry_after)})
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"job_id": job.job_id, "status": job.status,
+            "poll": f"/tasks/{job.job_id}", "events": f"/tasks/{job.job_id}/events"}
+
+
+@app.get("/tasks/{job_id}")
+async def get_task(job_id: str):
+    job = task_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return job.to_dict()
+
+
+@app.get("/tasks/{job_id}/events")
+async def stream_task(job_id: str):
+    job = task_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+
+    async def events():
+        async for event in job.stream():
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/service/stats")
+async def service_stats():
+    return task_service.snapshot()
+
+mount_chainlit(app=app, target="app.py", path="/sample")
@@ -0,0 +1,98 @@
+# startup_report.py
+"""
+Reports import-time cost of the entry-point modules using `python -X importtime`.
+
+Usage:
+    python startup_report.py [module ...] [--top N] [--budget-ms MS]
+
+Each module is imported in a fresh interpreter. With --budget-ms the script
+exits non-zero when any module's cumulative import time exceeds the budget.
+"""
+
+import argparse
+import subprocess
+import sys
+from typing import List, Tuple
+
+DEFAULT_MODULES = ["TaskTreePrompting", "Execution_Algorithm", "agentic_system_graph", "app", "main"]
+
+
+def import_times(module: str) -> List[Tuple[int, int, str]]:
+    """
+    Imports a module in a fresh interpreter and parses the -X importtime log.
+
+    Args:
+        module (str): The module to import.
+
+    Returns:
+        List[Tuple[int, int, str]]: (self_us, cumulative_us, name) for every import.
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr.strip().splitlines()[-1]}")
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return entries
+
+
+def module_subtree(entries: List[Tuple[int, int, str]], module: str) -> List[Tuple[int, int, str]]:
+    """
+    Selects the imports triggered by a module, excluding interpreter start-up (site, .pth files).
+
+    The importtime log is post-order with nested imports indented, so the
+    subtree is the run of deeper-indented lines just before the module's line.
+
+    Args:
+        entries (List[Tuple[int, int, str]]): The parsed import log.
+        module (str): The top-level module.
+
+    Returns:
+        List[Tuple[int, int, str]]: The module's nested imports followed by the module itself.
+    """
+    for index in range(len(entries) - 1, -1, -1):
+        name = entries[index][2]
+        if name.strip() == module:
+            depth = len(name) - len(name.lstrip())
+            start = index
+            while start > 0 and len(entries[start - 1][2]) - len(entries[start - 1][2].lstrip()) > depth:
+                start -= 1
+            return entries[start:index + 1]
+    return []
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list per module.")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if a module takes longer.")
+    args = parser.parse_args()
+
+    over_budget = []
+    for module in args.modules:
+        try:
+            entries = import_times(module)
+        except RuntimeError as e:
+            print(e)
+            over_budget.append(module)
+            continue
+        subtree = module_subtree(entries, module)
+        total_ms = subtree[-1][1] / 1000 if subtree else 0.0
+        print(f"{module}: {total_ms:.1f} ms")
+        for _, cumulative, name in sorted(subtree[:-1], key=lambda entry: entry[1], reverse=True)[:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name.strip()}")
+        if args.budget_ms is not None and total_ms > args.budget_ms:
+            over_budget.append(module)
+
+    if over_budget:
+        print(f"Over budget or failed: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
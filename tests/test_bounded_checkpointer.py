@@ -0,0 +1,139 @@
+# test_bounded_checkpointer.py
+
+import operator
+from typing import Annotated, TypedDict
+
+import pytest
+
+langgraph = pytest.importorskip("langgraph")
+from langgraph.graph import END, StateGraph  # noqa: E402
+
+from BoundedCheckpointer import BoundedMemorySaver  # noqa: E402
+
+
+class State(TypedDict):
+    document: str
+    steps: Annotated[list, operator.add]
+
+
+def _graph(checkpointer):
+    builder = StateGraph(State)
+    builder.add_node("step", lambda state: {"steps": [len(state["steps"])]})
+    builder.set_entry_point("step")
+    builder.add_edge("step", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def _config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def test_old_checkpoints_are_pruned_per_thread():
+    saver = BoundedMemorySaver(max_checkpoints_per_thread=3, max_threads=10, thread_ttl=None)
+    graph = _graph(saver)
+    for _ in range(6):
+        graph.invoke({"document": "doc", "steps": []}, _config("a"))
+
+    assert len(list(saver.list(_config("a")))) == 3
+    assert saver.memory_stats()["checkpoints_pruned"] > 0
+    # The latest state survives pruning
+    assert graph.get_state(_config("a")).values["steps"] == list(range(6))
+
+
+def test_least_recently_used_threads_are_evicted():
+    saver = BoundedMemorySaver(max_checkpoints_per_thread=3, max_threads=2, thread_ttl=None)
+    graph = _graph(saver)
+    for thread_id in ("a", "b", "c"):
+        graph.invoke({"document": "doc", "steps": []}, _config(thread_id))
+
+    assert saver.get_tuple(_config("a")) is None
+    assert saver.get_tuple(_config("c")) is not None
+    stats = saver.memory_stats()
+    assert stats["threads"] == 2
+    assert stats["threads_evicted"] == 1
+
+
+def test_large_values_are_stored_once():
+    saver = BoundedMemorySaver(max_checkpoints_per_thread=5, max_threads=10, thread_ttl=None, compact_min_bytes=256)
+    graph = _graph(saver)
+    document = "x" * 10_000
+    for thread_id in ("a", "b"):
+        graph.invoke({"document": document, "steps": []}, _config(thread_id))
+
+    stats = saver.memory_stats()
+    assert stats["dedup_hits"] > 0
+    assert stats["dedup_saved_bytes"] >= len(document)
+
+
+def test_delete_thread_releases_everything():
+    saver = BoundedMemorySaver(max_checkpoints_per_thread=3, max_threads=10, thread_ttl=None)
+    graph = _graph(saver)
+    graph.invoke({"document": "x" * 5000, "steps": []}, _config("a"))
+    saver.delete_thread("a")
+
+    stats = saver.memory_stats()
+    assert (stats["threads"], stats["checkpoints"], stats["blobs"], stats["writes"], stats["unique_contents"]) == (0,) * 5
+
+
+def _sqlite_counts(conn, thread_id):
+    return tuple(conn.execute(f"SELECT COUNT(*) FROM {table} WHERE thread_id = ?", (thread_id,)).fetchone()[0]
+                 for table in ("checkpoints", "writes"))
+
+
+def test_sqlite_store_prunes_checkpoints_and_their_writes(tmp_path):
+    pytest.importorskip("langgraph.checkpoint.sqlite")
+    import sqlite3
+    from SqliteCheckpointer import BoundedSqliteSaver
+
+    conn = sqlite3.connect(str(tmp_path / "graph.sqlite"), check_same_thread=False)
+    saver = BoundedSqliteSaver(conn, max_checkpoints_per_thread=3, max_threads=10, thread_ttl=None)
+    graph = _graph(saver)
+    for _ in range(6):
+        graph.invoke({"document": "doc", "steps": []}, _config("a"))
+
+    checkpoints, writes = _sqlite_counts(conn, "a")
+    assert checkpoints == 3 and saver.counters["checkpoints_pruned"] > 0
+    oldest = conn.execute("SELECT MIN(checkpoint_id) FROM checkpoints").fetchone()[0]
+    assert conn.execute("SELECT COUNT(*) FROM writes WHERE checkpoint_id < ?", (oldest,)).fetchone()[0] == 0
+    assert graph.get_state(_config("a")).values["steps"] == list(range(6))
+
+
+def test_sqlite_store_evicts_least_recently_used_and_idle_threads(tmp_path):
+    pytest.importorskip("langgraph.checkpoint.sqlite")
+    import sqlite3
+    from SqliteCheckpointer import BoundedSqliteSaver
+
+    conn = sqlite3.connect(str(tmp_path / "graph.sqlite"), check_same_thread=False)
+    saver = BoundedSqliteSaver(conn, max_checkpoints_per_thread=3, max_threads=2, thread_ttl=60)
+    graph = _graph(saver)
+    for thread_id in ("a", "b", "c"):
+        graph.invoke({"document": "doc", "steps": []}, _config(thread_id))
+    assert saver.get_tuple(_config("a")) is None
+    assert saver.counters["threads_evicted"] == 1
+
+    conn.execute("UPDATE thread_activity SET last_used = last_used - 120 WHERE thread_id = 'b'")
+    saver.evict_expired()
+    assert saver.get_tuple(_config("b")) is None
+    assert saver.get_tuple(_config("c")) is not None
+    assert _sqlite_counts(conn, "b") == (0, 0)
+
+
+def test_async_sqlite_store_is_bounded_too(tmp_path):
+    pytest.importorskip("aiosqlite")
+    import asyncio
+
+    import aiosqlite
+    from SqliteCheckpointer import BoundedAsyncSqliteSaver
+
+    async def run():
+        async with aiosqlite.connect(str(tmp_path / "graph.sqlite")) as conn:
+            saver = BoundedAsyncSqliteSaver(conn, max_checkpoints_per_thread=2, max_threads=1, thread_ttl=None)
+            graph = _graph(saver)
+            for thread_id in ("a", "a", "a", "b"):
+                await graph.ainvoke({"document": "doc", "steps": []}, _config(thread_id))
+            rows = await (await conn.execute("SELECT thread_id, COUNT(*) FROM checkpoints GROUP BY thread_id")).fetchall()
+            return rows, saver.counters
+
+    rows, counters = asyncio.run(run())
+    assert rows == [("b", 2)]
+    assert counters["checkpoints_pruned"] > 0 and counters["threads_evicted"] == 1
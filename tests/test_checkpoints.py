@@ -0,0 +1,87 @@
+# test_checkpoints.py
+
+import json
+
+import pytest
+from langchain_core.tools import Tool
+
+from Checkpoints import TaskCheckpointStore, task_paths
+from Execution_Algorithm import ExecutionAlgorithm
+
+
+def _tree():
+    return {"task_tree": {"task": {"task_no": 0, "level_no": 0, "original_question": "q", "action": "",
+                                   "action_input": "", "observation": "", "sub_tasks": [
+        {"task_no": 1, "level_no": 1, "action": "echo", "action_input": "a", "observation": "", "sub_tasks": [
+            {"task_no": 3, "level_no": 2, "action": "echo", "action_input": "c", "observation": "",
+             "sub_tasks": []}]},
+        {"task_no": 2, "level_no": 1, "action": "echo", "action_input": "b", "observation": "", "sub_tasks": []},
+    ]}}}
+
+
+def test_task_keys_follow_tree_positions():
+    root = _tree()['task_tree']['task']
+    assert sorted(task_paths(root).values()) == ["0", "0.0", "0.0.0", "0.1"]
+
+
+def test_completed_tasks_survive_a_reopen(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    store = TaskCheckpointStore(path)
+    tree = _tree()
+    store.save_tree("run-1", "bfs", tree)
+    first = tree['task_tree']['task']['sub_tasks'][0]
+    store.record_task("run-1", "0.0", dict(first, observation={"answer": 1}))
+    # Recorded for a task that a replan has since changed, so it must not be restored
+    store.record_task("run-1", "0.1", dict(first, action_input="changed", observation="stale"))
+    store.close()
+
+    reopened = TaskCheckpointStore(path)
+    mode, restored = reopened.load_run("run-1")
+    sub_tasks = restored['task_tree']['task']['sub_tasks']
+    assert mode == "bfs"
+    assert sub_tasks[0]['observation'] == {"answer": 1}
+    assert sub_tasks[1]['observation'] == ""
+    assert [run["run_id"] for run in reopened.unfinished_runs()] == ["run-1"]
+    assert reopened.unfinished_runs()[0]["completed_tasks"] == 2
+    assert reopened.load_run("unknown") is None
+    reopened.close()
+
+
+@pytest.mark.parametrize("keep_finished", [False, True])
+def test_finished_runs_are_deleted_or_kept(tmp_path, keep_finished):
+    store = TaskCheckpointStore(str(tmp_path / "checkpoints.sqlite"), keep_finished=keep_finished)
+    store.save_tree("run-1", "dfs", _tree())
+    store.finish_run("run-1")
+    assert store.unfinished_runs() == []
+    assert (store.load_run("run-1") is not None) == keep_finished
+    store.close()
+
+
+class Crash(BaseException):
+    """Stands in for the worker dying; not an Exception, so the engine does not catch it."""
+
+
+@pytest.mark.parametrize("mode", ["process_task_bfs", "process_task_dfs", "process_task_bfs_parallel"])
+def test_resume_runs_only_the_unfinished_tasks(tmp_path, mode):
+    calls = []
+
+    def echo(text):
+        calls.append(text)
+        if text == "b" and calls.count("b") == 1:
+            raise Crash()
+        return f"echo:{text}"
+
+    store = TaskCheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    engine = ExecutionAlgorithm([Tool(name="echo", func=echo, description="Returns its input.")],
+                                checkpoint_store=store, max_parallel=1)
+    with pytest.raises(Crash):
+        getattr(engine, mode)(json.dumps(_tree()), run_id="run-1")
+
+    result = json.loads(engine.resume("run-1"))
+    sub_tasks = result['task_tree']['task']['sub_tasks']
+    assert (sub_tasks[0]['observation'], sub_tasks[1]['observation']) == ("echo:a", "echo:b")
+    assert sub_tasks[0]['sub_tasks'][0]['observation'] == "echo:c"
+    # Tasks completed before the crash are not repeated; only the crashed one runs twice
+    assert sorted(calls) == ["a", "b", "b", "c"]
+    assert store.unfinished_runs() == []
+    store.close()
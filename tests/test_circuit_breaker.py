@@ -0,0 +1,141 @@
+# test_circuit_breaker.py
+
+import time
+
+import pytest
+
+import CircuitBreaker
+from CircuitBreaker import CLOSED, HALF_OPEN, OPEN, BreakerRegistry, CircuitBreaker as Breaker, \
+    CircuitOpenError, call_tool_with_retry, is_transient
+from Deadlines import Deadline, ToolTimeoutError
+
+
+class FlakyTool:
+    name = "flaky"
+    metadata = {}
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def run(self, tool_input):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return f"ok:{tool_input}"
+
+
+@pytest.fixture(autouse=True)
+def isolated_breakers(monkeypatch):
+    monkeypatch.setattr(CircuitBreaker, "tool_breakers", BreakerRegistry(threshold=3, reset_timeout=0.2))
+    monkeypatch.setattr(CircuitBreaker, "backoff_delay", lambda attempt, *args: 0.0)
+
+
+def test_breaker_opens_fails_fast_and_recovers_through_one_probe():
+    breaker = Breaker(threshold=2, reset_timeout=0.1)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.12)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    # Only one probe at a time
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["opened"] == 1
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = Breaker(threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_transient_errors_are_detected_through_wrapping():
+    class Response:
+        status_code = 503
+
+    class HTTPError(Exception):
+        response = Response()
+
+    try:
+        try:
+            raise ConnectionError("reset")
+        except ConnectionError as e:
+            raise ValueError("tool failed") from e
+    except ValueError as e:
+        wrapped = e
+    assert is_transient(wrapped)
+    assert is_transient(HTTPError())
+    assert not is_transient(ValueError("bad input"))
+
+
+def test_transient_errors_are_retried():
+    tool = FlakyTool([TimeoutError(), ConnectionError()])
+    assert call_tool_with_retry(tool, "x", timeout=None, retries=2) == "ok:x"
+    assert tool.calls == 3
+
+
+def test_input_errors_are_not_retried_and_do_not_open_the_circuit():
+    for _ in range(5):
+        tool = FlakyTool([ValueError("bad input")])
+        with pytest.raises(ValueError):
+            call_tool_with_retry(tool, "x", timeout=None, retries=2)
+        assert tool.calls == 1
+    assert CircuitBreaker.tool_breakers.get("flaky").state == CLOSED
+
+
+def test_open_circuit_fails_fast_without_calling_the_tool():
+    tool = FlakyTool([ConnectionError()] * 3)
+    with pytest.raises(ConnectionError):
+        call_tool_with_retry(tool, "x", timeout=None, retries=2)
+    with pytest.raises(CircuitOpenError):
+        call_tool_with_retry(tool, "x", timeout=None, retries=2)
+    assert tool.calls == 3
+    assert CircuitBreaker.tool_breakers.unavailable() == {"flaky"}
+    assert CircuitBreaker.tool_breakers.available({"flaky": tool}) == {}
+
+
+class SleepyTool(FlakyTool):
+    name = "sleepy"
+
+    def run(self, tool_input):
+        self.calls += 1
+        time.sleep(5)
+
+
+def test_timed_out_call_is_not_retried_with_less_than_its_timeout_left():
+    tool = SleepyTool([])
+    started = time.monotonic()
+    with pytest.raises(ToolTimeoutError):
+        call_tool_with_retry(tool, "x", timeout=0.2, deadline=Deadline(0.35), retries=3)
+    assert tool.calls == 1
+    assert time.monotonic() - started < 0.35
+    # The tool's own timeout expired, so it counts as a failure
+    assert CircuitBreaker.tool_breakers.get("sleepy").failures == 1
+
+
+def test_call_cut_short_by_the_run_deadline_releases_the_probe_without_a_failure():
+    breakers = CircuitBreaker.tool_breakers
+    breakers.get("sleepy").record_failure()
+    breakers.get("sleepy").record_failure()
+    breakers.get("sleepy").record_failure()
+    assert breakers.get("sleepy").state == OPEN
+    time.sleep(0.21)
+
+    tool = SleepyTool([])
+    with pytest.raises(ToolTimeoutError):
+        call_tool_with_retry(tool, "x", timeout=5, deadline=Deadline(0.2), retries=3)
+    assert tool.calls == 1
+    breaker = breakers.get("sleepy")
+    assert breaker.failures == 3
+    assert breaker.state == HALF_OPEN
+    # The next run may still probe the tool
+    assert breaker.allow()
@@ -0,0 +1,177 @@
+# test_deadlines.py
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from langchain_core.tools import StructuredTool, Tool
+
+import CircuitBreaker
+import Deadlines
+from CircuitBreaker import BreakerRegistry
+from Deadlines import Deadline, LatencyTracker, ToolTimeoutError, call_tool
+from Execution_Algorithm import TIMED_OUT, ExecutionAlgorithm
+
+
+class SlowTool:
+    """
+    A tool whose calls sleep for the next of the given durations.
+    """
+
+    def __init__(self, name, *durations, metadata=None):
+        self.name = name
+        self.metadata = metadata or {}
+        self.durations = list(durations)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def run(self, tool_input):
+        with self._lock:
+            call = self.calls
+            self.calls += 1
+        time.sleep(self.durations[min(call, len(self.durations) - 1)])
+        return f"{self.name}:{tool_input}:{call}"
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(monkeypatch):
+    monkeypatch.setattr(Deadlines, "tool_latency", LatencyTracker())
+    monkeypatch.setattr(Deadlines, "call_stats", {"calls": 0, "timeouts": 0, "hedges": 0, "hedge_wins": 0})
+    monkeypatch.setattr(CircuitBreaker, "tool_breakers", BreakerRegistry())
+    monkeypatch.setattr(CircuitBreaker, "backoff_delay", lambda attempt, *args: 0.0)
+
+
+def _tree(*sub_tasks):
+    return {"task_tree": {"task": {"task_no": 0, "level_no": 0, "original_question": "q", "action": "",
+                                   "action_input": "", "observation": "", "sub_tasks": list(sub_tasks)}}}
+
+
+def _task(task_no, action, **fields):
+    return {"task_no": task_no, "level_no": 1, "task_priority": 1, "action": action, "action_input": "x",
+            "observation": "", "sub_tasks": [], **fields}
+
+
+def _observations(tree_json):
+    return {task['task_no']: task['observation'] for task in json.loads(tree_json)['task_tree']['task']['sub_tasks']}
+
+
+def _sleeper(name, seconds):
+    return Tool(name=name, func=lambda text: time.sleep(seconds) or f"{name}:{text}", description="Sleeps.")
+
+
+def test_deadline_caps_the_call_timeout():
+    assert Deadline().timeout(5) == 5
+    assert Deadline().timeout(None) is None
+    assert Deadline(0.5).timeout(5) <= 0.5
+    assert Deadline(10).timeout(2) == 2
+    assert not Deadline(10).expired
+    assert abs(Deadline.at(time.time() + 10).remaining() - 10) < 0.1
+    assert Deadline.at(None).epoch() is None
+
+
+def test_latency_percentile_needs_enough_samples():
+    tracker = LatencyTracker(window=10)
+    for seconds in range(1, 21):
+        tracker.record("t", seconds / 10)
+    # Only the last 10 samples (1.1 to 2.0) are kept
+    assert tracker.percentile("t", 50) == pytest.approx(1.5)
+    assert tracker.percentile("t", 100) == pytest.approx(2.0)
+    assert tracker.percentile("t", 50, min_samples=11) is None
+    assert tracker.percentile("other", 50) is None
+
+
+def test_hung_tool_times_out_without_blocking_the_caller():
+    tool = SlowTool("hung", 5)
+    started = time.monotonic()
+    with pytest.raises(ToolTimeoutError):
+        call_tool(tool, "x", timeout=0.2)
+    assert time.monotonic() - started < 1
+    assert Deadlines.call_stats["timeouts"] == 1
+
+
+def test_expired_deadline_fails_before_the_tool_starts():
+    tool = SlowTool("never", 0)
+    deadline = Deadline(0.01)
+    time.sleep(0.02)
+    with pytest.raises(ToolTimeoutError):
+        call_tool(tool, "x", timeout=10, deadline=deadline)
+    assert tool.calls == 0
+
+
+def test_run_deadline_shortens_the_tool_timeout():
+    tool = SlowTool("long", 5)
+    started = time.monotonic()
+    with pytest.raises(ToolTimeoutError):
+        call_tool(tool, "x", timeout=10, deadline=Deadline(0.2))
+    assert time.monotonic() - started < 1
+
+
+def test_async_tool_is_cancelled_on_timeout():
+    cancelled = threading.Event()
+
+    async def slow(text: str) -> str:
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return text
+
+    tool = StructuredTool.from_function(func=lambda text: text, coroutine=slow, name="slow_async",
+                                        description="Sleeps.")
+    with pytest.raises(ToolTimeoutError):
+        call_tool(tool, "x", timeout=0.2)
+    assert cancelled.wait(2)
+
+
+def test_slow_call_of_a_hedged_tool_is_raced_by_a_second_attempt():
+    for _ in range(Deadlines.HEDGE_MIN_SAMPLES):
+        Deadlines.tool_latency.record("hedged", 0.05)
+    tool = SlowTool("hedged", 2, 0.01, metadata={"hedge": True})
+    started = time.monotonic()
+    assert call_tool(tool, "x", timeout=10) == "hedged:x:1"
+    assert time.monotonic() - started < 1
+    assert Deadlines.call_stats["hedges"] == 1
+    assert Deadlines.call_stats["hedge_wins"] == 1
+
+
+def test_tools_are_not_hedged_before_enough_samples_or_without_opting_in():
+    for _ in range(Deadlines.HEDGE_MIN_SAMPLES):
+        Deadlines.tool_latency.record("plain", 0.01)
+    Deadlines.tool_latency.record("cold", 0.01)
+    assert call_tool(SlowTool("plain", 0.2, metadata={"hedge": False}), "x", timeout=10) == "plain:x:0"
+    assert call_tool(SlowTool("cold", 0.2, metadata={"hedge": True}), "x", timeout=10) == "cold:x:0"
+    assert Deadlines.call_stats["hedges"] == 0
+
+
+def test_task_timeout_wins_over_tool_and_engine_timeouts():
+    tool = _sleeper("slow", 0)
+    tool.metadata = {"timeout": 7}
+    engine = ExecutionAlgorithm([tool], tool_timeout=60, tool_timeouts={"slow": 9})
+    assert engine._tool_timeout(tool, 3) == 3
+    assert engine._tool_timeout(tool) == 9
+    assert ExecutionAlgorithm([tool], tool_timeout=60)._tool_timeout(tool) == 7
+    assert ExecutionAlgorithm([_sleeper("bare", 0)], tool_timeout=60)._tool_timeout(_sleeper("bare", 0)) == 60
+
+
+@pytest.mark.parametrize("mode", ["process_task_bfs", "process_task_bfs_parallel", "process_task_dfs",
+                                  "process_task_dfs_parallel"])
+def test_timed_out_task_does_not_hold_up_its_siblings(mode):
+    engine = ExecutionAlgorithm([_sleeper("slow", 5), _sleeper("fast", 0)])
+    tree = _tree(_task(1, "slow", timeout=0.2), _task(2, "fast"))
+    started = time.monotonic()
+    observations = _observations(getattr(engine, mode)(json.dumps(tree)))
+    assert observations == {1: TIMED_OUT, 2: "fast:x"}
+    # The task timeout bounds every attempt, retries included
+    assert time.monotonic() - started < 0.2 * (1 + CircuitBreaker.DEFAULT_RETRIES) + 1
+
+
+def test_run_deadline_skips_tasks_reached_after_it():
+    engine = ExecutionAlgorithm([_sleeper("slow", 5), _sleeper("fast", 0)], run_deadline=0.3)
+    tree = _tree(_task(1, "slow"), _task(2, "fast"))
+    started = time.monotonic()
+    observations = _observations(engine.process_task_dfs(json.dumps(tree)))
+    assert observations == {1: TIMED_OUT, 2: TIMED_OUT}
+    assert time.monotonic() - started < 1.5
@@ -0,0 +1,97 @@
+# test_exchange_rates.py
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import UtilityTools
+from HttpClient import aclose_http_client
+from UtilityTools import ExchangeRateCache
+
+RATES = {"USD": 1.0, "EUR": 0.5, "GBP": 0.25}
+
+
+@pytest.fixture
+def rate_server(monkeypatch):
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            # Slow enough for concurrent callers to overlap
+            time.sleep(0.05)
+            body = json.dumps({"result": "success", "conversion_rates": RATES}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(UtilityTools, "EXCHANGE_RATE_URL", f"http://127.0.0.1:{server.server_port}")
+    yield hits
+    server.shutdown()
+
+
+def test_rates_are_fetched_once_and_crossed_locally(rate_server):
+    cache = ExchangeRateCache(ttl=60)
+    assert cache.cross_rate(cache.rates(), "EUR", "GBP") == 0.5
+    assert cache.cross_rate(cache.rates(), "GBP", "USD") == 4.0
+    assert len(rate_server) == 1
+
+
+def test_concurrent_stale_callers_start_one_refresh(rate_server):
+    cache = ExchangeRateCache(ttl=60, refresh_ratio=0.5)
+    cache.rates()
+    cache._fetched_at -= 45
+    threads = [threading.Thread(target=cache.rates) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    deadline = time.monotonic() + 5
+    while cache._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(rate_server) == 2
+    assert cache.fetch_count == 2
+
+
+def test_async_rates_use_the_async_client(rate_server, monkeypatch):
+    def blocking_fetch(*args, **kwargs):
+        raise AssertionError("the async path must not use the blocking client")
+
+    monkeypatch.setattr(UtilityTools, "http_get_json", blocking_fetch)
+    cache = ExchangeRateCache(ttl=60, refresh_ratio=0.5)
+
+    async def run():
+        rates = await cache.arates()
+        cache._fetched_at -= 45
+        await asyncio.gather(*(cache.arates() for _ in range(8)))
+        await cache._refresh_task
+        await aclose_http_client()
+        return rates
+
+    assert asyncio.run(run()) == RATES
+    assert len(rate_server) == 2
+
+
+def test_concurrent_async_callers_on_a_cold_cache_share_one_fetch(rate_server, monkeypatch):
+    cache = ExchangeRateCache(ttl=60)
+    monkeypatch.setattr(UtilityTools, "exchange_rate_cache", cache)
+
+    async def run():
+        results = await asyncio.gather(*(UtilityTools.acurrency_converter(2, "EUR", "GBP") for _ in range(50)))
+        await aclose_http_client()
+        return results
+
+    assert asyncio.run(run()) == ["2 EUR = 1.00 GBP"] * 50
+    assert len(rate_server) == 1
+    assert cache.fetch_count == 1
@@ -0,0 +1,17 @@
+# test_helper_methods.py
+
+import os
+
+from HelperMethods import load_environment
+
+
+def test_env_file_in_the_working_directory_is_loaded(tmp_path, monkeypatch):
+    (tmp_path / ".env").write_text("REACTREE_TEST_ENV_SETTING=from-dotenv\n")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("REACTREE_TEST_ENV_SETTING", raising=False)
+    try:
+        # load_environment caches its result, so call the wrapped function directly
+        assert load_environment.__wrapped__() is True
+        assert os.environ["REACTREE_TEST_ENV_SETTING"] == "from-dotenv"
+    finally:
+        os.environ.pop("REACTREE_TEST_ENV_SETTING", None)
@@ -0,0 +1,104 @@
+# test_http_client.py
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+import requests
+
+from HttpClient import aclose_http_client, ahttp_get_json, close_http_session, get_async_http_client, \
+    get_http_session, http_get_json
+
+
+@pytest.fixture
+def server():
+    # Client ports of the requests served, one per connection used
+    ports = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            ports.append(self.client_address[1])
+            if self.path.startswith("/slow"):
+                time.sleep(0.5)
+            status = 500 if self.path.startswith("/error") else 200
+            body = json.dumps({"path": self.path}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}", ports
+    close_http_session()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_sync_requests_reuse_one_pooled_connection(server):
+    url, ports = server
+    assert get_http_session() is get_http_session()
+    assert http_get_json(f"{url}/a", params={"q": "x"}) == {"path": "/a?q=x"}
+    assert http_get_json(f"{url}/b") == {"path": "/b"}
+    assert len(ports) == 2 and len(set(ports)) == 1
+
+
+def test_sync_timeouts_and_errors_propagate(server):
+    url, _ = server
+    with pytest.raises(requests.Timeout):
+        http_get_json(f"{url}/slow", timeout=0.1)
+    with pytest.raises(requests.HTTPError):
+        http_get_json(f"{url}/error")
+
+
+def test_async_client_is_shared_within_a_loop_and_reuses_connections(server):
+    url, ports = server
+
+    async def calls():
+        client = get_async_http_client()
+        assert get_async_http_client() is client
+        first = await ahttp_get_json(f"{url}/a")
+        second = await ahttp_get_json(f"{url}/b")
+        await aclose_http_client()
+        return client, [first, second]
+
+    client, results = asyncio.run(calls())
+    assert results == [{"path": "/a"}, {"path": "/b"}]
+    assert len(set(ports)) == 1
+    assert client.is_closed
+
+
+def test_each_event_loop_gets_its_own_async_client():
+    async def client():
+        client = get_async_http_client()
+        await aclose_http_client()
+        return client
+
+    first = asyncio.run(client())
+    second = asyncio.run(client())
+    assert first is not second
+
+
+def test_async_timeouts_and_errors_propagate(server):
+    url, _ = server
+
+    async def calls():
+        try:
+            with pytest.raises(httpx.TimeoutException):
+                await ahttp_get_json(f"{url}/slow", timeout=0.1)
+            with pytest.raises(httpx.HTTPStatusError):
+                await ahttp_get_json(f"{url}/error")
+        finally:
+            await aclose_http_client()
+
+    asyncio.run(calls())
@@ -0,0 +1,76 @@
+# test_plan_cache.py
+
+import json
+
+import pytest
+
+from PlanCache import PlanCache, specific_terms
+
+QUESTION = "What is the population of France?"
+
+
+def _tree(action_input="France population", action="web_search", observation="68 million"):
+    return json.dumps({"task_tree": {"task": {
+        "task_no": 0, "level_no": 0, "original_question": QUESTION, "observation": "", "sub_tasks": [
+            {"task_no": 1, "level_no": 1, "action": action, "action_input": action_input,
+             "observation": observation, "sub_tasks": []}]}}})
+
+
+@pytest.fixture
+def cache():
+    cache = PlanCache(threshold=0.9)
+    assert cache.store(QUESTION, _tree())
+    return cache
+
+
+def test_paraphrase_hits_with_observations_cleared(cache):
+    tree = json.loads(cache.lookup("what is the population of France", ["web_search"]))
+    root = tree["task_tree"]["task"]
+    assert root["original_question"] == "what is the population of France"
+    assert root["sub_tasks"][0]["action_input"] == "France population"
+    assert root["sub_tasks"][0]["observation"] == ""
+    assert cache.stats["hits"] == 1 and cache.hit_rate == 1.0
+
+
+def test_unrelated_question_misses(cache):
+    assert cache.lookup("Convert 10 miles to kilometers", ["web_search"]) is None
+    assert cache.stats["misses"] == 1
+
+
+def test_same_question_about_another_entity_misses():
+    question = ("Search the web for the current population, capital city, official languages, currency, largest "
+                "cities, time zones and gross domestic product of France, then summarize them in a short table")
+    other = question.replace("France", "Germany")
+    cache = PlanCache(threshold=0.9)
+    cache.store(question, _tree("France facts"))
+    # Close enough in embedding space to pass the threshold on similarity alone
+    assert float(cache._embed(question) @ cache._embed(other)) >= 0.9
+    assert cache.lookup(other, ["web_search"]) is None
+    assert cache.lookup(question, ["web_search"]) is not None
+    assert cache.stats == {"hits": 1, "misses": 1, "mismatches": 1, "stores": 1, "evictions": 0}
+
+
+def test_numbers_in_inputs_must_match():
+    cache = PlanCache(threshold=0.5)
+    cache.store("Convert 10 miles to kilometers", _tree("10 miles to km", action="unit_converter"))
+    assert cache.lookup("Convert 10 miles to kilometers please", ["unit_converter"]) is not None
+    assert cache.lookup("Convert 12 miles to kilometers", ["unit_converter"]) is None
+
+
+def test_plan_using_an_unavailable_tool_misses(cache):
+    assert cache.lookup(QUESTION, ["calculator"]) is None
+    assert cache.lookup(QUESTION, ["web_search", "calculator"]) is not None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PlanCache(max_entries=1)
+    cache.store(QUESTION, _tree())
+    cache.store("Convert 10 miles to kilometers", _tree("10 miles to km", action="unit_converter"))
+    assert len(cache) == 1 and cache.stats["evictions"] == 1
+    assert cache.lookup(QUESTION) is None
+
+
+def test_specific_terms_skip_sentence_starts_and_references():
+    assert specific_terms("What is 2 + 2? Ask \"Deep Thought\" in Paris.", sentence_starts=False) == \
+        {"2", "deep thought", "deep", "thought", "paris"}
+    assert specific_terms("Summarize {{task_3.observation}} for France") == {"summarize", "france"}
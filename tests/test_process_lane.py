@@ -0,0 +1,98 @@
+# test_process_lane.py
+
+import os
+import time
+from typing import List, Union
+
+import pytest
+
+import ProcessLane
+import UtilityTools
+from Deadlines import call_tool
+from ProcessLane import merge_chunk_results, run_in_process, shutdown_process_pool
+from ToolRegistry import ToolRegistry
+
+
+def _chunk_pids(items):
+    return [os.getpid()] * len(items)
+
+
+def chunked_pids(count: int, processes: int = 4):
+    """
+    Reports the process that handled each item of a chunked batch.
+
+    Args:
+        count (int): Items in the batch.
+        processes (int): Processes the batch may fan out to.
+    """
+    return UtilityTools._map_chunks(_chunk_pids, list(range(count)), processes, 1)
+
+
+def batch_pids(items: Union[List[int], str]) -> dict:
+    """
+    Reports the process that handled each item, slowly enough that chunks overlap.
+
+    Args:
+        items (Union[List[int], str]): The items, or a JSON array of them.
+    """
+    time.sleep(0.5)
+    return {"items": items, "pids": chunked_pids(len(items))}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def process_pool():
+    yield
+    shutdown_process_pool()
+
+
+def test_chunked_tool_does_not_fan_out_again_from_a_worker():
+    pids = run_in_process(__name__, "chunked_pids", {"count": 8}, timeout=120)
+    assert len(pids) == 8
+    assert len(set(pids)) == 1
+    assert pids[0] != os.getpid()
+
+
+def test_batch_tool_is_split_across_the_lane_workers(monkeypatch):
+    shutdown_process_pool()
+    monkeypatch.setattr(ProcessLane, "CPU_WORKERS", 2)
+    monkeypatch.setattr(ProcessLane, "MIN_CHUNK_ITEMS", 4)
+    registry = ToolRegistry()
+    registry.register("batch_pids", __name__, "batch_pids", execution="cpu", batch="items")
+    try:
+        result = call_tool(registry.get("batch_pids"), {"items": list(range(10))}, timeout=120)
+        assert result["items"] == list(range(10))
+        assert len(set(result["pids"])) == 2
+        assert os.getpid() not in result["pids"]
+        # A JSON array string is split the same way; a batch too small for two chunks is not
+        result = call_tool(registry.get("batch_pids"), {"items": "[1, 2, 3, 4, 5, 6, 7, 8]"}, timeout=120)
+        assert result["items"] == list(range(1, 9))
+        assert len(set(result["pids"])) == 2
+        assert len(set(call_tool(registry.get("batch_pids"), {"items": [1, 2, 3]}, timeout=120)["pids"])) == 1
+    finally:
+        shutdown_process_pool()
+
+
+def test_merge_chunk_results_joins_lists_and_columns():
+    assert merge_chunk_results([[1, 2], [3]]) == [1, 2, 3]
+    assert merge_chunk_results([{"polarity": [0.1], "subjectivity": [0.2]},
+                                {"polarity": [0.3], "subjectivity": [0.4]}]) == {"polarity": [0.1, 0.3],
+                                                                                 "subjectivity": [0.2, 0.4]}
+    with pytest.raises(TypeError):
+        merge_chunk_results([1, 2])
+
+
+def test_batch_must_name_a_parameter():
+    registry = ToolRegistry()
+    registry.register("html_to_text_batch", "UtilityTools", "html_to_text_batch", execution="cpu", batch="pages")
+    with pytest.raises(ValueError):
+        registry.get("html_to_text_batch")
+
+
+def test_cpu_tool_with_chunked_batch_runs_in_the_process_lane():
+    registry = ToolRegistry()
+    registry.register("html_to_text_batch", "UtilityTools", "html_to_text_batch", execution="cpu",
+                      batch="html_documents")
+    tool = registry.get("html_to_text_batch")
+    documents = [f"<html><body><main><p>Page {i}</p></main></body></html>" for i in range(40)]
+    result = call_tool(tool, {"html_documents": documents, "processes": 4, "min_docs_per_process": 2}, timeout=120)
+    assert result == [f"Page {i}" for i in range(40)]
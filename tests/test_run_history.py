@@ -0,0 +1,130 @@
+# test_run_history.py
+
+import json
+import os
+import uuid
+
+import pytest
+
+from RunHistory import RUNS_TABLE, TASKS_TABLE, RunHistoryWriter
+
+
+class FakeDBHelper:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.copies = []
+        self.closed = False
+
+    def execute_sync(self, query):
+        pass
+
+    def copy_rows_sync(self, table, columns, rows, skip_conflicts=False):
+        if table in self.failing:
+            raise RuntimeError(f"{table} is unavailable")
+        self.copies.append((table, list(rows), skip_conflicts))
+
+    def close_copy_sync(self):
+        self.closed = True
+
+
+def _spill(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for table, row in records:
+            f.write(json.dumps({"table": table, "row": list(row)}) + "\n")
+
+
+def _spilled_tables(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["table"] for line in f if line.strip()]
+
+
+def test_replay_keeps_only_the_tables_that_failed(tmp_path):
+    path = str(tmp_path / "spill.jsonl")
+    _spill(path, [(RUNS_TABLE, ("r1",) + (None,) * 8), (TASKS_TABLE, ("r1", "1") + (None,) * 7)])
+
+    helper = FakeDBHelper(failing={TASKS_TABLE})
+    writer = RunHistoryWriter(helper, spill_path=path, create_tables=False)
+    with pytest.raises(RuntimeError):
+        writer.replay_spill()
+    assert [copy[0] for copy in helper.copies] == [RUNS_TABLE]
+    assert _spilled_tables(path) == [TASKS_TABLE]
+
+    helper.failing.clear()
+    assert writer.replay_spill() == 1
+    assert [copy[0] for copy in helper.copies] == [RUNS_TABLE, TASKS_TABLE]
+    assert not os.path.exists(path)
+
+
+def test_runs_are_copied_skipping_conflicts(tmp_path):
+    helper = FakeDBHelper()
+    writer = RunHistoryWriter(helper, spill_path=str(tmp_path / "spill.jsonl"), create_tables=False)
+    writer.record_task("r1", {"task_no": 1, "observation": "x"}, "success", 0.0, 1.0)
+    writer.record_run("r1", "test", "bfs", "q", 0.0, 1.0)
+    writer.start()
+    writer.stop()
+    assert {(table, skip) for table, _, skip in helper.copies} == {(RUNS_TABLE, True), (TASKS_TABLE, False)}
+    assert helper.closed
+
+
+def test_failed_flush_spills_the_batch(tmp_path):
+    path = str(tmp_path / "spill.jsonl")
+    writer = RunHistoryWriter(FakeDBHelper(failing={RUNS_TABLE}), spill_path=path, create_tables=False)
+    writer.record_run("r1", "test", "bfs", "q", 0.0, 1.0)
+    writer.start()
+    writer.stop()
+    assert writer.stats["flush_errors"] == 1
+    assert _spilled_tables(path) == [RUNS_TABLE]
+
+
+@pytest.mark.skipif(not os.environ.get("REACTREE_TEST_POSTGRES"),
+                    reason="set REACTREE_TEST_POSTGRES=dbname:user:password[:host[:port]] to run against Postgres")
+def test_replay_against_postgres_is_idempotent(tmp_path):
+    from DBHelpers import PostgresDBHelper
+
+    helper = PostgresDBHelper(*os.environ["REACTREE_TEST_POSTGRES"].split(":"))
+    run_id = f"test-{uuid.uuid4()}"
+    path = str(tmp_path / "spill.jsonl")
+    writer = RunHistoryWriter(helper, spill_path=path)
+    writer.start()
+    writer.stop()
+    row = (run_id, "test", "bfs", "q", None, None, 1.0, None, None)
+    for _ in range(2):
+        # The same run spilled twice, e.g. by a replay that failed half-way
+        _spill(path, [(RUNS_TABLE, row)])
+        assert writer.replay_spill() == 1
+    try:
+        # The query helpers open and close their own connection without touching COPY's
+        df = helper.read_query_df_sync(f"SELECT count(*) AS n FROM {RUNS_TABLE} WHERE run_id = '{run_id}'")
+        assert int(df["n"][0]) == 1
+        assert not helper.copy_conn.closed
+    finally:
+        helper.execute_sync(f"DELETE FROM {RUNS_TABLE} WHERE run_id = '{run_id}'")
+        helper.close_copy_sync()
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.tasks = []
+        self.runs = []
+
+    def record_task(self, run_id, task, status, *args):
+        self.tasks.append((task["task_no"], status))
+
+    def record_run(self, run_id, *args, **kwargs):
+        self.runs.append(run_id)
+
+
+def test_graph_runs_record_tool_errors_as_failed():
+    from agentic_system_graph import AgenticSystemGraph
+
+    tree = {"task_tree": {"task": {"task_no": 0, "level_no": 0, "observation": "", "sub_tasks": [
+        {"task_no": 1, "level_no": 1, "observation": "Paris", "sub_tasks": []},
+        {"task_no": 2, "level_no": 1, "observation": "Error executing web_search: timed out", "sub_tasks": []},
+        {"task_no": 3, "level_no": 1, "observation": "Tool lookup not found.", "sub_tasks": []},
+        {"task_no": 4, "level_no": 1, "observation": "", "sub_tasks": []},
+    ]}}}
+    writer = RecordingWriter()
+    graph = AgenticSystemGraph(history_writer=writer)
+    graph._record_run("run-1", {"execution_result": json.dumps(tree), "user_input": "q", "final_answer": "a"}, 0.0)
+    assert writer.tasks == [(1, "success"), (2, "failed"), (3, "failed"), (4, "failed")]
+    assert writer.runs == ["run-1"]
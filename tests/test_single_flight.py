@@ -0,0 +1,71 @@
+# test_single_flight.py
+
+import threading
+import time
+
+import pytest
+
+from Deadlines import ToolTimeoutError
+from SingleFlight import SingleFlight, call_key, find_duplicates
+
+
+def test_call_keys_ignore_key_order_and_whitespace():
+    assert call_key("t", {"a": 1, "b": 2}) == call_key("t", {"b": 2, "a": 1})
+    assert call_key("t", " q ") == call_key("t", "q")
+    assert call_key("t", "q") != call_key("u", "q")
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flights = SingleFlight()
+    started = threading.Event()
+    executions = []
+
+    def slow():
+        executions.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("k", slow)))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(flights.do("k", slow))) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert results == ["result"] * 5
+    assert len(executions) == 1
+    assert flights.snapshot() == {"calls": 5, "executions": 1, "coalesced": 4, "plan_duplicates": 0,
+                                  "reused_in_tree": 0, "in_flight": 0}
+
+
+def test_errors_are_shared_and_nothing_is_cached():
+    flights = SingleFlight()
+    with pytest.raises(RuntimeError):
+        flights.do("k", lambda: (_ for _ in ()).throw(RuntimeError("down")))
+    assert flights.do("k", lambda: "again") == "again"
+    assert flights.snapshot()["executions"] == 2
+
+
+def test_waiting_caller_times_out():
+    flights = SingleFlight()
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: flights.do("k", release.wait))
+    leader.start()
+    while not flights.snapshot()["in_flight"]:
+        time.sleep(0.01)
+    with pytest.raises(ToolTimeoutError):
+        flights.do("k", lambda: None, timeout=0.05)
+    release.set()
+    leader.join()
+
+
+def test_find_duplicates_maps_repeats_to_the_first_task():
+    first = {"task_no": 1, "level_no": 1, "action": "search", "action_input": "q", "sub_tasks": []}
+    repeat = {"task_no": 3, "level_no": 2, "action": "search", "action_input": " q", "sub_tasks": []}
+    other = {"task_no": 2, "level_no": 1, "action": "search", "action_input": "r", "sub_tasks": [repeat]}
+    root = {"task_no": 0, "level_no": 0, "action": "search", "action_input": "q", "sub_tasks": [first, other]}
+    assert find_duplicates(root) == {id(repeat): first}
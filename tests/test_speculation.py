@@ -0,0 +1,130 @@
+# test_speculation.py
+
+import copy
+import json
+import threading
+import time
+
+import pytest
+from langchain_core.tools import Tool
+
+import Execution_Algorithm
+from Execution_Algorithm import ExecutionAlgorithm
+from SingleFlight import SingleFlight
+from Speculation import SpeculationLedger, speculation_stats
+
+
+def _task(task_no, action_input, level_no=1, observation="", sub_tasks=()):
+    return {"task_no": task_no, "level_no": level_no, "task_priority": 1, "action": "echo",
+            "action_input": action_input, "observation": observation, "sub_tasks": list(sub_tasks)}
+
+
+def _tree(*sub_tasks):
+    return {"task_tree": {"task": {"task_no": 0, "level_no": 0, "original_question": "q", "action": "",
+                                   "action_input": "", "observation": "", "sub_tasks": list(sub_tasks)}}}
+
+
+def _observations(tree_json):
+    observations = {}
+    stack = [json.loads(tree_json)['task_tree']['task']]
+    while stack:
+        task = stack.pop()
+        observations[task['task_no']] = task.get('observation')
+        stack.extend(task.get('sub_tasks') or [])
+    return observations
+
+
+class Replanner:
+    """Answers the first replan with the given trees in turn, then <NO_REPLAN>."""
+
+    def __init__(self, *trees, before=None):
+        self.trees = list(trees)
+        self.before = before
+        self.calls = 0
+
+    def __call__(self, tree_json, tools_str):
+        self.calls += 1
+        if self.before:
+            self.before()
+        return json.dumps(self.trees.pop(0)) if self.trees else "<NO_REPLAN>"
+
+
+@pytest.fixture
+def flights(monkeypatch):
+    flights = SingleFlight()
+    monkeypatch.setattr(Execution_Algorithm, "tool_flights", flights)
+    return flights
+
+
+def _engine(replanner, delay=0.0, started=None, max_parallel=4):
+    calls = []
+
+    def echo(text):
+        calls.append(text)
+        if started is not None:
+            started.set()
+        time.sleep(delay)
+        return f"echo:{text}"
+
+    engine = ExecutionAlgorithm([Tool(name="echo", func=echo, description="Returns its input.")],
+                                replan_enable=True, speculate=True, max_parallel=max_parallel)
+    engine.replanner = replanner
+    return engine, calls
+
+
+def test_unchanged_plan_commits_every_speculation(flights):
+    tree = _tree(_task(1, "a", sub_tasks=[_task(3, "c", level_no=2)]), _task(2, "b"))
+    engine, calls = _engine(Replanner())
+    observations = _observations(engine.process_task_bfs_parallel(json.dumps(tree), run_id="commit"))
+    assert [observations[task_no] for task_no in (1, 2, 3)] == ["echo:a", "echo:b", "echo:c"]
+    assert sorted(calls) == ["a", "b", "c"]
+    report = speculation_stats.run("commit")
+    assert (report["speculated"], report["committed"], report["discarded"], report["cancelled"]) == (3, 3, 0, 0)
+
+
+def test_changed_task_is_discarded_and_the_rest_committed(flights):
+    tree = _tree(_task(1, "a"), _task(2, "b"))
+    replanned = copy.deepcopy(tree)
+    replanned["task_tree"]["task"]["sub_tasks"][1]["action_input"] = "b2"
+    engine, calls = _engine(Replanner(replanned, before=lambda: time.sleep(0.2)))
+    observations = _observations(engine.process_task_bfs_parallel(json.dumps(tree), run_id="discard"))
+    assert (observations[1], observations[2]) == ("echo:a", "echo:b2")
+    assert sorted(calls) == ["a", "b", "b2"]
+    report = speculation_stats.run("discard")
+    # Task 1 is committed into the replanned tree; task 2 is discarded, then speculated again with its new input
+    assert (report["speculated"], report["committed"], report["discarded"]) == (3, 2, 1)
+
+
+def test_speculations_not_started_are_cancelled(flights):
+    tree = _tree(_task(1, "a"), _task(2, "b"))
+    replanned = _tree(_task(5, "e"))
+    started = threading.Event()
+    engine, calls = _engine(Replanner(replanned, before=started.wait), delay=0.3, started=started, max_parallel=1)
+    observations = _observations(engine.process_task_bfs_parallel(json.dumps(tree), run_id="cancel"))
+    assert observations[5] == "echo:e"
+    report = speculation_stats.run("cancel")
+    assert (report["discarded"], report["cancelled"]) == (1, 1)
+    assert report["wasted_s"] > 0
+
+
+def test_reused_twin_is_counted_only_when_committed(flights):
+    kept = _tree(_task(1, "a", observation="echo:a"), _task(2, "a"))
+    engine, _ = _engine(Replanner())
+    observations = _observations(engine.process_task_bfs_parallel(json.dumps(kept), run_id="reuse-kept"))
+    assert observations[2] == "echo:a"
+    assert flights.snapshot()["reused_in_tree"] == 1
+
+    dropped = _tree(_task(1, "a", observation="echo:a"))
+    engine, _ = _engine(Replanner(dropped))
+    engine.process_task_bfs_parallel(json.dumps(kept), run_id="reuse-dropped")
+    assert speculation_stats.run("reuse-dropped")["discarded"] == 1
+    assert flights.snapshot()["reused_in_tree"] == 1
+
+
+def test_ledger_keeps_recent_runs_and_totals():
+    ledger = SpeculationLedger(history=1)
+    ledger.count("a", "speculated")
+    ledger.count("b", "wasted_s", 0.12345)
+    assert ledger.run("a") is None
+    assert ledger.run("b")["wasted_s"] == 0.12345
+    assert ledger.snapshot()["speculated"] == 1 and ledger.snapshot()["wasted_s"] == 0.123
@@ -0,0 +1,110 @@
+# test_task_references.py
+
+import json
+import threading
+
+import pytest
+from langchain_core.tools import Tool
+
+from Execution_Algorithm import ExecutionAlgorithm
+from TaskReferences import UnresolvedReferenceError, index_tasks, pending_references, resolve_references
+
+FAILED = "Tool execution failed."
+
+
+def _task(task_no, level_no=1, action_input="", observation="", sub_tasks=()):
+    return {"task_no": task_no, "level_no": level_no, "task_priority": 1, "action": "echo",
+            "action_input": action_input, "observation": observation, "sub_tasks": list(sub_tasks)}
+
+
+def _tree(*sub_tasks):
+    return {"task_tree": {"task": {"task_no": 0, "level_no": 0, "original_question": "q", "action": "",
+                                   "action_input": "", "observation": "", "sub_tasks": list(sub_tasks)}}}
+
+
+def _engine(**kwargs):
+    echo = Tool(name="echo", func=lambda text: f"echo:{text}", description="Returns its input.")
+    return ExecutionAlgorithm([echo], **kwargs)
+
+
+def _observations(tree_json):
+    observations = {}
+    stack = [json.loads(tree_json)['task_tree']['task']]
+    while stack:
+        task = stack.pop()
+        observations[task['task_no']] = task.get('observation')
+        stack.extend(task.get('sub_tasks') or [])
+    return observations
+
+
+def _run_with_timeout(process, tree, seconds=10):
+    # A regression would loop forever, so run in a thread and fail instead of hanging the suite
+    result = []
+    thread = threading.Thread(target=lambda: result.append(process(json.dumps(tree))), daemon=True)
+    thread.start()
+    thread.join(seconds)
+    assert result, "the run did not finish"
+    return _observations(result[0])
+
+
+def test_references_resolve_to_values_and_paths():
+    tasks = index_tasks(_tree(_task(1, observation='{"items": [{"title": "T"}]}'),
+                              _task(2, observation="plain"))['task_tree']['task'])
+    assert resolve_references("{{task_1.observation.items[0].title}}", tasks) == "T"
+    assert resolve_references({"q": "about {{ task_2.observation }}"}, tasks) == {"q": "about plain"}
+    assert resolve_references("{{task_1.observation}}", tasks) == '{"items": [{"title": "T"}]}'
+    with pytest.raises(UnresolvedReferenceError):
+        resolve_references("{{task_2.observation.field}}", tasks)
+    with pytest.raises(UnresolvedReferenceError):
+        resolve_references("{{task_9.observation}}", tasks)
+
+
+def test_pending_references_skip_what_waiting_cannot_satisfy():
+    child = _task(3, level_no=2)
+    parent = _task(1, action_input="{{task_0.observation}} {{task_2.observation}} {{task_3.observation}}",
+                   sub_tasks=[child])
+    later = _task(2)
+    tasks = index_tasks(_tree(parent, later)['task_tree']['task'])
+    assert pending_references(parent, tasks) == ["2"]
+    assert pending_references(parent, tasks, scheduled={id(parent)}) == []
+
+
+@pytest.mark.parametrize("mode", ["process_task_bfs_parallel", "process_task_bfs", "process_task_dfs",
+                                  "process_task_dfs_parallel"])
+def test_reference_chains_run_in_order(mode):
+    tree = _tree(_task(1, action_input="{{task_2.observation}}"), _task(2, action_input="x"))
+    observations = _run_with_timeout(getattr(_engine(), mode), tree)
+    assert observations[1] == "echo:echo:x"
+
+
+@pytest.mark.parametrize("replan_enable", [False, True])
+def test_unsatisfiable_references_fail_instead_of_hanging(replan_enable):
+    engine = _engine(replan_enable=replan_enable)
+    engine.replanner = lambda tree_json, tools_str: "<NO_REPLAN>"
+    tree = _tree(_task(1, action_input="{{task_0.observation}}"),
+                 _task(2, action_input="{{task_4.observation}}", sub_tasks=[_task(4, level_no=2, action_input="y")]),
+                 _task(5, action_input="{{task_6.observation}}"),
+                 _task(6, action_input="{{task_5.observation}}"),
+                 _task(7, action_input="{{task_8.observation}}", sub_tasks=[]),
+                 _task(9, action_input="z", sub_tasks=[_task(8, level_no=2, action_input="w")]))
+    observations = _run_with_timeout(engine.process_task_bfs_parallel, tree)
+    assert [observations[task_no] for task_no in (1, 2, 5, 6)] == [FAILED] * 4
+    assert observations[4] == "echo:y"
+    # Level by level with replanning, task 8 runs after task 7; without it, task 7 waits for it
+    assert observations[7] == (FAILED if replan_enable else "echo:echo:w")
+
+
+@pytest.mark.parametrize("mode", ["process_task_dfs", "process_task_dfs_parallel"])
+def test_depth_first_modes_wait_for_later_subtrees_and_fail_cycles(mode):
+    # Task 1's long chain ranks it first, so its subtask 3 is reached before task 8 in the next subtree
+    chain = _task(4, level_no=2, action_input="c", sub_tasks=[
+        _task(10, level_no=3, action_input="d", sub_tasks=[_task(11, level_no=4, action_input="e")])])
+    tree = _tree(_task(1, action_input="a", sub_tasks=[_task(3, level_no=2, action_input="{{task_8.observation}}"),
+                                                       chain]),
+                 _task(9, action_input="z", sub_tasks=[_task(8, level_no=2, action_input="w")]),
+                 _task(5, action_input="{{task_6.observation}}"),
+                 _task(6, action_input="{{task_5.observation}}"))
+    observations = _run_with_timeout(getattr(_engine(), mode), tree)
+    assert observations[3] == "echo:echo:w"
+    assert observations[11] == "echo:e"
+    assert observations[5] == observations[6] == FAILED
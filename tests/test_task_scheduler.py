@@ -0,0 +1,72 @@
+# test_task_scheduler.py
+
+from Deadlines import LatencyTracker
+from TaskScheduler import TaskScheduler
+
+
+def _task(task_no, action="tool", priority=1, sub_tasks=(), action_input="", observation=""):
+    return {"task_no": task_no, "level_no": 1, "task_priority": priority, "action": action,
+            "action_input": action_input, "observation": observation, "sub_tasks": list(sub_tasks)}
+
+
+def _root(*sub_tasks):
+    return {"task_no": 0, "level_no": 0, "sub_tasks": list(sub_tasks)}
+
+
+def _drain(scheduler, tasks):
+    for task in tasks:
+        scheduler.push(task)
+    order = []
+    while scheduler:
+        order.append(scheduler.pop()["task_no"])
+    return order
+
+
+def test_longest_chain_runs_first():
+    chain = _task(1, sub_tasks=[_task(3, sub_tasks=[_task(5)])])
+    leaf = _task(2)
+    scheduler = TaskScheduler(_root(leaf, chain), latency=LatencyTracker())
+    assert scheduler.critical_path(chain) == 3.0
+    assert _drain(scheduler, [leaf, chain]) == [1, 2]
+
+
+def test_tool_latency_drives_the_estimate():
+    latency = LatencyTracker()
+    for _ in range(5):
+        latency.record("slow", 4.0)
+        latency.record("fast", 0.1)
+    slow, fast = _task(1, action="slow"), _task(2, action="fast", sub_tasks=[_task(3, action="fast")])
+    scheduler = TaskScheduler(_root(fast, slow), latency=latency)
+    assert _drain(scheduler, [fast, slow]) == [1, 2]
+
+
+def test_ties_go_to_task_priority_then_descendants_then_tree_order():
+    low, high = _task(1, priority=2), _task(2, priority=1)
+    scheduler = TaskScheduler(_root(low, high), latency=LatencyTracker())
+    assert _drain(scheduler, [low, high]) == [2, 1]
+
+    # A finished parent costs nothing; its two subtasks outweigh the other's one
+    wide = _task(1, observation="done", sub_tasks=[_task(3, observation="done"), _task(4, observation="done")])
+    narrow = _task(2, observation="done", sub_tasks=[_task(5, observation="done")])
+    scheduler = TaskScheduler(_root(narrow, wide), latency=LatencyTracker())
+    assert _drain(scheduler, [narrow, wide]) == [1, 2]
+
+    first, second = _task(1), _task(2)
+    scheduler = TaskScheduler(_root(first, second), latency=LatencyTracker())
+    assert _drain(scheduler, [second, first]) == [1, 2]
+
+
+def test_order_puts_referenced_tasks_first():
+    consumer = _task(1, priority=1, action_input="{{task_2.observation}}")
+    producer = _task(2, priority=5)
+    scheduler = TaskScheduler(_root(consumer, producer), latency=LatencyTracker())
+    assert [task["task_no"] for task in scheduler.order([consumer, producer])] == [2, 1]
+    # The consumer's work counts towards the producer's critical path
+    assert scheduler.critical_path(producer) == 2.0
+
+
+def test_reference_cycles_do_not_hang():
+    a = _task(1, action_input="{{task_2.observation}}")
+    b = _task(2, action_input="{{task_1.observation}}")
+    scheduler = TaskScheduler(_root(a, b), latency=LatencyTracker())
+    assert sorted(task["task_no"] for task in scheduler.order([a, b])) == [1, 2]
@@ -0,0 +1,150 @@
+# test_task_service.py
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+from TaskService import QueueFullError, TaskService
+
+
+class ScriptedService(TaskService):
+    """Runs no tree; each job waits until the test releases it, and records the order jobs started in."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.started = []
+        self.release = threading.Event()
+
+    def _execute(self, job, loop):
+        self.started.append(job.question)
+        self.release.wait(5)
+        if job.question == "boom":
+            raise RuntimeError("tool exploded")
+        return {"final_answer": job.question}
+
+
+async def _until(condition, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_submissions_are_validated():
+    async def run():
+        service = TaskService()
+        with pytest.raises(RuntimeError):
+            service.submit("t", question="q")
+        await service.start()
+        try:
+            for kwargs in ({"mode": "sideways", "question": "q"}, {"mode": "graph"}, {"mode": "bfs"},
+                           {"mode": "graph", "question": "q", "deadline": 0}):
+                with pytest.raises(ValueError):
+                    service.submit("t", **kwargs)
+        finally:
+            await service.stop()
+
+    asyncio.run(run())
+
+
+def test_saturated_queues_reject_with_retry_after():
+    async def run():
+        service = ScriptedService(max_workers=1, max_queue=3, tenant_queue=2, tenant_concurrency=1)
+        await service.start()
+        try:
+            service.submit("a", question="a1")
+            await _until(lambda: service.started == ["a1"])
+            service.submit("a", question="a2")
+            service.submit("a", question="a3")
+            with pytest.raises(QueueFullError) as tenant_full:
+                service.submit("a", question="a4")
+            assert "tenant a" in str(tenant_full.value) and tenant_full.value.retry_after >= 1
+            service.submit("b", question="b1")
+            with pytest.raises(QueueFullError) as service_full:
+                service.submit("c", question="c1")
+            assert "Service queue" in str(service_full.value) and service_full.value.retry_after >= 1
+            assert service.snapshot()["rejected"] == 2
+            assert service.snapshot()["queued_by_tenant"] == {"a": 2, "b": 1}
+            service.release.set()
+            await _until(lambda: service.stats["succeeded"] == 4)
+        finally:
+            await service.stop()
+
+    asyncio.run(run())
+
+
+def test_tenants_are_served_round_robin_within_their_quota():
+    async def run():
+        service = ScriptedService(max_workers=2, tenant_concurrency=1)
+        await service.start()
+        try:
+            for question in ("a1", "a2", "a3"):
+                service.submit("a", question=question)
+            service.submit("b", question="b1")
+            # Tenant a may only run one job, so b's job takes the second worker
+            await _until(lambda: len(service.started) == 2)
+            assert sorted(service.started) == ["a1", "b1"]
+            assert service.snapshot()["running_by_tenant"] == {"a": 1, "b": 1}
+            service.release.set()
+            await _until(lambda: service.stats["succeeded"] == 4)
+            assert service.started[2:] == ["a2", "a3"]
+        finally:
+            await service.stop()
+
+    asyncio.run(run())
+
+
+def test_job_events_stream_until_the_job_finishes():
+    async def run():
+        service = ScriptedService()
+        service.release.set()
+        await service.start()
+        try:
+            succeeded = service.submit("t", question="fine")
+            failed = service.submit("t", question="boom")
+            events = [event async for event in succeeded.stream()]
+            failures = [event async for event in failed.stream()]
+        finally:
+            await service.stop()
+        assert [event["event"] for event in events] == ["queued", "running", "succeeded"]
+        assert events[-1]["data"] == {"final_answer": "fine"}
+        assert failures[-1] == {"event": "failed", "data": {"error": "tool exploded"}}
+        assert service.get(failed.job_id).to_dict()["status"] == "failed"
+
+    asyncio.run(run())
+
+
+def test_execution_modes_run_the_given_tree():
+    tree = {"task_tree": {"task": {"task_no": 0, "level_no": 0, "original_question": "q", "action": "",
+                                   "action_input": "", "observation": "", "sub_tasks": []}}}
+
+    async def run():
+        service = TaskService(max_workers=1)
+        await service.start()
+        try:
+            job = service.submit("t", mode="bfs", task_tree=json.dumps(tree))
+            events = [event async for event in job.stream()]
+        finally:
+            await service.stop()
+        assert events[-1]["event"] == "succeeded"
+        assert job.result == {"task_tree": tree}
+
+    asyncio.run(run())
+
+
+def test_rest_api_answers_429_with_retry_after(monkeypatch):
+    pytest.importorskip("chainlit")
+    from fastapi.testclient import TestClient
+
+    import main
+
+    monkeypatch.setattr(main, "task_service", ScriptedService(max_queue=0))
+    with TestClient(main.app) as client:
+        response = client.post("/tasks", json={"question": "q"}, headers={"X-Tenant-Id": "a"})
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert client.post("/tasks", json={"mode": "sideways"}).status_code == 422
+        assert client.get("/tasks/unknown").status_code == 404
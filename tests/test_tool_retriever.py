@@ -0,0 +1,61 @@
+# test_tool_retriever.py
+
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from ToolRetriever import ToolRetriever, select_tools
+
+DESCRIPTIONS = {
+    "currency_converter": "Converts money between currencies using exchange rates.",
+    "weather_info": "Returns the current weather forecast for a city.",
+    "web_search": "Searches the web for pages matching a query.",
+    "calculator": "Evaluates arithmetic expressions.",
+    "translate_text": "Translates text into another language.",
+    "summarize_text": "Summarizes a long text into a few sentences.",
+    "sentiment_analysis": "Scores the sentiment of a text.",
+    "unit_converter": "Converts quantities between units of measurement.",
+    "date_info": "Returns today's date and weekday.",
+    "html_to_text": "Extracts readable text from an HTML page.",
+}
+
+
+def _tools():
+    return [SimpleNamespace(name=name, description=description, args={})
+            for name, description in DESCRIPTIONS.items()]
+
+
+@pytest.fixture(params=["faiss", "brute_force"])
+def retriever(request, monkeypatch):
+    if request.param == "faiss":
+        pytest.importorskip("faiss")
+    else:
+        # A None entry makes `import faiss` raise ImportError
+        monkeypatch.setitem(sys.modules, "faiss", None)
+    retriever = ToolRetriever(_tools(), top_k=3)
+    assert (retriever._index is None) == (request.param == "brute_force")
+    return retriever
+
+
+def test_search_ranks_the_matching_tool_first(retriever):
+    assert retriever.search("What is the weather forecast in Paris?")[0].name == "weather_info"
+    assert retriever.search("convert 100 dollars to euros using exchange rates")[0].name == "currency_converter"
+    assert len(retriever.search("translate this text", k=5)) == 5
+
+
+def test_select_keeps_top_k_plus_always_included_in_registration_order(retriever):
+    selected = retriever.select("summarize a long text", always_include=["calculator"])
+    assert "summarize_text" in selected and "calculator" in selected
+    assert len(selected) <= 4
+    assert list(selected) == [name for name in DESCRIPTIONS if name in selected]
+
+
+@pytest.mark.parametrize("question", ["", "the of and", "xyzzy plugh"])
+def test_empty_or_unrelated_questions_get_every_tool(retriever, question):
+    assert list(retriever.select(question)) == list(DESCRIPTIONS)
+
+
+def test_small_toolsets_are_returned_without_a_search():
+    tools = {tool.name: tool for tool in _tools()[:3]}
+    assert select_tools("anything", tools, k=8) is tools
@@ -0,0 +1,62 @@
+# test_utility_tools.py
+
+import pytest
+
+from UtilityTools import calculator, calculator_batch
+
+
+def test_calculator_batch_matches_calculator():
+    assert calculator_batch("sqrt(x**2 + y**2)", {"x": [3, 5], "y": [4, 12]}) == [5.0, 13.0]
+    assert calculator_batch("x * pi", {"x": [1.0, 2.0]}) == [calculator("pi"), calculator("2 * pi")]
+
+
+@pytest.mark.parametrize("expression, x, expected", [
+    ("x**40", 10, 1e40),
+    ("2**x", 70, 2.0 ** 70),
+])
+def test_calculator_batch_does_not_wrap_integers(expression, x, expected):
+    assert calculator_batch(expression, {"x": [x]}) == [pytest.approx(expected)]
+
+
+def test_calculator_batch_integer_functions_are_exact():
+    assert calculator_batch("factorial(x)", {"x": [25, 5.0]}) == [pytest.approx(1.5511210043330986e25), 120.0]
+    assert calculator_batch("gcd(x, y)", {"x": [12, 9], "y": 6}) == [6.0, 3.0]
+
+
+def test_calculator_batch_rejects_unknown_names():
+    with pytest.raises(ValueError):
+        calculator_batch("open(x)", {"x": [1]})
+
+
+def test_textrank_ranks_long_texts_in_bounded_blocks(monkeypatch):
+    import UtilityTools
+
+    sentences = [f"Sentence {i} talks about topic {i % 7} and item {i % 11}." for i in range(230)]
+    monkeypatch.setattr(UtilityTools, "TEXTRANK_MAX_SENTENCES", 50)
+    scores = UtilityTools._textrank_scores(sentences)
+    assert len(scores) == len(sentences)
+    assert scores.sum() == pytest.approx(1.0)
+
+    summary = UtilityTools.summarize_text(" ".join(sentences), ratio=0.1)
+    assert len(summary.splitlines()) == 23
+
+
+def test_parse_csv_columns_are_json_serializable():
+    import json
+
+    from UtilityTools import parse_csv
+
+    columns = parse_csv("a,b,c\n1,2.5,x\n2,,y\n", output='columns')
+    assert columns == {"a": [1, 2], "b": [2.5, None], "c": ["x", "y"]}
+    assert json.loads(json.dumps(columns)) == columns
+
+
+@pytest.mark.parametrize("backend", ["lxml", "bs4"])
+def test_html_to_text_handles_empty_and_xhtml(backend):
+    from UtilityTools import html_to_text
+
+    assert html_to_text("", backend=backend) == ""
+    assert html_to_text("  \n ", backend=backend) == ""
+    xhtml = ('<?xml version="1.0" encoding="utf-8"?>'
+             '<html xmlns="http://www.w3.org/1999/xhtml"><body><nav>Menu</nav><main><p>Café</p></main></body></html>')
+    assert html_to_text(xhtml, backend=backend) == "Café"